@@ -1,6 +1,178 @@
-from __future__ import annotations
-import random
-from typing import List, Dict, Tuple
-import pandas as pd
-from dash import Dash, dcc, html, Output, Input, State, callback_context
+"""
+This houses the Dash version of the dashboard. Unlike the streamlit one, nothing here reruns per viewer: every
+browser tab checks in with the process's shared data service (see data_service.py) every UPDATE_MS through
+a dcc.Interval, sending the component versions it has (kept in a dcc.Store). It gets back only the components
+that changed. When a component changed by just a few rows, those rows go out as a Patch and not the whole list.
+The service reads the background poller's snapshots, so 50 open tabs make the same upstream requests as one.
 
+    python app.py [--league ...] [--username ...] [--week N] [--port 8050]
+"""
+import argparse
+import json
+import os
+import traceback
+
+from dash import Dash, Input, Output, Patch, State, ctx, dcc, html, no_update
+from dash.exceptions import PreventUpdate
+
+import tracing
+from data_service import COMPONENTS, get_service
+from live_cache import NoSnapshotYet
+from render_rows import TEAM_COLORS
+
+LEAGUE_ID = "1180303931006689280"  # FFF league
+USERNAME = "TitsBon"
+SAVE_STATE_FILE = 'save_state.json'
+# how often each tab asks the service for changes (ms). Upstream polling runs on the poller's own schedule.
+UPDATE_MS = 2000
+
+
+def saved_week():
+    """
+    The week the streamlit dashboard was last on (save_state.json), week 1 if there isn't one.
+    """
+    if os.path.exists(SAVE_STATE_FILE):
+        with open(SAVE_STATE_FILE, 'r') as f:
+            return json.load(f)["current_week"]
+    return 1
+
+
+# --- rows (the Dash versions of render_rows.py's html) ---
+
+def header_view(row):
+    children = [html.H3(f"{row['my_team']} ({row['my_user']}) {row['my_points']:.2f} - "
+                        f"{row['opp_points']:.2f} {row['opp_team']} ({row['opp_user']})")]
+    if "win_prob" in row:
+        children.append(html.Div(f"Win probability {row['win_prob']:.0%} · projected {row['my_projection']:.1f} "
+                                 f"vs {row['opp_projection']:.1f}", style={"color": "#666"}))
+    return html.Div(children)
+
+
+def player_view(row):
+    return html.Div(
+        [html.B(row["name"]), f" ({row['team']} {row['position']}) - {row['points']:.1f} pts"],
+        style={"backgroundColor": row["color"], "color": "black", "padding": "10px 14px", "marginBottom": "6px",
+               "borderRadius": "10px", "fontWeight": 500})
+
+
+def team_badge(team):
+    return html.Span(team, style={"backgroundColor": TEAM_COLORS.get(team, "#888"), "color": "white",
+                                  "border": "2px solid black", "borderRadius": "6px", "fontWeight": 700,
+                                  "display": "inline-block", "width": "3.8em", "textAlign": "center"})
+
+
+def game_view(row):
+    return html.Div(
+        [team_badge(row["away_team"]),
+         html.Span(f"{row['away_score']:>2} - {row['home_score']:>2}",
+                   style={"fontFamily": "monospace", "fontWeight": "bold", "margin": "0 10px"}),
+         team_badge(row["home_team"]),
+         html.Span(f"| {row['status']} | {row['bet']}", style={"fontFamily": "monospace", "marginLeft": "10px"})],
+        style={"backgroundColor": "#f8f8f8", "border": "1px solid #ddd", "borderRadius": "2px", "padding": "4px"})
+
+
+VIEWS = {"header": header_view, "my_lineup": player_view, "opp_lineup": player_view, "slate": game_view}
+
+
+def create_app(league_id=LEAGUE_ID, username=USERNAME, week=None):
+    week = saved_week() if week is None else week
+    service = get_service(league_id, username, week)
+    app = Dash(__name__, title="Football Sunday Dashboard")
+
+    # the page starts empty, the first interval tick sends everything (so loading the page does no work)
+    app.layout = html.Div([
+        dcc.Store(id="versions", data={}),
+        dcc.Interval(id="tick", interval=UPDATE_MS, n_intervals=0),
+        html.H1(f"Football Sunday Dashboard - Week {week}"),
+        html.Div(id="header"),
+        html.Div([
+            html.Div([
+                html.Div([html.Div(id="my_lineup")], style={"flex": 1, "marginRight": "12px"}),
+                html.Div([html.Div(id="opp_lineup")], style={"flex": 1}),
+            ], style={"display": "flex", "flex": 2, "marginRight": "24px"}),
+            html.Div([html.H3("Full Slate"), html.Div(id="slate")], style={"flex": 1}),
+        ], style={"display": "flex"}),
+        html.Hr(),
+        html.Div([
+            # filled in (and kept current) by push_changes, so building the app doesn't wait on the first poll
+            dcc.Dropdown(id="bet-team", options=[], placeholder="Team",
+                         style={"width": "120px", "display": "inline-block", "verticalAlign": "middle"}),
+            dcc.Input(id="bet-spread", type="number", step=0.5, placeholder="Spread (ML=0)",
+                      style={"width": "120px", "marginLeft": "8px"}),
+            html.Button("Save Bet", id="save-bet", n_clicks=0, style={"marginLeft": "8px"}),
+            html.Button("Clear Bets", id="clear-bets", n_clicks=0, style={"marginLeft": "8px"}),
+            html.Span(id="bet-status", style={"marginLeft": "12px"}),
+        ]),
+    ], style={"padding": "1rem"})
+
+    @app.callback(Output("versions", "data"), *[Output(name, "children") for name in COMPONENTS],
+                  Output("bet-team", "options"), Input("tick", "n_intervals"), State("versions", "data"))
+    def push_changes(_, versions):
+        try:
+            updates = service.changes_since(versions or {})
+        except NoSnapshotYet:
+            # upstream down or offline, the poller logs why and keeps retrying
+            raise PreventUpdate
+        except Exception:
+            # a bug in building the updates, keep what the tab has but don't hide it
+            print(f"Update for week {service.week} failed:")
+            traceback.print_exc()
+            raise PreventUpdate
+        if not updates:
+            raise PreventUpdate
+        versions = dict(versions or {})
+        outputs = []
+        for name in COMPONENTS:
+            update = updates.get(name)
+            if update is None:
+                outputs.append(no_update)
+                continue
+            versions[name] = update["version"]
+            view = VIEWS[name]
+            if "patch" in update:
+                patch = Patch()
+                for index, row in update["patch"].items():
+                    patch[index] = view(row)
+                outputs.append(patch)
+            else:
+                outputs.append([view(row) for row in update["rows"]])
+        # a patch only touches rows already on the slate, so the teams only change with a full slate
+        slate = updates.get("slate")
+        teams = service.teams() if slate is not None and "rows" in slate else no_update
+        return (versions, *outputs, teams)
+
+    @app.callback(Output("bet-status", "children"),
+                  Input("save-bet", "n_clicks"), Input("clear-bets", "n_clicks"),
+                  State("bet-team", "value"), State("bet-spread", "value"), prevent_initial_call=True)
+    def save_bet(_, __, team, spread):
+        # the slate change itself reaches every tab (this one included) on its next tick
+        if ctx.triggered_id == "clear-bets":
+            service.clear_bets()
+            return "Bets cleared"
+        if not team or spread is None:
+            return "Pick a team and a spread"
+        spread = service.place_bet(team, spread)
+        print(f"Saved bet: {team} {spread:+.1f}")
+        return f"Saved {team} {spread:+.1f}"
+
+    # for a Prometheus scraper (spans only show up with SUNDAY_TRACE set, endpoint stats always do)
+    @app.server.route("/metrics")
+    def metrics():
+        return tracing.prometheus(), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Dash dashboard.")
+    parser.add_argument("--league", default=LEAGUE_ID)
+    parser.add_argument("--username", default=USERNAME)
+    parser.add_argument("--week", type=int, default=None)
+    parser.add_argument("--port", type=int, default=8050)
+    args = parser.parse_args()
+    # threaded, so one slow tab (or the first poll) doesn't hold up everyone else's updates
+    create_app(args.league, args.username, args.week).run(port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+This houses the season backfill: it pulls the ESPN scoreboard and the Sleeper matchups for every week of a
+season in parallel and writes them out as Parquet, one partition per week, so season-level views load from
+local columnar files instead of the network.
+
+    python backfill.py <league_id> [--season 2025] [--out season_data] [--workers 6]
+
+Layout (each table is split into week=NN folders):
+    <out>/<season>/games/week=01/part-0.parquet     one row per NFL game (same fields as pull_games)
+    <out>/<season>/teams/week=01/part-0.parquet     one row per fantasy roster (same as LeagueWeek.teams)
+    <out>/<season>/players/week=01/part-0.parquet   one row per fantasy starter (same as LeagueWeek.players)
+    <out>/<season>/_final/week=01                   marker: the week was written after all its games were final
+
+Only weeks where every game is final get written, the rest are left for a later run. It's resumable: a week
+with a final marker is skipped, and partitions are written to a temp file and renamed (the marker going last),
+so an interrupted run never leaves a half-written week behind. load_table() only reads weeks with a marker.
+Needs pyarrow for Parquet (conda install pyarrow).
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import http_client
+from bet_grading import ats_record, season_ats_record
+from bet_ledger import get_ledger
+from espn_pull import pull_games
+from lineup_batch import LineupBatch, LineupViews
+from response_cache import current_season
+from scoreboard import all_final
+from sleeper_pull import build_league_week, get_league_context, get_player_metadata, pull_matchups
+
+WEEKS = range(1, 19)
+TABLES = ("games", "teams", "players")
+# how long a backfill request waits for its host's next token (the per-host budgets are in scheduler.py)
+MAX_WAIT = 60.0
+
+
+def partition_path(out_dir, season, table, week):
+    return os.path.join(out_dir, str(season), table, f"week={week:02d}", "part-0.parquet")
+
+
+def final_marker_path(out_dir, season, week):
+    return os.path.join(out_dir, str(season), "_final", f"week={week:02d}")
+
+
+def week_done(out_dir, season, week):
+    """
+    True if the week was written once all its games were final, so it can't change anymore.
+    """
+    return os.path.exists(final_marker_path(out_dir, season, week)) and \
+        all(os.path.exists(partition_path(out_dir, season, table, week)) for table in TABLES)
+
+
+def write_partition(df, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def backfill_week(league, players_data, week, season, out_dir):
+    """
+    Pulls one week from both sources and writes its three partitions and its final marker. Returns the week,
+    or None if some of its games aren't final yet (nothing is written then, a later run picks it up).
+    """
+    # the requests share the process's per-host budget with everything else, and queue for tokens here
+    # instead of falling back, however many workers there are
+    with http_client.waiting(MAX_WAIT):
+        records = pull_games(week, season)
+        if not all_final(records):
+            return None
+        matchup_data = pull_matchups(league.league_id, week, records)
+    games = pd.DataFrame(records)
+    league_week = build_league_week(league, matchup_data, players_data)
+
+    # the marker goes last, so a week only looks done once all three partitions are written
+    write_partition(league_week.teams, partition_path(out_dir, season, "teams", week))
+    write_partition(league_week.players, partition_path(out_dir, season, "players", week))
+    write_partition(games, partition_path(out_dir, season, "games", week))
+    marker = final_marker_path(out_dir, season, week)
+    os.makedirs(os.path.dirname(marker), exist_ok=True)
+    open(marker, "w").close()
+    return week
+
+
+def backfill(league_id, season=None, out_dir='season_data', workers=6, weeks=WEEKS):
+    """
+    Backfills every week in weeks that isn't already on disk and is over. Returns the list of weeks written.
+
+    Parameters:
+        - league_id (str): The Sleeper league (a league id is tied to one season).
+        - season (int): The NFL season the league is for, defaults to the current one.
+        - out_dir (str): Root folder for the Parquet files.
+        - workers (int): How many weeks are pulled at once.
+    """
+    season = season or current_season()
+    todo = [week for week in weeks if not week_done(out_dir, season, week)]
+    if not todo:
+        return []
+
+    # shared by every week: one league context and one metadata lookup
+    league = get_league_context(league_id)
+    players_data = get_player_metadata()
+
+    pulled = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(backfill_week, league, players_data, week, season, out_dir) for week in todo]
+        for future in futures:
+            try:
+                week = future.result()
+                if week is not None:
+                    pulled.append(week)
+            except Exception as e:
+                # leave it for the next run to pick up
+                print(f"Backfill failed for a week: {e}")
+    return sorted(pulled)
+
+
+def load_table(table, season=None, out_dir='season_data'):
+    """
+    Loads every finished week of one table into a single DataFrame with a week column. Partitions without a
+    final marker (e.g. written mid-week by an older version) are ignored.
+    """
+    season = season or current_season()
+    table_dir = os.path.join(out_dir, str(season), table)
+    frames = []
+    for name in sorted(os.listdir(table_dir)) if os.path.isdir(table_dir) else []:
+        path = os.path.join(table_dir, name, "part-0.parquet")
+        if not name.startswith("week="):
+            continue
+        week = int(name[len("week="):])
+        if os.path.exists(path) and os.path.exists(final_marker_path(out_dir, season, week)):
+            frames.append(pd.read_parquet(path).assign(week=week))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def season_lineups(season=None, out_dir='season_data', players_data=None):
+    """
+    Every backfilled lineup of the season as one LineupBatch (one lineup per week and roster, see
+    lineup_batch.py), wrapped in a LineupViews so single ones can be looked up as Lineups by (week, roster_id).
+    Season-wide totals and ordering go through .batch without making any Player objects. Player names come
+    from players_data if it's given. Empty until a week has been finalized (e.g. at the start of the season).
+    """
+    players = load_table("players", season, out_dir)
+    if players.empty:
+        return LineupViews(LineupBatch.from_lineups([]))
+    teams = load_table("teams", season, out_dir)
+    names = {(week, roster_id): (username, team_name) for week, roster_id, username, team_name
+             in teams[["week", "roster_id", "username", "team_name"]].itertuples(index=False)} if not teams.empty else {}
+    return LineupViews(LineupBatch.from_frame(players, players_data, by=("week", "roster_id"), names=names))
+
+
+def points_for_against(season=None, out_dir='season_data'):
+    """
+    Season standings from the backfilled teams table: points for/against, wins/losses/ties, and weekly
+    average, one row per roster, best record first.
+    """
+    teams = load_table("teams", season, out_dir)
+    if teams.empty:
+        return teams
+    teams = teams.assign(win=teams["margin"] > 0, loss=teams["margin"] < 0, tie=teams["margin"] == 0)
+    standings = teams.groupby(["roster_id", "team_name"], as_index=False).agg(
+        points_for=("points", "sum"), points_against=("opp_points", "sum"),
+        wins=("win", "sum"), losses=("loss", "sum"), ties=("tie", "sum"), avg_points=("points", "mean"))
+    return standings.sort_values(["wins", "points_for"], ascending=False, ignore_index=True)
+
+
+def bet_record(season=None, out_dir='season_data'):
+    """
+    Season ATS record ({"win", "loss", "push"}) from the bet ledger graded against the backfilled games.
+    """
+    games = load_table("games", season, out_dir)
+    if games.empty:
+        return ats_record(pd.DataFrame({"result": []}))
+    games_by_week = {week: df.to_dict("records") for week, df in games.groupby("week")}
+    return season_ats_record(get_ledger(), games_by_week)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill a season of scoreboards and matchups to Parquet.")
+    parser.add_argument("league_id")
+    parser.add_argument("--season", type=int, default=None)
+    parser.add_argument("--out", default='season_data')
+    parser.add_argument("--workers", type=int, default=6)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    pulled = backfill(args.league_id, args.season, args.out, args.workers)
+    print(f"Pulled weeks {pulled or 'none (all on disk or not over yet)'} in {time.perf_counter() - start:.1f}s")
+    print(points_for_against(args.season, args.out).to_string(index=False))
+    print("ATS record:", bet_record(args.season, args.out))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Load test for the Dash front end (app.py). It serves the app in-process through Flask's test client against
+replayed synthetic fixtures (see bench_pipeline.py). For 1 and then --viewers viewers, it runs --rounds poll
+rounds. In each round one starter's points change upstream and the poller polls once (what it does every
+FAST_INTERVAL during games). Then every viewer fires its dcc.Interval callback at the same time.
+Reports the first (full) payload, the per-update payload, the callback latency and the upstream requests
+per round, which shouldn't move with the number of viewers.
+
+Needs dash installed. Run from the repo root:
+    python -m benchmarks.bench_app [--viewers 50] [--rounds 10] [--latency 0.05]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import replay
+from benchmarks.bench_pipeline import make_synthetic_fixtures
+
+OUTPUTS = ("versions.data", "header.children", "my_lineup.children", "opp_lineup.children", "slate.children",
+           "bet-team.options")
+
+
+def tick_request(n_intervals, versions):
+    """
+    The body dash-renderer posts to /_dash-update-component for app.py's push_changes callback.
+    """
+    return {
+        "output": ".." + "...".join(OUTPUTS) + "..",
+        "outputs": [{"id": out.split(".")[0], "property": out.split(".")[1]} for out in OUTPUTS],
+        "inputs": [{"id": "tick", "property": "n_intervals", "value": n_intervals}],
+        "changedPropIds": ["tick.n_intervals"],
+        "state": [{"id": "versions", "property": "data", "value": versions}],
+    }
+
+
+class Viewer:
+    """
+    One browser tab: its own test client and the versions its dcc.Store holds.
+    """
+    def __init__(self, server):
+        self.client = server.test_client()
+        self.versions = {}
+        self.n_intervals = 0
+
+    def tick(self):
+        """
+        Fires the interval once. Returns (seconds, response bytes).
+        """
+        self.n_intervals += 1
+        start = time.perf_counter()
+        resp = self.client.post("/_dash-update-component", json=tick_request(self.n_intervals, self.versions))
+        elapsed = time.perf_counter() - start
+        if resp.status_code == 200:
+            self.versions = resp.get_json()["response"]["versions"]["data"]
+        elif resp.status_code != 204:   # 204 is PreventUpdate: nothing changed
+            raise RuntimeError(f"callback failed ({resp.status_code}): {resp.get_data(as_text=True)[:500]}")
+        return elapsed, len(resp.get_data())
+
+
+def bump_points(adapter, league_id, week, round_no):
+    """
+    Changes one starter's points in the recorded matchups, with a new ETag, like a real scoring play. It
+    alternates between the two rosters in the synthetic user's matchup, so every round changes the page.
+    """
+    url = f"https://api.sleeper.app/v1/league/{league_id}/matchups/{week}"
+    status, headers, body = adapter._load(url)
+    data = json.loads(body)
+    roster = data[round_no % 2]
+    pid = roster["starters"][round_no % len(roster["starters"])]
+    roster["players_points"][pid] = round(roster["players_points"][pid] + 6.0, 2)
+    adapter._fixtures[url] = (status, dict(headers, ETag=f'"bench-{round_no + 2}"'), json.dumps(data).encode())
+
+
+def run(n_viewers, rounds, adapter, league_id, username, week):
+    from app import create_app
+    from live_cache import get_poller
+
+    server = create_app(league_id, username, week).server
+    viewers = [Viewer(server) for _ in range(n_viewers)]
+    latencies, sizes, upstream = [], [], []
+    with ThreadPoolExecutor(max_workers=n_viewers) as pool:
+        first = list(pool.map(lambda v: v.tick(), viewers))
+        for round_no in range(rounds):
+            before = sum(adapter.requests.values())
+            bump_points(adapter, league_id, week, round_no)
+            get_poller(league_id, username, week).poll()
+            for elapsed, size in pool.map(lambda v: v.tick(), viewers):
+                latencies.append(elapsed * 1000)
+                sizes.append(size)
+            upstream.append(sum(adapter.requests.values()) - before)
+    latencies.sort()
+    return {
+        "first_kb": statistics.median(size for _, size in first) / 1024,
+        "update_bytes": statistics.median(sizes),
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "upstream": statistics.mean(upstream),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the Dash front end.")
+    parser.add_argument("--viewers", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every upstream request")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        fixture_dir = os.path.join(scratch, "fixtures")
+        league_id, username, week = make_synthetic_fixtures(fixture_dir)
+        os.chdir(scratch)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()), replay.replay(fixture_dir, args.latency) as adapter:
+                from response_cache import get_cache
+                get_cache().live_ttl = 0
+                for n in sorted({1, args.viewers}):
+                    results[n] = run(n, args.rounds, adapter, league_id, username, week)
+        finally:
+            os.chdir(cwd)
+
+    print(f"{args.rounds} rounds, one scoring change and one poll per round")
+    print(f"{'viewers':<9}{'first KB':>10}{'update B':>10}{'p50 ms':>10}{'p99 ms':>10}{'upstream/round':>16}")
+    for n, r in results.items():
+        print(f"{n:<9}{r['first_kb']:>10.1f}{r['update_bytes']:>10.0f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+              f"{r['upstream']:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Runs the shared HTTP client against a local stub server and compares it with bare requests.get calls.
+
+Run from the repo root:
+    python -m benchmarks.bench_http_client
+
+The stub serves a JSON body with an ETag (gzipped if asked), answers If-None-Match with a 304, and counts
+how many TCP connections it accepted and how many 304s it sent. A pull_lineup-ish burst is five GETs, so
+bare requests should show five connections per burst and the client one connection total.
+"""
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from http_client import HttpClient
+
+BODY = json.dumps([{"roster_id": i, "owner_id": str(i), "players": [str(p) for p in range(30)]}
+                   for i in range(12)]).encode()
+ETAG = '"v1"'
+BURSTS = 20
+CALLS_PER_BURST = 5
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.connections = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def reset(self):
+        with self.lock:
+            self.connections = self.requests = self.not_modified = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+        if self.headers.get("If-None-Match") == ETAG:
+            with self.server.lock:
+                self.server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = BODY
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", ETAG)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label, fetch, server):
+    server.reset()
+    start = time.perf_counter()
+    for burst in range(BURSTS):
+        for call in range(CALLS_PER_BURST):
+            fetch(f"{server.url}/v1/league/123/rosters?call={call}")
+    elapsed = time.perf_counter() - start
+    n = BURSTS * CALLS_PER_BURST
+    print(f"{label:<14}{n:>8}{server.connections:>13}{server.not_modified:>8}{1000 * elapsed / n:>12.2f}")
+
+
+def main():
+    server = StubServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"{'client':<14}{'requests':>8}{'connections':>13}{'304s':>8}{'ms/request':>12}")
+    run("requests.get", lambda url: requests.get(url).json(), server)
+    client = HttpClient(retries=0)
+    run("HttpClient", client.get_json, server)
+    print("\nper-endpoint stats:", json.dumps(client.stats(), indent=4))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
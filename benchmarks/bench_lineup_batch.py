@@ -0,0 +1,153 @@
+"""
+Benchmarks holding and crunching 10k and 100k player-week rows three ways: the old dict-backed Player/Lineup
+objects, the slotted Player/Lineup, and one LineupBatch (lineup_batch.py). Reports the memory each
+representation holds and the time for lineup totals, ordering every lineup and diffing against a previous poll.
+Also times looking up every lineup of a 12-team league as an ordered Lineup through LineupViews (the batch is
+ordered once for all of them, not once per lookup), checks those match order_players(), and checks the season
+view (backfill.season_lineups) over a season with nothing finalized yet.
+Exits 1 if a check didn't pass.
+
+Run from the repo root:
+    python -m benchmarks.bench_lineup_batch
+"""
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from lineup_batch import LineupBatch, LineupViews
+from lineup_order import order_players
+from sleeper_pull import Lineup, Player
+from snapshot_diff import diff_players
+
+POSITIONS = ["QB", "RB", "RB", "WR", "WR", "WR", "TE", "K", "DEF"]
+TEAMS = ["KC", "BUF", "DAL", "PHI", "SF", "SEA", "DET", "GB", "MIN", "CHI"]
+ROWS_PER_LINEUP = len(POSITIONS)
+failures = []
+
+
+def check(label, ok, detail=""):
+    print(f"{'ok  ' if ok else 'FAIL'} {label}{f' ({detail})' if detail else ''}")
+    if not ok:
+        failures.append(label)
+
+
+class DictPlayer:
+    # the old Player, before __slots__
+    def __init__(self, first_name, last_name, position, injury_status, player_points, team, number, player_id=None):
+        self.player_id = player_id
+        self.first_name = first_name
+        self.last_name = last_name
+        self.position = position
+        self.injury_status = injury_status
+        self.player_points = player_points
+        self.team = team
+        self.number = number
+
+
+class DictLineup:
+    # the old Lineup, before __slots__
+    def __init__(self, player_list, username, team_name):
+        self.player_list = player_list
+        self.username = username
+        self.team_name = team_name
+        self.total_points = self.calc_total_points()
+        self._ordered_key = None
+
+    def calc_total_points(self):
+        pts = 0.0
+        for player in self.player_list:
+            pts += player.player_points
+        return pts
+
+
+def make_lineups(n_rows, player_cls, lineup_cls, seed=0):
+    rng = random.Random(seed)
+    names = [f"Name{i}" for i in range(2000)]
+    lineups = []
+    for l in range(n_rows // ROWS_PER_LINEUP):
+        players = [player_cls(rng.choice(names), rng.choice(names), pos, None, round(rng.uniform(0, 30), 1),
+                              rng.choice(TEAMS), rng.randint(1, 99), f"{l}_{j}")
+                   for j, pos in enumerate(POSITIONS)]
+        lineups.append(lineup_cls(players, f"user{l}", f"team{l}"))
+    return lineups
+
+
+def held_bytes(build):
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    for n_rows in (10_000, 100_000):
+        print(f"--- {n_rows:,} rows ---")
+        dict_lineups, dict_bytes = held_bytes(lambda: make_lineups(n_rows, DictPlayer, DictLineup))
+        lineups, slot_bytes = held_bytes(lambda: make_lineups(n_rows, Player, Lineup))
+        batch = LineupBatch.from_lineups(lineups)
+        _, batch_bytes = held_bytes(lambda: LineupBatch.from_lineups(lineups))
+        print(f"{'memory held (MB)':<22}{'dict objects':>14}{'slotted':>14}{'LineupBatch':>14}")
+        print(f"{'':<22}{dict_bytes / 1e6:>14.1f}{slot_bytes / 1e6:>14.1f}{batch_bytes / 1e6:>14.1f}"
+              "  (batch shares the objects' strings)")
+
+        previous = [Lineup([Player(p.first_name, p.last_name, p.position, p.injury_status, p.player_points + (i % 7 == 0),
+                                   p.team, p.number, p.player_id) for i, p in enumerate(l.player_list)], l.username, l.team_name)
+                    for l in lineups]
+        previous_batch = LineupBatch.from_lineups(previous)
+
+        print(f"{'time (ms)':<22}{'objects':>14}{'LineupBatch':>14}")
+        for name, objects, batched in (
+                ("totals", lambda: [l.calc_total_points() for l in lineups], batch.totals),
+                ("order all lineups", lambda: [order_players(l.player_list) for l in lineups], batch.order),
+                ("diff vs last poll", lambda: [diff_players(p.player_list, l.player_list) for p, l in zip(previous, lineups)],
+                 lambda: batch.changed(previous_batch))):
+            print(f"{name:<22}{timed(objects) * 1e3:>14.1f}{timed(batched) * 1e3:>14.1f}")
+    check_league_views()
+    check_season_views()
+    if failures:
+        print(f"{len(failures)} check(s) failed")
+        sys.exit(1)
+
+
+def check_league_views():
+    league = make_lineups(12 * ROWS_PER_LINEUP, Player, Lineup, seed=1)
+    batch = LineupBatch.from_lineups(league)
+    views = LineupViews(batch, "standard")
+    elapsed = timed(lambda: [views[i] for i in views])
+    reorder_each = timed(lambda: [batch.order("standard") for _ in views])
+    print(f"{'12-team league views':<22}{'order per view':>14}{'LineupViews':>14}")
+    print(f"{'time (ms)':<22}{reorder_each * 1e3:>14.2f}{elapsed * 1e3:>14.2f}")
+    check("the batch is ordered once for all of a league's views", len(batch._orders) == 1)
+    check("ordered views match order_players()",
+          all([p.player_id for p in views[i].player_list] == [p.player_id for p in order_players(l.player_list)]
+              for i, l in enumerate(league)))
+    check("unordered views keep each lineup's rows",
+          all([p.player_id for p in batch.lineup_view(i).player_list] == [p.player_id for p in l.player_list]
+              for i, l in enumerate(league)))
+
+
+def check_season_views():
+    from backfill import season_lineups
+
+    # no week has a final marker yet, e.g. the start of the season
+    with tempfile.TemporaryDirectory() as out_dir:
+        try:
+            views = season_lineups(2025, out_dir)
+        except Exception as e:
+            check("season_lineups with nothing finalized is empty", False, repr(e))
+        else:
+            check("season_lineups with nothing finalized is empty",
+                  len(views) == 0 and len(views.batch.totals()) == 0, f"{len(views)} lineups")
+
+
+if __name__ == "__main__":
+    main()
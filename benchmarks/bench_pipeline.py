@@ -0,0 +1,250 @@
+"""
+Benchmarks the pull and render pipeline end to end, offline, against recorded fixtures (see replay.py):
+get_player_metadata (cold daily pull and warm), pull_lineup, pull_games, Lineup.order_list, and a headless
+render of the dashboard's lineup and slate rows (what show_lineup/show_games build, minus streamlit).
+For each it reports p50/p99 latency, upstream requests (and 304s) per call and peak traced memory, and compares
+them with the stored baseline (benchmarks/baseline.json).
+
+Without --fixtures it generates a synthetic league (12 teams, a full players file, a 16-game scoreboard) in
+the shape of the real responses, so it runs anywhere. To use real data record it first:
+    python replay.py record <league_id> <username> <week> --out fixtures
+
+Run from the repo root:
+    python -m benchmarks.bench_pipeline [--fixtures fixtures --league ... --username ... --week ...]
+                                        [--latency 0.05 --jitter 0.02] [--save-baseline] [--check]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import replay
+from benchmarks.bench_play_by_play import make_summary
+from benchmarks.bench_scoreboard import make_payload
+from play_by_play import SUMMARY_URL
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# how much slower/bigger than the baseline counts as a regression (plus a small absolute slack for tiny numbers)
+TOLERANCE = 1.25
+SLACK_MS = 0.05
+
+SYNTHETIC_LEAGUE = "1000000000000000001"
+SYNTHETIC_USER = "benchuser"
+SYNTHETIC_WEEK = 7
+# plays so far in each synthetic game's play-by-play
+SUMMARY_PLAYS = 60
+POSITIONS = ["QB", "RB", "RB", "WR", "WR", "TE", "WR", "K", "DEF"]
+
+
+def make_synthetic_fixtures(fixture_dir, league_id=SYNTHETIC_LEAGUE, username=SYNTHETIC_USER, week=SYNTHETIC_WEEK):
+    """
+    Writes a synthetic but realistically shaped set of fixtures for one league/user/week.
+    """
+    rng = random.Random(0)
+    games = make_payload()
+    teams = [t for e in games["events"] for t in (e["competitions"][0]["competitors"][0]["team"]["abbreviation"],
+                                                  e["competitions"][0]["competitors"][1]["team"]["abbreviation"])]
+
+    # ~11k players with the usual pile of fields, around the size of the real 5MB file
+    players = {}
+    for i in range(11000):
+        pid = str(1000 + i)
+        players[pid] = {
+            "player_id": pid, "first_name": f"First{i}", "last_name": f"Last{i}", "full_name": f"First{i} Last{i}",
+            "position": POSITIONS[i % len(POSITIONS)], "fantasy_positions": [POSITIONS[i % len(POSITIONS)]],
+            "team": rng.choice(teams), "number": i % 99, "injury_status": rng.choice([None, None, None, "Questionable"]),
+            "status": "Active", "sport": "nfl", "age": 20 + i % 15, "height": "73", "weight": "210",
+            "college": "State", "years_exp": i % 12, "depth_chart_order": 1, "depth_chart_position": "QB",
+            "search_rank": i, "search_full_name": f"first{i}last{i}", "hashtag": f"#first{i}last{i}-NFL",
+            "espn_id": 4000000 + i, "yahoo_id": 30000 + i, "sportradar_id": f"{i:08x}-0000-0000-0000-000000000000",
+            "rotowire_id": 10000 + i, "fantasy_data_id": 20000 + i, "birth_date": "1998-01-01",
+            "news_updated": 1700000000000 + i, "injury_body_part": None, "injury_notes": None,
+            "practice_participation": None, "metadata": {"channel_id": str(10 ** 17 + i)},
+        }
+    ids = list(players)
+
+    users = [{"user_id": str(u), "display_name": username if u == 1 else f"user{u}",
+              "metadata": {"team_name": f"Team {u}"}} for u in range(1, 13)]
+    rosters = []
+    matchups = []
+    for r in range(1, 13):
+        starters = [ids[(r * 9 + j) * 7 % len(ids)] for j in range(9)]
+        bench = [ids[(r * 9 + j) * 13 % len(ids)] for j in range(6)]
+        rosters.append({"roster_id": r, "owner_id": str(r), "starters": starters, "players": starters + bench})
+        matchups.append({"roster_id": r, "matchup_id": (r + 1) // 2, "starters": starters,
+                         "players": starters + bench, "points": 0.0,
+                         "players_points": {pid: round(rng.uniform(0, 25), 2) for pid in starters + bench}})
+
+    headers = {"Content-Type": "application/json", "ETag": '"bench-1"'}
+    sleeper = "https://api.sleeper.app/v1"
+    for url, body in ((f"{sleeper}/user/{username}", {"user_id": "1", "username": username}),
+                      (f"{sleeper}/league/{league_id}/users", users),
+                      (f"{sleeper}/league/{league_id}/rosters", rosters),
+                      (f"{sleeper}/league/{league_id}/matchups/{week}", matchups),
+                      (f"{sleeper}/players/nfl", players),
+                      (f"https://site.api.espn.com/apis/site/v2/sports/football/nfl/scoreboard?week={week}", games)):
+        replay.write_fixture(fixture_dir, url, 200, headers, json.dumps(body).encode())
+
+    # play-by-play for every game (they're all in progress), the plays credited to that game's starters
+    starters = {pid for m in matchups for pid in m["starters"]}
+    for event in games["events"]:
+        playing = {c["team"]["abbreviation"] for c in event["competitions"][0]["competitors"]}
+        names = [f"{players[pid]['first_name'][0]}.{players[pid]['last_name']}" for pid in sorted(starters)
+                 if players[pid]["team"] in playing] or ["X.Nobody"]
+        replay.write_fixture(fixture_dir, f"{SUMMARY_URL}?event={event['id']}", 200, headers,
+                             json.dumps(make_summary(SUMMARY_PLAYS, names)).encode())
+    return league_id, username, week
+
+
+def measure(fn, iterations, adapter, before=None):
+    """
+    Runs fn iterations times (calling before() untimed first, each time) and returns its stats.
+    """
+    requests_before = sum(adapter.requests.values())
+    not_modified_before = sum(adapter.not_modified.values())
+    times = []
+    for _ in range(iterations):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    requests = sum(adapter.requests.values()) - requests_before
+    not_modified = sum(adapter.not_modified.values()) - not_modified_before
+
+    # one more run under tracemalloc for the memory, kept out of the timings since tracing slows everything down
+    if before is not None:
+        before()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    times.sort()
+    return {
+        "p50_ms": round(statistics.median(times), 3),
+        "p99_ms": round(times[min(len(times) - 1, int(len(times) * 0.99))], 3),
+        "requests": round(requests / iterations, 2),
+        "not_modified": round(not_modified / iterations, 2),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run_suite(fixture_dir, league_id, username, week, latency, jitter):
+    # imported here so they load inside the scratch folder's fresh state
+    from bet_grading import BetGrader
+    from espn_pull import pull_games
+    from render_rows import LineupRows, SlateRows
+    from response_cache import get_cache
+    from sleeper_pull import get_player_metadata, pull_lineup
+
+    results = {}
+    with replay.replay(fixture_dir, latency, jitter, seed=0) as adapter:
+        def cold_metadata():
+            for path in ("players_data.db", "last_pull.txt"):
+                if os.path.exists(path):
+                    os.remove(path)
+        results["get_player_metadata (cold)"] = measure(get_player_metadata, 5, adapter, cold_metadata)
+        results["get_player_metadata (warm)"] = measure(get_player_metadata, 500, adapter)
+
+        # a live week: every call goes upstream (and gets a 304), like the poller does
+        get_cache().live_ttl = 0
+        pull_lineup(league_id, username, week)
+        results["pull_lineup"] = measure(lambda: pull_lineup(league_id, username, week), 100, adapter)
+        results["pull_games"] = measure(lambda: pull_games(week), 100, adapter)
+
+        my_lineup, opp_lineup = pull_lineup(league_id, username, week)
+        games = pull_games(week)
+
+    def unorder():
+        my_lineup._ordered_key = None
+        opp_lineup._ordered_key = None
+
+    def order_both():
+        my_lineup.order_list()
+        opp_lineup.order_list()
+    results["Lineup.order_list"] = measure(order_both, 2000, adapter, unorder)
+
+    def render():
+        # a new session's first draw: every row built from scratch
+        LineupRows().render(my_lineup, opp_lineup)
+        LineupRows().render(opp_lineup, my_lineup)
+        graded = BetGrader().update(games, {})
+        SlateRows().render(games, dict(zip(graded.index, graded["bet_string"])))
+    results["render (headless)"] = measure(render, 200, adapter)
+    return results
+
+
+def compare(results, baseline):
+    """
+    Prints results next to the baseline. Returns the names of scenarios that regressed.
+    """
+    regressions = []
+    print(f"{'scenario':<30}{'p50 ms':>10}{'p99 ms':>10}{'req/call':>10}{'304/call':>10}{'peak KB':>10}   vs baseline")
+    for name, r in results.items():
+        base = baseline.get(name)
+        note = "(no baseline)"
+        if base is not None:
+            # p99 is shown but not gated, a single GC pause moves it too much
+            worse = [metric for metric in ("p50_ms", "peak_kb")
+                     if r[metric] > base[metric] * TOLERANCE + (SLACK_MS if metric.endswith("_ms") else 0)]
+            if r["requests"] > base["requests"]:
+                worse.append("requests")
+            note = f"p50 {r['p50_ms'] / base['p50_ms']:.2f}x" if base["p50_ms"] else ""
+            if worse:
+                regressions.append(name)
+                note += f"  REGRESSED: {', '.join(worse)}"
+        print(f"{name:<30}{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['requests']:>10.2f}{r['not_modified']:>10.2f}"
+              f"{r['peak_kb']:>10.1f}   {note}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the pull and render pipeline.")
+    parser.add_argument("--fixtures", default=None, help="recorded fixture folder (default: synthetic league)")
+    parser.add_argument("--league", default=SYNTHETIC_LEAGUE)
+    parser.add_argument("--username", default=SYNTHETIC_USER)
+    parser.add_argument("--week", type=int, default=SYNTHETIC_WEEK)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many more seconds, random")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit 1 if anything regressed against the baseline")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        fixture_dir = os.path.abspath(args.fixtures) if args.fixtures else os.path.join(scratch, "fixtures")
+        league_id, username, week = args.league, args.username, args.week
+        if args.fixtures is None:
+            league_id, username, week = make_synthetic_fixtures(fixture_dir)
+        # the caches, ledger and player store all live in the working folder, start from an empty one
+        os.chdir(scratch)
+        try:
+            # the pulls print progress ("PULLING FROM SLEEPER"...), keep it out of the table
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = run_suite(fixture_dir, league_id, username, week, args.latency, args.jitter)
+        finally:
+            os.chdir(cwd)
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline)
+    if args.save_baseline:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {BASELINE_FILE}")
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmarks and checks the play-by-play ingestion (play_by_play.py):
+- processing 5 new plays takes about the same time whether the game is 20, 80 or 160 plays in, where
+reprocessing the whole game (what a cursor-less version would do every poll) grows with it
+- the stat lines built a few plays at a time match the ones from ingesting the whole game at once
+- a drive listed as both current and previous isn't counted twice
+- against replayed fixtures, only the games with my starters in them are fetched, and a poll after 5 more
+plays only processes those 5
+Prints what it saw and exits 1 if anything didn't behave.
+
+Run from the repo root:
+    python -m benchmarks.bench_play_by_play
+"""
+import contextlib
+import copy
+import io
+import json
+import os
+import sys
+import tempfile
+import timeit
+
+import http_client
+import replay
+from play_by_play import SUMMARY_URL, GameFeed, PlayByPlay
+
+GAME_LENGTHS = (20, 80, 160)
+NEW_PLAYS = 5
+PLAYS_PER_DRIVE = 8
+RUNS = 1000
+failures = []
+
+
+def check(label, ok, detail=""):
+    print(f"{'ok  ' if ok else 'FAIL'} {label}{f' ({detail})' if detail else ''}")
+    if not ok:
+        failures.append(label)
+
+
+def make_play(seq, names):
+    """
+    One ESPN-shaped play, cycling through completions, incompletions, runs, touchdowns and field goals.
+    names are players as the play text writes them ("F.Last"): the first throws, the last kicks, and the
+    catches and runs rotate through all of them.
+    """
+    qb, kicker = names[0], names[-1]
+    receiver, rusher = names[seq % len(names)], names[(seq + 1) % len(names)]
+    kind = seq % 6
+    if kind == 0:
+        text, type_text, yards = f"(Shotgun) {qb} pass short right to {receiver} to the 40 for 9 yards (X.Tackler).", "Pass Reception", 9
+    elif kind == 1:
+        text, type_text, yards = f"{rusher} up the middle to the 35 for 4 yards (X.Tackler).", "Rush", 4
+    elif kind == 2:
+        text, type_text, yards = f"(Shotgun) {qb} pass incomplete deep left to {receiver}.", "Pass Incompletion", 0
+    elif kind == 3:
+        text, type_text, yards = (f"{qb} pass short left to {receiver} for 12 yards, TOUCHDOWN. {kicker} extra point "
+                                  f"is GOOD, Center-X.Snapper.", "Passing Touchdown", 12)
+    elif kind == 4:
+        text, type_text, yards = f"{kicker} 41 yard field goal is GOOD, Center-X.Snapper.", "Field Goal Good", 0
+    else:
+        text, type_text, yards = f"{rusher} left end to the 20 for -2 yards (X.Tackler).", "Rush", -2
+    return {"id": str(40000000 + seq), "sequenceNumber": str(seq * 100), "type": {"text": type_text},
+            "text": text, "statYardage": yards, "period": {"number": 1 + seq // 40},
+            "clock": {"displayValue": f"{14 - seq % 15}:00"}, "scoringPlay": kind in (3, 4)}
+
+
+def make_summary(n_plays, names):
+    """
+    A summary response with n_plays plays, grouped into drives like ESPN's (finished drives in "previous",
+    the one being played in "current").
+    """
+    plays = [make_play(seq, names) for seq in range(1, n_plays + 1)]
+    drives = [{"id": str(i), "plays": plays[i:i + PLAYS_PER_DRIVE]} for i in range(0, len(plays), PLAYS_PER_DRIVE)]
+    return {"drives": {"previous": drives[:-1], "current": drives[-1] if drives else None},
+            "header": {"id": "401772500"}}
+
+
+def totals(feed):
+    return {key: {field: value for field, value in line.as_dict().items() if field != "recent"}
+            for key, line in feed.lines.items()}
+
+
+def bench_ingest():
+    names = ("P.Passer", "R.Catcher", "B.Runner", "T.End", "K.Kicker")
+    print(f"{'plays so far':<14}{'5 new (us)':>12}{'whole game (us)':>17}")
+    incremental = []
+    for length in GAME_LENGTHS:
+        before = make_summary(length, names)
+        after = make_summary(length + NEW_PLAYS, names)
+        warm = GameFeed("401772500")
+        warm.ingest(before)
+        cursor, saved = warm.cursor, totals(warm)
+
+        def new_only():
+            # a copy of the feed as of the last poll, then the 5 new plays
+            feed = GameFeed("401772500")
+            feed.cursor = cursor
+            feed.ingest(after)
+
+        def from_scratch():
+            GameFeed("401772500").ingest(after)
+
+        new_us = min(timeit.repeat(new_only, number=RUNS, repeat=3)) / RUNS * 1e6
+        full_us = min(timeit.repeat(from_scratch, number=RUNS, repeat=3)) / RUNS * 1e6
+        incremental.append(new_us)
+        print(f"{length:<14}{new_us:>12.1f}{full_us:>17.1f}")
+
+        warm.ingest(after)
+        whole = GameFeed("401772500")
+        whole.ingest(after)
+        check(f"{length} plays + {NEW_PLAYS}: incremental stat lines match the whole game's",
+              totals(warm) == totals(whole) and warm.plays_processed == length + NEW_PLAYS and saved != totals(warm))
+
+    # the drive in progress listed twice (as "current" and as the last of "previous") only counts once
+    doubled = make_summary(GAME_LENGTHS[0], names)
+    doubled["drives"]["previous"].append(doubled["drives"]["current"])
+    once, twice = GameFeed("401772500"), GameFeed("401772500")
+    once.ingest(make_summary(GAME_LENGTHS[0], names))
+    twice.ingest(doubled)
+    check("a drive that's both current and previous is only counted once",
+          totals(twice) == totals(once) and twice.plays_processed == GAME_LENGTHS[0], f"{twice.plays_processed} plays")
+
+    # flat: the longest game's 5 new plays shouldn't cost much more than the shortest's
+    check(f"time for {NEW_PLAYS} new plays doesn't grow with the game",
+          incremental[-1] < incremental[0] * 2, f"{incremental[0]:.1f} us at {GAME_LENGTHS[0]} plays, "
+                                                f"{incremental[-1]:.1f} us at {GAME_LENGTHS[-1]}")
+
+
+def check_replayed():
+    from benchmarks.bench_pipeline import make_synthetic_fixtures
+    from data_loader import load_render_data
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        fixture_dir = os.path.join(scratch, "fixtures")
+        league_id, username, week = make_synthetic_fixtures(fixture_dir)
+        os.chdir(scratch)
+        adapter = replay.ReplayAdapter(fixture_dir)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                http_client.configure(adapter=adapter, retries=0)
+                data = load_render_data(league_id, username, week)
+            games, my_lineup = data.games, data.my_lineup
+            pbp = PlayByPlay()
+            lines = pbp.update(games, my_lineup.player_list)
+            teams = {p.team for p in my_lineup.player_list}
+            expected = {g["event_id"] for g in games if g["home_team"] in teams or g["away_team"] in teams}
+            check("only the games with my starters are fetched", set(pbp.feeds) == expected,
+                  f"{len(pbp.feeds)} of {len(games)} games")
+            check("starters in those games get stat lines", bool(lines), f"{len(lines)} players")
+
+            # 5 more plays in one game, under a new ETag
+            event_id = sorted(expected)[0]
+            url = f"{SUMMARY_URL}?event={event_id}"
+            status, headers, body = adapter._load(url)
+            summary = json.loads(body)
+            current = summary["drives"]["current"]
+            plays = [play for drive in summary["drives"]["previous"] + [current] for play in drive["plays"]]
+            last = int(plays[-1]["sequenceNumber"])
+            for i, play in enumerate(copy.deepcopy(plays[-NEW_PLAYS:]), 1):
+                play["sequenceNumber"] = str(last + i)
+                current["plays"].append(play)
+            with adapter._lock:
+                adapter._fixtures[url] = (status, dict(headers, ETag='"bench-2"'), json.dumps(summary).encode())
+            processed = {e: feed.plays_processed for e, feed in pbp.feeds.items()}
+            pbp.update(games, my_lineup.player_list)
+            grew = {e: feed.plays_processed - processed[e] for e, feed in pbp.feeds.items()}
+            check(f"a poll after {NEW_PLAYS} new plays processes just those", grew[event_id] == NEW_PLAYS
+                  and not any(n for e, n in grew.items() if e != event_id), f"{grew[event_id]} processed")
+        finally:
+            http_client.configure()
+            os.chdir(cwd)
+
+
+def main():
+    bench_ingest()
+    check_replayed()
+    if failures:
+        print(f"{len(failures)} check(s) failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
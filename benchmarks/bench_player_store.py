@@ -0,0 +1,166 @@
+"""
+Benchmarks starter lookups against the old json.load path and the new player store, plus the cost of the
+daily ingest itself (old: load the whole response then json.dump it back out, new: stream it into the store).
+
+Run from the repo root:
+    python -m benchmarks.bench_player_store [players_data.json]
+
+If no players file is given (or it doesn't exist) a synthetic one about the size of Sleeper's dump is made.
+Each path is measured in a fresh subprocess so "cold" really is cold and the memory numbers don't bleed
+into each other.
+"""
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from player_store import PLAYER_FIELDS, build_player_store, open_player_store, stream_player_store
+
+N_STARTERS = 20
+WARM_RUNS = 200
+
+
+def make_synthetic_players(path, n_players=11000):
+    """
+    Writes a pretty-printed players file shaped like /players/nfl (lots of fields we don't use included).
+    """
+    rng = random.Random(0)
+    positions = ["QB", "RB", "WR", "TE", "K", "DEF", "DL", "LB", "DB"]
+    teams = ["NYG", "DAL", "PHI", "BUF", "KC", "SF", "DET", "GB", "BAL", "CIN", None]
+    players = {}
+    for i in range(n_players):
+        players[str(1000 + i)] = {
+            "player_id": str(1000 + i),
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "full_name": f"First{i} Last{i}",
+            "position": rng.choice(positions),
+            "fantasy_positions": [rng.choice(positions)],
+            "injury_status": rng.choice([None, "Questionable", "Out"]),
+            "injury_body_part": None,
+            "team": rng.choice(teams),
+            "number": rng.randint(1, 99),
+            "age": rng.randint(21, 38),
+            "height": "6'1\"",
+            "weight": str(rng.randint(170, 330)),
+            "college": "Somewhere State",
+            "years_exp": rng.randint(0, 15),
+            "depth_chart_order": rng.randint(1, 4),
+            "search_rank": rng.randint(1, 9999999),
+            "espn_id": rng.randint(1, 5000000),
+            "yahoo_id": rng.randint(1, 50000),
+            "sportradar_id": f"{rng.getrandbits(128):032x}",
+            "stats_id": rng.randint(1, 1000000),
+            "metadata": {"channel_id": str(rng.getrandbits(60)), "rookie_year": "2020"},
+            "status": "Active",
+            "active": True,
+        }
+    with open(path, "w") as f:
+        json.dump(players, f, indent=4)
+    return list(players)
+
+
+def _peak_rss_mb():
+    # ru_maxrss survives exec on linux (so the child would inherit the parent's peak), VmHWM doesn't
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _ingest_child(mode, path):
+    """
+    Runs inside the subprocess: ingests the raw players file the old way or the streaming way. The file
+    stands in for the HTTP response body.
+    """
+    out_dir = tempfile.mkdtemp()
+    start = time.perf_counter()
+    if mode == "json":
+        with open(path, "rb") as f:
+            players_data = json.loads(f.read())
+        with open(os.path.join(out_dir, "players_data.json"), "w") as f:
+            json.dump(players_data, f, indent=4)
+    else:
+        with open(path, "rb") as f:
+            stream_player_store(iter(lambda: f.read(64 * 1024), b""), os.path.join(out_dir, "players_data.db"))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"ingest_ms": elapsed * 1000, "peak_rss_mb": _peak_rss_mb()}))
+
+
+def _run_child(mode, path, ids):
+    """
+    Runs inside the subprocess: one cold lookup, then WARM_RUNS warm ones. For the json path "warm" means
+    the dict is already loaded (the best the old code could do if it cached); the real old code pays the
+    cold cost every rerun.
+    """
+    start = time.perf_counter()
+    if mode == "json":
+        with open(path, "r") as f:
+            data = json.load(f)
+        lookup = lambda: [{field: data[pid][field] for field in PLAYER_FIELDS} for pid in ids]
+    else:
+        store = open_player_store(path)
+        lookup = lambda: store.get_many(ids)
+    lookup()
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(WARM_RUNS):
+        lookup()
+    warm = (time.perf_counter() - start) / WARM_RUNS
+    print(json.dumps({"cold_ms": cold * 1000, "warm_us": warm * 1e6, "peak_rss_mb": _peak_rss_mb()}))
+
+
+def _measure(mode, path, ids=()):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_player_store", "--child", mode, path, ",".join(ids)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        if sys.argv[2].startswith("ingest_"):
+            _ingest_child(sys.argv[2][len("ingest_"):], sys.argv[3])
+        else:
+            _run_child(sys.argv[2], sys.argv[3], sys.argv[4].split(","))
+        return
+
+    tmp_dir = tempfile.mkdtemp()
+    json_file = sys.argv[1] if len(sys.argv) > 1 else ""
+    if os.path.exists(json_file):
+        with open(json_file, "r") as f:
+            all_ids = list(json.load(f))
+    else:
+        json_file = os.path.join(tmp_dir, "players_data.json")
+        all_ids = make_synthetic_players(json_file)
+
+    db_file = os.path.join(tmp_dir, "players_data.db")
+    with open(json_file, "r") as f:
+        build_player_store(json.load(f), db_file)
+
+    ids = random.Random(1).sample(all_ids, N_STARTERS)
+    print(f"json file: {os.path.getsize(json_file) / 1e6:.1f} MB, store: {os.path.getsize(db_file) / 1e6:.1f} MB, "
+          f"{len(all_ids)} players, {N_STARTERS} starters per lookup")
+    print(f"{'path':<8}{'cold (ms)':>12}{'warm (us)':>12}{'peak RSS (MB)':>16}")
+    for mode, path in (("json", json_file), ("store", db_file)):
+        r = _measure(mode, path, ids)
+        print(f"{mode:<8}{r['cold_ms']:>12.1f}{r['warm_us']:>12.1f}{r['peak_rss_mb']:>16.1f}")
+
+    print(f"\n{'ingest':<8}{'time (ms)':>12}{'peak RSS (MB)':>16}")
+    for mode in ("json", "stream"):
+        r = _measure(f"ingest_{mode}", json_file)
+        print(f"{mode:<8}{r['ingest_ms']:>12.1f}{r['peak_rss_mb']:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
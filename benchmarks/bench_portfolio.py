@@ -0,0 +1,100 @@
+"""
+Benchmarks a portfolio refresh (portfolio.load_portfolio) against running the single-league load
+(data_loader.load_render_data) once per league, for 1 and 10 leagues. It replays synthetic fixtures (see
+bench_pipeline.py) with a simulated network latency, and reports the wall time and the upstream requests per
+refresh, both cold (league contexts not loaded yet) and warm (the usual poll).
+
+Run from the repo root:
+    python -m benchmarks.bench_portfolio [--leagues 10] [--latency 0.05] [--jitter 0.02]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+import replay
+from benchmarks.bench_pipeline import SYNTHETIC_USER, SYNTHETIC_WEEK, make_synthetic_fixtures
+
+RUNS = 10
+
+
+def league_ids(n):
+    return [str(1000000000000000001 + i) for i in range(n)]
+
+
+def measure(fn, adapter, runs=RUNS):
+    requests_before = sum(adapter.requests.values())
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), (sum(adapter.requests.values()) - requests_before) / runs
+
+
+def run(n_leagues, latency, jitter, fixture_dir):
+    # imported here so the caches they open land in the scratch folder
+    import sleeper_pull
+    from data_loader import load_render_data
+    from portfolio import load_portfolio
+    from response_cache import get_cache
+
+    ids = league_ids(n_leagues)
+
+    def per_league():
+        for league_id in ids:
+            load_render_data(league_id, SYNTHETIC_USER, SYNTHETIC_WEEK)
+
+    def portfolio():
+        load_portfolio(ids, SYNTHETIC_USER, SYNTHETIC_WEEK)
+
+    def forget():
+        # drop every league context and the user lookup, like a fresh process
+        sleeper_pull._league_contexts.clear()
+        sleeper_pull._user_ids.clear()
+
+    rows = []
+    with replay.replay(fixture_dir, latency, jitter, seed=0) as adapter:
+        get_cache().live_ttl = 0
+        sleeper_pull.get_player_metadata()
+        for name, fn in (("per league", per_league), ("portfolio", portfolio)):
+            forget()
+            cold = measure(fn, adapter, runs=1)
+            warm = measure(fn, adapter)
+            rows.append((name, cold, warm))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Portfolio refresh vs one load per league.")
+    parser.add_argument("--leagues", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        fixture_dir = os.path.join(scratch, "fixtures")
+        for league_id in league_ids(args.leagues):
+            make_synthetic_fixtures(fixture_dir, league_id=league_id)
+        os.chdir(scratch)
+        try:
+            results = {}
+            for n in sorted({1, args.leagues}):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[n] = run(n, args.latency, args.jitter, fixture_dir)
+        finally:
+            os.chdir(cwd)
+
+    print(f"latency {1000 * args.latency:.0f} ms + up to {1000 * args.jitter:.0f} ms jitter per request")
+    print(f"{'leagues':<9}{'mode':<12}{'cold ms':>10}{'cold req':>10}{'warm ms':>10}{'warm req':>10}")
+    for n, rows in results.items():
+        for name, (cold_ms, cold_req), (warm_ms, warm_req) in rows:
+            print(f"{n:<9}{name:<12}{cold_ms:>10.1f}{cold_req:>10.1f}{warm_ms:>10.1f}{warm_req:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Checks the request scheduling (scheduler.py, http_client.py) against a local stub server, with a FakeClock for
+the token buckets so nothing actually waits on the rate limits:
+- identical concurrent requests share one upstream fetch (single-flight)
+- a host's burst is enforced, requests past it get the last response (or RateBudgetExhausted without one),
+and the bucket refills with (fake) time
+- a request allowed to wait for a token waits exactly as long as the refill takes
+- a 429 empties the bucket, isn't retried behind the bucket's back, and gets the last response if there is one
+- waiting() lets a batch job queue for tokens instead of falling back
+- a burst of 1000 calls in one second against Sleeper's budget only lets the burst through
+- poll_interval() for live (going by ESPN's state, so between quarters too), idle and final slates, failures and a
+low budget, and a snapshot between quarters counting as in progress
+- a poller that runs out of budget mid-game keeps publishing from the last responses
+Prints what it saw and exits 1 if anything didn't behave.
+
+Run from the repo root:
+    python -m benchmarks.bench_scheduler
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import http_client
+import replay
+from benchmarks.bench_pipeline import make_synthetic_fixtures
+from scheduler import (FINAL_INTERVAL, IDLE_INTERVAL, LIVE_INTERVAL, FakeClock, RateBudget, RateBudgetExhausted,
+                       poll_interval)
+
+STUB_DELAY = 0.2
+failures = []
+
+
+def check(label, ok, detail=""):
+    print(f"{'ok  ' if ok else 'FAIL'} {label}{f' ({detail})' if detail else ''}")
+    if not ok:
+        failures.append(label)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Answers every GET with a small JSON body after STUB_DELAY (so concurrent calls overlap), /throttle with a 429,
+    /then-429 with a body the first time and 429s after that.
+    """
+    hits = {}
+    hits_lock = threading.Lock()
+
+    def do_GET(self):
+        with self.hits_lock:
+            self.hits[self.path] = self.hits.get(self.path, 0) + 1
+            n = self.hits[self.path]
+        if self.path == "/throttle" or (self.path == "/then-429" and n > 1):
+            self.send_response(429)
+            self.send_header("Retry-After", "60")
+            self.end_headers()
+            return
+        time.sleep(STUB_DELAY)
+        body = json.dumps({"path": self.path, "n": n}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def check_single_flight(base, host):
+    client = http_client.HttpClient(retries=0, budget=RateBudget({}))
+    barrier = threading.Barrier(20)
+    results = []
+
+    def fetch():
+        barrier.wait()
+        results.append(client.get_json(f"{base}/same"))
+    threads = [threading.Thread(target=fetch) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    merged = client.stats()[f"{host}/same"]["merged"]
+    check("single-flight: 20 concurrent identical requests, 1 upstream fetch",
+          StubHandler.hits["/same"] == 1 and len(results) == 20 and all(r is results[0] for r in results),
+          f"upstream {StubHandler.hits['/same']}, merged {merged}")
+
+
+def check_bucket(base, host):
+    clock = FakeClock()
+    client = http_client.HttpClient(retries=0, budget=RateBudget({host: (60, 5)}, clock), max_wait=0)
+    served, refused = 0, 0
+    for i in range(20):
+        try:
+            client.get_json(f"{base}/item/{i}")
+            served += 1
+        except RateBudgetExhausted:
+            refused += 1
+    check("burst of 5: 20 distinct urls, 5 go upstream, 15 refused", served == 5 and refused == 15,
+          f"{served} served, {refused} refused")
+
+    before = StubHandler.hits["/item/0"]
+    body = client.get_json(f"{base}/item/0")
+    check("out of budget, a url we've seen gets its last response",
+          body["path"] == "/item/0" and StubHandler.hits["/item/0"] == before,
+          f"throttled {client.stats()[host + '/item/{id}']['throttled']}")
+
+    clock.advance(3)
+    served = 0
+    for i in range(5, 10):
+        try:
+            client.get_json(f"{base}/item/{i}")
+            served += 1
+        except RateBudgetExhausted:
+            pass
+    check("3 fake seconds at 1/s refill 3 tokens", served == 3, f"{served} served")
+
+    waiting = http_client.HttpClient(retries=0, budget=RateBudget({host: (60, 1)}, clock), max_wait=2)
+    start = clock.time()
+    for i in range(3):
+        waiting.get_json(f"{base}/wait/{i}")
+    check("allowed to wait: 3 calls at 1/s with a burst of 1 take 2 fake seconds",
+          abs(clock.time() - start - 2.0) < 1e-6, f"{clock.time() - start:.2f} s")
+
+    drained = http_client.HttpClient(retries=0, budget=RateBudget({host: (60, 5)}, clock), max_wait=0)
+    try:
+        drained.get_json(f"{base}/throttle")
+    except Exception:
+        pass
+    try:
+        drained.get_json(f"{base}/after-429")
+        after = "went upstream"
+    except RateBudgetExhausted:
+        after = "refused"
+    check("a 429 empties the bucket", after == "refused", after)
+
+    # a client that does retry 5xxs: a 429 still goes upstream exactly once
+    retrying = http_client.HttpClient(retries=3, backoff=0, budget=RateBudget({host: (60, 5)}, clock), max_wait=0)
+    first = retrying.get_json(f"{base}/then-429")
+    again = retrying.get_json(f"{base}/then-429")
+    check("a 429 isn't retried, and the last response is served instead",
+          StubHandler.hits["/then-429"] == 2 and again is first,
+          f"{StubHandler.hits['/then-429']} upstream hits, throttled {retrying.stats()[host + '/then-429']['throttled']}")
+
+    patient = http_client.HttpClient(retries=0, budget=RateBudget({host: (60, 1)}, clock), max_wait=0)
+    start = clock.time()
+    with http_client.waiting(5):
+        for i in range(3):
+            patient.get_json(f"{base}/patient/{i}")
+    check("waiting(): with max_wait=0, 3 calls at 1/s and a burst of 1 queue for 2 fake seconds",
+          abs(clock.time() - start - 2.0) < 1e-6, f"{clock.time() - start:.2f} s")
+
+
+def check_sleeper_burst():
+    clock = FakeClock()
+    budget = RateBudget(clock=clock)
+    allowed = 0
+    for i in range(1000):
+        clock.advance(0.001)
+        allowed += budget.acquire("api.sleeper.app", timeout=0)
+    per_minute, burst = 800, 100
+    check("1000 Sleeper calls in 1 s: only the burst (plus 1 s of refill) is allowed",
+          allowed <= burst + per_minute / 60 + 1, f"{allowed} allowed")
+
+
+def check_intervals():
+    live = [{"status": "In Progress", "state": "in"}, {"status": "Final", "state": "post"}]
+    between_quarters = [{"status": "End of Period", "state": "in"}, {"status": "Final", "state": "post"}]
+    final = [{"status": "Final", "state": "post"}, {"status": "Final/OT", "state": "post"}]
+    scheduled = [{"status": "Scheduled", "state": "pre"}, {"status": "Final", "state": "post"}]
+    cases = [
+        ("live", poll_interval(live), LIVE_INTERVAL),
+        ("live, between quarters", poll_interval(between_quarters), LIVE_INTERVAL),
+        ("all final", poll_interval(final), FINAL_INTERVAL),
+        ("not started", poll_interval(scheduled), IDLE_INTERVAL),
+        ("live, 2 failures", poll_interval(live, failures=2), LIVE_INTERVAL * 4),
+        ("live, 10 failures (capped)", poll_interval(live, failures=10), IDLE_INTERVAL),
+        ("live, budget empty", poll_interval(live, budget_level=0.0), LIVE_INTERVAL * 4),
+        ("never polled, 1 failure", poll_interval(None, failures=1), LIVE_INTERVAL * 2),
+    ]
+    for label, got, expected in cases:
+        check(f"poll interval {label}: {expected:g} s", abs(got - expected) < 1e-6, f"{got:g} s")
+    from live_cache import Snapshot
+    snapshot = Snapshot(tuple(between_quarters), None, None, 0.0, 1, "")
+    check("a snapshot between quarters counts as in progress", snapshot.any_in_progress())
+
+
+def check_poller_degrades():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        fixture_dir = os.path.join(scratch, "fixtures")
+        league_id, username, week = make_synthetic_fixtures(fixture_dir)
+        os.chdir(scratch)
+        clock = FakeClock()
+        budget = RateBudget({"api.sleeper.app": (60, 8), "site.api.espn.com": (60, 8)}, clock)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                http_client.configure(adapter=replay.ReplayAdapter(fixture_dir), retries=0, budget=budget,
+                                      max_wait=0)
+                from live_cache import Poller
+                from response_cache import get_cache
+                get_cache().live_ttl = 0
+                poller = Poller(league_id, username, week)
+                polls = 0
+                while budget.level() > 0:
+                    poller.poll()
+                    polls += 1
+                before = poller.latest().version
+                poller.poll()
+                after = poller.latest()
+            throttled = sum(s["throttled"] for s in http_client.stats().values())
+            check("a poller out of budget keeps publishing from the last responses",
+                  after.version == before + 1 and poller._failures == 0 and throttled > 0,
+                  f"budget gone after {polls} polls, {throttled} requests answered from the last response")
+        finally:
+            http_client.configure()
+            os.chdir(cwd)
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = f"127.0.0.1:{server.server_address[1]}"
+    base = f"http://{host}"
+    try:
+        check_single_flight(base, host)
+        check_bucket(base, host)
+    finally:
+        server.shutdown()
+    check_sleeper_burst()
+    check_intervals()
+    check_poller_degrades()
+    if failures:
+        print(f"{len(failures)} check(s) failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
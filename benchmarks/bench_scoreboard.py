@@ -0,0 +1,154 @@
+"""
+Benchmarks decoding a 16-game ESPN scoreboard into GameRecords (scoreboard.py) against the old way: one walk
+building a dict per game for pull_games, one to check whether every game is final (for the response cache)
+and another walk of the same response for the odds in pull_lines.
+Reports parse time, peak memory allocated while parsing, and the memory the result holds on to.
+The payload has the shape (and roughly the size) of a real Sunday scoreboard response, with the usual
+venue/broadcast/leader/link clutter around the fields we actually read.
+
+Run from the repo root:
+    python -m benchmarks.bench_scoreboard
+"""
+import json
+import time
+import tracemalloc
+
+from render_rows import TEAM_COLORS
+from scoreboard import decode_scoreboard, parse_spread
+
+RUNS = 5000
+
+
+def make_payload():
+    teams = list(TEAM_COLORS)
+    events = []
+    for i in range(16):
+        home, away = teams[2 * i], teams[2 * i + 1]
+
+        def competitor(abbr, side, score, team_id):
+            return {
+                "id": team_id, "uid": f"s:20~l:28~t:{team_id}", "type": "team", "order": 0 if side == "home" else 1,
+                "homeAway": side, "winner": False, "score": str(score),
+                "team": {"id": team_id, "uid": f"s:20~l:28~t:{team_id}", "location": abbr, "name": abbr,
+                         "abbreviation": abbr, "displayName": abbr, "shortDisplayName": abbr,
+                         "color": "000000", "alternateColor": "ffffff", "isActive": True,
+                         "venue": {"id": str(3000 + i)},
+                         "links": [{"rel": ["clubhouse", "desktop", "team"], "href": f"https://www.espn.com/nfl/team/_/name/{abbr}",
+                                    "text": "Clubhouse", "isExternal": False, "isPremium": False}] * 5,
+                         "logo": f"https://a.espncdn.com/i/teamlogos/nfl/500/scoreboard/{abbr}.png"},
+                "linescores": [{"value": float(q)} for q in range(4)],
+                "statistics": [],
+                "records": [{"name": "overall", "abbreviation": "Any", "type": "total", "summary": "5-3"},
+                            {"name": "Home", "type": "home", "summary": "3-1"},
+                            {"name": "Road", "type": "road", "summary": "2-2"}],
+                "leaders": [{"name": stat, "displayName": stat, "shortDisplayName": stat, "abbreviation": stat[:4],
+                             "leaders": [{"displayValue": "18/27, 231 YDS, 2 TD", "value": 231.0,
+                                          "athlete": {"id": "3139477", "fullName": "Some Player",
+                                                      "displayName": "Some Player", "shortName": "S. Player",
+                                                      "headshot": "https://a.espncdn.com/i/headshots/nfl/players/full/3139477.png",
+                                                      "jersey": "15", "position": {"abbreviation": "QB"},
+                                                      "team": {"id": team_id}, "active": True}}]}
+                            for stat in ("passingYards", "rushingYards", "receivingYards")],
+            }
+
+        comp = {
+            "id": str(401772500 + i), "uid": f"s:20~l:28~e:{401772500 + i}", "date": "2025-10-19T17:00Z",
+            "attendance": 70000, "type": {"id": "1", "abbreviation": "STD"}, "timeValid": True, "neutralSite": False,
+            "conferenceCompetition": False, "playByPlayAvailable": True, "recent": False,
+            "venue": {"id": str(3000 + i), "fullName": f"{home} Stadium", "address": {"city": "City", "state": "ST", "country": "USA"},
+                      "indoor": False},
+            "competitors": [competitor(home, "home", 7 * i % 31, str(i + 1)), competitor(away, "away", 3 * i % 28, str(i + 40))],
+            "notes": [],
+            "status": {"clock": 452.0, "displayClock": "7:32", "period": 1 + i % 4,
+                       "type": {"id": "2", "name": "STATUS_IN_PROGRESS", "state": "in", "completed": False,
+                                "description": "In Progress", "detail": "7:32 - 2nd Quarter", "shortDetail": "7:32 - 2nd"}},
+            "broadcasts": [{"market": "national", "names": ["FOX"]}],
+            "format": {"regulation": {"periods": 4}},
+            "startDate": "2025-10-19T17:00Z",
+            "broadcast": "FOX",
+            "geoBroadcasts": [{"type": {"id": "1", "shortName": "TV"}, "market": {"id": "1", "type": "National"},
+                               "media": {"shortName": "FOX"}, "lang": "en", "region": "us"}],
+            "odds": [{"provider": {"id": "58", "name": "ESPN BET", "priority": 1},
+                      "details": f"{home} -{1.5 + i % 7}", "overUnder": 41.5 + i, "spread": -(1.5 + i % 7),
+                      "awayTeamOdds": {"favorite": False, "underdog": True, "moneyLine": 120 + 10 * i,
+                                       "team": {"id": str(i + 40), "abbreviation": away}},
+                      "homeTeamOdds": {"favorite": True, "underdog": False, "moneyLine": -140 - 10 * i,
+                                       "team": {"id": str(i + 1), "abbreviation": home}},
+                      "moneyline": {"displayName": "Moneyline", "shortDisplayName": "ML"},
+                      "pointSpread": {"displayName": "Spread", "shortDisplayName": "Spread"},
+                      "total": {"displayName": "Total", "shortDisplayName": "Total"},
+                      "link": {"href": "https://espnbet.com/", "text": "Game"}}],
+            "situation": {"downDistanceText": "2nd & 7 at KC 35", "possession": str(i + 1), "isRedZone": False},
+        }
+        events.append({
+            "id": str(401772500 + i), "uid": f"s:20~l:28~e:{401772500 + i}", "date": "2025-10-19T17:00Z",
+            "name": f"{away} at {home}", "shortName": f"{away} @ {home}",
+            "season": {"year": 2025, "type": 2, "slug": "regular-season"}, "week": {"number": 7},
+            "competitions": [comp],
+            "links": [{"language": "en-US", "rel": ["summary", "desktop", "event"],
+                       "href": f"https://www.espn.com/nfl/game/_/gameId/{401772500 + i}", "text": "Gamecast"}] * 6,
+            "status": comp["status"],
+        })
+    return {"leagues": [{"id": "28", "name": "National Football League", "abbreviation": "NFL"}],
+            "season": {"type": 2, "year": 2025}, "week": {"number": 7}, "events": events}
+
+
+def legacy_parse(data):
+    # the old pull_games walk...
+    games = []
+    for e in data["events"]:
+        comp = e["competitions"][0]
+        home = comp["competitors"][0]
+        away = comp["competitors"][1]
+        games.append({
+            "home_team": home["team"]["abbreviation"],
+            "away_team": away["team"]["abbreviation"],
+            "home_score": int(home["score"]),
+            "away_score": int(away["score"]),
+            "status": comp["status"]["type"]["description"],
+            "quarter": comp["status"]["period"],
+            "clock": comp["status"].get("displayClock", "")
+        })
+    # ...the finality check on the raw response...
+    events = data.get("events", [])
+    len(events) > 0 and all(e["competitions"][0]["status"]["type"].get("completed", False) for e in events)
+    # ...and another walk over the same response for the lines
+    lines = []
+    for e in data["events"]:
+        comp = e["competitions"][0]
+        if "odds" in comp:
+            odds = comp["odds"][0]
+            home = comp["competitors"][0]["team"]["abbreviation"]
+            lines.append({"home_team": home, "away_team": comp["competitors"][1]["team"]["abbreviation"],
+                          "home_spread": parse_spread(odds.get("details"), home, odds.get("spread")),
+                          "total": odds.get("overUnder"),
+                          "home_ml": odds.get("homeTeamOdds", {}).get("moneyLine"),
+                          "away_ml": odds.get("awayTeamOdds", {}).get("moneyLine")})
+    return games, lines
+
+
+def measure(parse, data):
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        parse(data)
+    elapsed = (time.perf_counter() - start) / RUNS
+
+    tracemalloc.start()
+    result = parse(data)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak, retained
+
+
+def main():
+    data = make_payload()
+    print(f"payload: {len(data['events'])} games, {len(json.dumps(data)) / 1024:.0f} KB of JSON")
+    print(f"{'':<22}{'parse (us)':>12}{'peak (KB)':>12}{'kept (KB)':>12}")
+    for name, parse in (("dicts, three walks", legacy_parse), ("GameRecords", decode_scoreboard)):
+        elapsed, peak, retained = measure(parse, data)
+        print(f"{name:<22}{elapsed * 1e6:>12.1f}{peak / 1024:>12.1f}{retained / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
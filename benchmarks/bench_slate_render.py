@@ -0,0 +1,105 @@
+"""
+Benchmarks building the slate's html for a full 16-game week when 1 game changed vs all 16 changed, against
+rebuilding every row from scratch like show_games used to. Also checks that the rows match a from-scratch
+build, that render() reports just the games it rebuilt, and that with every game changed it costs about what
+a from-scratch build does (past render_rows.FULL_RENDER_SHARE it stops comparing rows), and that a game without
+a bet still shows its line when another game in the slate has one.
+
+Run from the repo root:
+    python -m benchmarks.bench_slate_render
+"""
+import sys
+import time
+
+from render_rows import SlateRows, TEAM_COLORS, game_row_html
+from snapshot_diff import game_key
+
+RUNS = 2000
+failures = []
+
+
+def check(label, ok, detail=""):
+    print(f"{'ok  ' if ok else 'FAIL'} {label}{f' ({detail})' if detail else ''}")
+    if not ok:
+        failures.append(label)
+
+
+def make_slate():
+    teams = list(TEAM_COLORS)
+    return [{"home_team": teams[2 * i], "away_team": teams[2 * i + 1], "home_score": 7 * i % 31,
+             "away_score": 3 * i % 28, "status": "In Progress", "quarter": 1 + i % 4, "clock": "7:32"}
+            for i in range(16)]
+
+
+def bump(games, n_changed):
+    # a new poll where the first n_changed games scored
+    return [dict(g, home_score=g["home_score"] + 3) if i < n_changed else g for i, g in enumerate(games)]
+
+
+def time_full_rebuild(polls, bet_strings):
+    start = time.perf_counter()
+    for games in polls:
+        [game_row_html(game, bet_strings[game_key(game)]) for game in games]
+    return (time.perf_counter() - start) / len(polls)
+
+
+def time_incremental(polls, bet_strings):
+    rows = SlateRows()
+    rows.render(polls[0], bet_strings)
+    start = time.perf_counter()
+    for games in polls[1:]:
+        rows.render(games, bet_strings)
+    return (time.perf_counter() - start) / (len(polls) - 1)
+
+
+def check_bet_strings(base):
+    # imported here, bet_grading needs pandas
+    from bet_grading import BetGrader, describe_bets
+
+    games = [dict(g, home_spread=-3.5) for g in base[:2]]
+    bet_team, other = games[0]["away_team"], games[1]
+    bets = {bet_team: (3.5, 1.0)}
+    graded = BetGrader().update(games, bets)
+    bet_strings = describe_bets(1, games, bets, graded, lines=None)
+    expected = f"--- | {other['home_team']} -3.5"
+    check("a game without a bet shows its line next to one with a bet",
+          bet_strings[game_key(other)] == expected and bet_strings[game_key(games[0])].startswith(f"{bet_team}: +3.5"),
+          repr(bet_strings[game_key(other)]))
+
+
+def main():
+    base = make_slate()
+    bet_strings = {game_key(g): "---" for g in base}
+    print(f"{'changed':<10}{'full rebuild (us)':>20}{'incremental (us)':>20}")
+    times = {}
+    for n_changed in (0, 1, 16):
+        polls = [base]
+        for _ in range(RUNS):
+            polls.append(bump(polls[-1], n_changed))
+        full = time_full_rebuild(polls, bet_strings)
+        incremental = time_incremental(polls, bet_strings)
+        times[n_changed] = (full, incremental)
+        print(f"{n_changed:<10}{full * 1e6:>20.1f}{incremental * 1e6:>20.1f}")
+
+    rows = SlateRows()
+    rows.render(base, bet_strings)
+    for n_changed in (0, 1, 16):
+        games = bump(base, n_changed)
+        html, changed = rows.render(games, bet_strings)
+        rows.render(base, bet_strings)
+        check(f"{n_changed} changed: the rows match a from-scratch build and {n_changed} are reported rebuilt",
+              html == [game_row_html(g, bet_strings[game_key(g)]) for g in games]
+              and changed == {game_key(g) for g in games[:n_changed]}, f"{len(changed)} reported")
+    full, incremental = times[16]
+    # past FULL_RENDER_SHARE it stops comparing and rebuilds the rest, so all that's left on top of a
+    # from-scratch build is comparing the first half and keeping the rows for next time
+    check("16 changed: about the cost of a from-scratch build", incremental < full * 1.4,
+          f"{incremental * 1e6:.1f} us vs {full * 1e6:.1f} us")
+    check_bet_strings(base)
+    if failures:
+        print(f"{len(failures)} check(s) failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
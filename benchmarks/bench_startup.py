@@ -0,0 +1,46 @@
+"""
+Measures a cold import of everything dashboard.py loads up front (in a fresh interpreter, with -X importtime)
+and checks it against the "imports" budget in startup.py. Lists the slowest modules so it's obvious what to
+make lazy next. Streamlit itself isn't included, it's the same cost no matter what we do.
+Exits with status 1 if the budget is blown, so it can gate a change.
+
+Run from the repo root:
+    python -m benchmarks.bench_startup
+"""
+import subprocess
+import sys
+
+from startup import BUDGETS
+
+# dashboard.py's own imports, minus streamlit
+DASHBOARD_IMPORTS = ("startup", "live_cache", "render_rows", "bet_ledger", "line_history", "sleeper_pull")
+# what should NOT be loaded by those imports anymore
+DEFERRED = ("pandas", "matplotlib", "streamlit_extras")
+
+
+def main():
+    code = f"import sys; import {', '.join(DASHBOARD_IMPORTS)}; " \
+           f"print('LOADED', [m for m in {DEFERRED!r} if m in sys.modules])"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # nested imports are indented under whatever imported them
+        rows.append((int(cumulative_us), int(self_us), name[1:]))
+
+    top_level = [r for r in rows if not r[2].startswith(" ")]
+    total_ms = sum(r[0] for r in top_level) / 1000
+    print(f"cold import of {', '.join(DASHBOARD_IMPORTS)}: {total_ms:.0f} ms (budget {BUDGETS['imports']} ms)")
+    print(result.stdout.strip().replace("LOADED", "heavy modules loaded anyway:"))
+    print(f"{'slowest (cumulative ms)':<40}{'ms':>8}")
+    for cumulative, _, name in sorted(top_level, reverse=True)[:10]:
+        print(f"{name.strip():<40}{cumulative / 1000:>8.1f}")
+    if total_ms > BUDGETS["imports"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Benchmarks what the tracing instrumentation (tracing.py) costs per call, with SUNDAY_TRACE off and on: a bare
+function call, the same function under @traced, and a `with span(...)` block. Each mode runs in its own
+subprocess, since tracing is switched on or off when the process starts.
+
+Run from the repo root:
+    python -m benchmarks.bench_tracing
+"""
+import os
+import subprocess
+import sys
+import timeit
+
+RUNS = 1_000_000
+
+
+def measure():
+    import tracing
+
+    def work():
+        return None
+
+    traced_work = tracing.traced("bench")(work)
+
+    def in_span():
+        with tracing.span("bench span"):
+            pass
+
+    for name, fn in (("plain call", work), ("@traced call", traced_work), ("with span()", in_span)):
+        ns = min(timeit.repeat(fn, number=RUNS, repeat=3)) / RUNS * 1e9
+        print(f"{name:<16}{ns:>8.0f}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        measure()
+        return
+    for label, value in (("SUNDAY_TRACE off", "0"), ("SUNDAY_TRACE=1", "1")):
+        print(f"{label} (ns per call)")
+        env = dict(os.environ, SUNDAY_TRACE=value)
+        subprocess.run([sys.executable, "-m", "benchmarks.bench_tracing", "--child"], env=env, check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+This houses the bet grading: it joins a week's bets (see bet_ledger.py) with the scoreboard and works out, for
+every game at once, which side was bet, the live cover margin, and whether the bet is covering, won, lost or
+pushed. Moneyline bets are just spread 0, so they grade the same way (a tie is a push).
+Everything is done as pandas/NumPy column operations over the whole slate rather than game by game.
+"""
+import numpy as np
+import pandas as pd
+
+from snapshot_diff import diff_games, game_key
+
+GRADE_COLUMNS = ["home_team", "away_team", "home_score", "away_score", "status", "bet_team", "spread",
+                 "cover_margin", "result", "bet_string"]
+
+
+def _is_final(status):
+    return status.str.startswith("Final")
+
+
+def grade_bets(games, bets):
+    """
+    Grades every game in one pass.
+
+    Parameters:
+        - games (list): Game dicts from pull_games().
+        - bets (dict): {team: (spread, placed_at)} from initialize_bet_dict() / BetLedger.bets().
+
+    Returns:
+        - pd.DataFrame: One row per game (same order as games) with GRADE_COLUMNS. bet_team is whichever side
+        was bet most recently (None if neither), cover_margin is bet team's score + spread - the other score,
+        and result is one of "no bet", "pending", "covering", "losing", "even" (live) or "win", "loss",
+        "push" (final).
+    """
+    g = pd.DataFrame(list(games), columns=["home_team", "away_team", "home_score", "away_score", "status"])
+    spreads = pd.Series({team: bet[0] for team, bet in bets.items()}, dtype="float64")
+    placed = pd.Series({team: bet[1] for team, bet in bets.items()}, dtype="float64")
+
+    away_spread, home_spread = g["away_team"].map(spreads), g["home_team"].map(spreads)
+    away_placed, home_placed = g["away_team"].map(placed), g["home_team"].map(placed)
+    # the more recently placed side wins if both were bet
+    pick_away = away_spread.notna() & (home_spread.isna() | (away_placed >= home_placed))
+    has_bet = (away_spread.notna() | home_spread.notna()).to_numpy()
+    pick_away = pick_away.to_numpy()
+
+    home_score = g["home_score"].to_numpy(dtype=float)
+    away_score = g["away_score"].to_numpy(dtype=float)
+    spread = np.where(pick_away, away_spread, home_spread)
+    cover_margin = np.where(pick_away, away_score - home_score, home_score - away_score) + spread
+
+    final = _is_final(g["status"]).to_numpy()
+    scheduled = (g["status"] == "Scheduled").to_numpy()
+    result = np.select(
+        [~has_bet, scheduled,
+         final & (cover_margin > 0), final & (cover_margin < 0), final,
+         cover_margin > 0, cover_margin < 0],
+        ["no bet", "pending", "win", "loss", "push", "covering", "losing"],
+        default="even")
+
+    # object so the no-bet rows stay None (pandas would otherwise make this a str column and those NaN)
+    g["bet_team"] = pd.Series(np.where(has_bet, np.where(pick_away, g["away_team"], g["home_team"]), None),
+                              index=g.index, dtype=object)
+    g["spread"] = spread
+    g["cover_margin"] = np.where(has_bet, cover_margin, np.nan)
+    g["result"] = result
+    bet_team = g["bet_team"].fillna("")
+    g["bet_string"] = np.where(~has_bet, "---",
+                               np.where(spread == 0, bet_team + ": ML",
+                                        bet_team + ": " + pd.Series(spread).map("{:+.1f}".format)))
+    return g[GRADE_COLUMNS]
+
+
+def ats_record(graded):
+    """
+    Against-the-spread record over graded rows (e.g. every week's grade_bets() concatenated).
+    Returns {"win": n, "loss": n, "push": n}, only finished bets count.
+    """
+    counts = graded["result"].value_counts()
+    return {result: int(counts.get(result, 0)) for result in ("win", "loss", "push")}
+
+
+def season_ats_record(ledger, games_by_week):
+    """
+    Season ATS record from the bet ledger and each week's games, e.g. from the backfilled games table:
+    season_ats_record(get_ledger(), {week: df.to_dict("records") for week, df in load_table("games").groupby("week")})
+    """
+    graded = [grade_bets(games, ledger.bets(week)) for week, games in games_by_week.items()]
+    return ats_record(pd.concat(graded, ignore_index=True)) if graded else ats_record(pd.DataFrame({"result": []}))
+
+
+def describe_bets(week, games, bets, graded, lines):
+    """
+    The text shown next to each game in the slate: the bet and how it's doing, how far the line has moved
+    since a pending bet went in, or just the current line for games without a bet.
+
+    Parameters:
+        - week (int): The week, for the line history.
+        - games (list): The week's games from pull_games().
+        - bets (dict): {team: (spread, placed_at)}, what graded was graded with.
+        - graded (pd.DataFrame): BetGrader.update(games, bets).
+        - lines (LineHistory): See line_history.py.
+
+    Returns:
+        - dict: game key -> text.
+    """
+    bet_strings = {}
+    for game, key, bet_team, bet_string, result, margin in zip(
+            games, graded.index, graded["bet_team"], graded["bet_string"], graded["result"], graded["cover_margin"]):
+        if result not in ("no bet", "pending"):
+            bet_string = f"{bet_string} | {result} ({margin:+.1f})"
+        # result, not bet_team, says whether there's a bet: bet_team can come back NaN instead of None
+        if result == "pending":
+            # how far the line has moved since the bet went in (the current line is already on the game)
+            then, now = lines.spread_movement(week, bet_team, game["home_team"], game["away_team"], bets[bet_team][1])
+            if then is not None and now is not None and now != then:
+                bet_string = f"{bet_string} | now {now:+.1f} ({now - then:+.1f})"
+        elif result == "no bet" and game.get("home_spread") is not None:
+            bet_string = f"{bet_string} | {game['home_team']} {game['home_spread']:+.1f}"
+        bet_strings[key] = bet_string
+    return bet_strings
+
+
+class BetGrader:
+    """
+    Keeps the graded frame for a slate and, on each update, only re-grades the games whose score/status
+    changed since the last snapshot or whose bets changed. Keep one per session (or per poller).
+    """
+    def __init__(self):
+        self.games = ()
+        self.bets = {}
+        self.graded = pd.DataFrame(columns=GRADE_COLUMNS)
+
+    def update(self, games, bets):
+        """
+        Returns the graded frame for games/bets (indexed by (home_team, away_team)).
+        """
+        changes = diff_games(self.games, games)
+        dirty = changes.dirty()
+        if bets is not self.bets:
+            changed_teams = {team for team in bets.keys() | self.bets.keys() if bets.get(team) != self.bets.get(team)}
+            dirty |= {game_key(g) for g in games if g["home_team"] in changed_teams or g["away_team"] in changed_teams}
+
+        order = [game_key(g) for g in games]
+        graded = self.graded.drop(index=[key for key in changes.removed if key in self.graded.index])
+        if dirty:
+            fresh = grade_bets([g for g in games if game_key(g) in dirty], bets)
+            fresh.index = pd.MultiIndex.from_frame(fresh[["home_team", "away_team"]])
+            graded = pd.concat([graded.drop(index=[key for key in dirty if key in graded.index]), fresh])
+        self.graded = graded.reindex(pd.MultiIndex.from_tuples(order, names=["home_team", "away_team"])) if order else graded
+        self.games = games
+        self.bets = bets
+        return self.graded
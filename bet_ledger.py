@@ -0,0 +1,149 @@
+"""
+This houses the bet ledger. Every bet placement (and every "clear bets") is appended as its own row to a SQLite
+database in WAL mode, instead of rewriting a whole bets/wk{N}.json per save. Appends from different tabs can't
+clobber each other, and the full history of what was bet and when is kept.
+Reads come from an in-memory copy per week that's only rebuilt when the database's data_version says someone
+(this process or another one) wrote to it, so a rerun with no new bets never touches the file.
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+TEAMS = (
+    "NYG", "WSH", "DAL", "PHI", "BUF", "MIA", "NYJ", "NE",
+    "GB", "MIN", "DET", "CHI", "CIN", "CLE", "BAL", "PIT",
+    "SF", "LAR", "SEA", "ARI", "LV", "DEN", "KC", "LAC",
+    "CAR", "ATL", "NO", "TB", "IND", "TEN", "HOU", "JAX",
+)
+
+
+class BetLedger:
+    """
+    Append-only bet ledger.
+
+    Parameters:
+        - db_file (str): Where the ledger lives. Made (with its folder) if it doesn't exist.
+    """
+    def __init__(self, db_file='bets/ledger.db'):
+        self.db_file = db_file
+        if os.path.dirname(db_file):
+            os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS bets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                week INTEGER NOT NULL,
+                kind TEXT NOT NULL,          -- 'bet' or 'clear'
+                team TEXT,
+                spread REAL,
+                placed_at REAL NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS bets_week ON bets (week, id)")
+        self._lock = threading.Lock()
+        self._cache = {}          # week -> (version, {team: (spread, placed_at)})
+        self._local_writes = 0    # data_version doesn't change for our own commits, so count those ourselves
+        self._imported = set()
+
+    def _version(self):
+        return (self._conn.execute("PRAGMA data_version").fetchone()[0], self._local_writes)
+
+    def place(self, week, team, spread, placed_at=None):
+        """
+        Records a bet on team at spread (0 is the moneyline). placed_at defaults to now (a unix timestamp).
+        """
+        placed_at = datetime.now().timestamp() if placed_at is None else placed_at
+        with self._lock:
+            self._conn.execute("INSERT INTO bets (week, kind, team, spread, placed_at) VALUES (?, 'bet', ?, ?, ?)",
+                               (week, team, spread, placed_at))
+            self._local_writes += 1
+
+    def clear(self, week):
+        """
+        Clears the week's bets. Nothing is deleted, a 'clear' entry just hides everything placed before it.
+        """
+        with self._lock:
+            self._conn.execute("INSERT INTO bets (week, kind, placed_at) VALUES (?, 'clear', ?)",
+                               (week, datetime.now().timestamp()))
+            self._local_writes += 1
+
+    def bets(self, week):
+        """
+        Returns the latest bet on every team for the week, in the same shape the old bets/wk{N}.json had:
+        {team: (spread, placed_at)}, with (None, None) for teams with no bet. Don't mutate it, it's shared.
+        """
+        with self._lock:
+            version = self._version()
+            cached = self._cache.get(week)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            rows = self._conn.execute("""
+                SELECT team, spread, placed_at FROM bets
+                WHERE week = ? AND kind = 'bet'
+                  AND id > COALESCE((SELECT MAX(id) FROM bets WHERE week = ? AND kind = 'clear'), 0)
+                ORDER BY id""", (week, week)).fetchall()
+            bets = dict.fromkeys(TEAMS, (None, None))
+            for team, spread, placed_at in rows:
+                bets[team] = (spread, placed_at)   # later rows win
+            self._cache[week] = (version, bets)
+            return bets
+
+    def latest_bet(self, week, away_team, home_team):
+        """
+        Returns (team, spread) for whichever side of a game was bet most recently, or None if neither was.
+        """
+        bets = self.bets(week)
+        away = bets.get(away_team, (None, None))
+        home = bets.get(home_team, (None, None))
+        if away[0] is None and home[0] is None:
+            return None
+        if home[0] is None or (away[0] is not None and away[1] >= home[1]):
+            return away_team, away[0]
+        return home_team, home[0]
+
+    def history(self, week=None):
+        """
+        Every entry in the ledger (optionally just one week), oldest first, as (week, kind, team, spread, placed_at).
+        """
+        with self._lock:
+            if week is None:
+                return self._conn.execute("SELECT week, kind, team, spread, placed_at FROM bets ORDER BY id").fetchall()
+            return self._conn.execute("SELECT week, kind, team, spread, placed_at FROM bets WHERE week = ? ORDER BY id",
+                                      (week,)).fetchall()
+
+    def import_json(self, week, bet_file):
+        """
+        One-time import of an old bets/wk{N}.json, only if the ledger has nothing for that week yet.
+        Only checked once per week per process.
+        """
+        if week in self._imported:
+            return
+        self._imported.add(week)
+        if not os.path.exists(bet_file):
+            return
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM bets WHERE week = ? LIMIT 1", (week,)).fetchone():
+                return
+        with open(bet_file, 'r') as f:
+            old_bets = json.load(f)
+        placed = sorted((placed_at, team, spread) for team, (spread, placed_at) in old_bets.items() if spread is not None)
+        for placed_at, team, spread in placed:
+            self.place(week, team, spread, placed_at)
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger(db_file='bets/ledger.db'):
+    """
+    Returns the process-wide ledger, opening it on first use.
+    """
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = BetLedger(db_file)
+        return _ledger
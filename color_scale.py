@@ -0,0 +1,60 @@
+"""
+This houses the red -> gray -> green scale used to color lineup rows by how a player is doing against the player
+across from them. The gradient is built once into a lookup table over the clamped -10 to +10 point range (one
+entry per 0.1 points), so coloring a row is an index into a list instead of building a matplotlib colormap.
+matplotlib is only imported the first time the table is built, and isn't needed at all if it's not installed.
+"""
+import numpy as np
+
+# red (down 10) -> gray (even) -> green (up 10)
+GRADIENT = ("#F63737", "#DCDADA", "#33F333")
+# diffs are clamped to +-DIFF_RANGE points and looked up at RESOLUTION points
+DIFF_RANGE = 10.0
+RESOLUTION = 0.1
+
+_lut = None
+
+
+def _gradient_rgba(normalized):
+    """
+    RGBA for each value in normalized (0 to 1). Uses matplotlib's colormap when it's around, otherwise does
+    the same 256-step linear interpolation it does.
+    """
+    try:
+        import matplotlib.colors as mcolors
+    except ImportError:
+        stops = np.array([[int(c[i:i + 2], 16) / 255 for i in (1, 3, 5)] for c in GRADIENT])
+        steps = np.linspace(0, 1, 256)
+        positions = np.linspace(0, 1, len(GRADIENT))
+        table = np.column_stack([np.interp(steps, positions, stops[:, ch]) for ch in range(3)])
+        idx = np.clip((normalized * 256).astype(int), 0, 255)
+        return table[idx]
+    cmap = mcolors.LinearSegmentedColormap.from_list("perf", list(GRADIENT))
+    return cmap(normalized)[:, :3]
+
+
+def _get_lut():
+    global _lut
+    if _lut is None:
+        n = int(round(2 * DIFF_RANGE / RESOLUTION)) + 1
+        rgb = np.round(_gradient_rgba(np.linspace(0, 1, n)) * 255).astype(int)
+        _lut = np.array([f"#{r:02x}{g:02x}{b:02x}" for r, g, b in rgb])
+    return _lut
+
+
+def diff_color(p_points, op_points):
+    """
+    Returns a hex color smoothly transitioning from red (down 10)
+    to gray (even) to green (up 10).
+    """
+    diff = max(-DIFF_RANGE, min(DIFF_RANGE, p_points - op_points))  # clamp between -10 and 10
+    return str(_get_lut()[int(round((diff + DIFF_RANGE) / RESOLUTION))])
+
+
+def diff_colors(p_points, op_points):
+    """
+    Vectorized diff_color(): takes two equal-length sequences of points (e.g. a whole lineup and the lineup
+    it's up against) and returns a numpy array of hex colors, one per pair.
+    """
+    diff = np.clip(np.asarray(p_points, dtype=float) - np.asarray(op_points, dtype=float), -DIFF_RANGE, DIFF_RANGE)
+    return _get_lut()[np.rint((diff + DIFF_RANGE) / RESOLUTION).astype(int)]
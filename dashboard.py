@@ -1,19 +1,30 @@
+import startup   # first, so the import time below covers everything
 import streamlit as st
-import pandas as pd
-from sleeper_pull import pull_lineup
-from espn_pull import pull_games
-import matplotlib.colors as mcolors
-from streamlit_extras.stylable_container import stylable_container
+import http_client
+import tracing
+from live_cache import FAST_INTERVAL, get_portfolio, get_snapshot
+from render_rows import LineupRows, SlateRows
+from bet_ledger import get_ledger
+from line_history import get_line_history
+from sleeper_pull import prefetch_player_metadata
 import os
 import json
 from datetime import datetime
 
+startup.mark("imports")
+# pandas is only needed by the bet grading on the slate, load it while the first poll is on the network
+startup.warm_imports(("pandas", "bet_grading"))
+
 
 
 def main():
     save_state_filename = 'save_state.json'
     league_id = "1180303931006689280"  # FFF league
     username = "TitsBon"
+    # add more of your leagues here to get the portfolio panel (every league's matchup and your exposure per game)
+    league_ids = [league_id]
+    # the daily 5MB players pull runs in the background, the first render uses yesterday's store
+    prefetch_player_metadata()
     if "selected_week" not in st.session_state:
         if not os.path.exists(save_state_filename):
             with open(save_state_filename, 'w') as f:
@@ -24,11 +35,8 @@ def main():
                 save_state = json.load(f)
             st.session_state["selected_week"] = save_state["current_week"]
     # week = st.session_state["selected_week"]
-    my_lineup, opp_lineup = pull_lineup(league_id, username, st.session_state["selected_week"])
-
-    bet_file = f'bets/wk{st.session_state["selected_week"]}.json'
 
-    st.session_state.bets = initialize_bet_dict(bet_file)
+    st.session_state.bets = initialize_bet_dict(st.session_state["selected_week"])
 
     # --- UI ---
     st.set_page_config(page_title="Football Sunday Dashboard", layout="wide")
@@ -74,10 +82,9 @@ def main():
             val = float(params["spread"])
             spread = round(val * 2) / 2.0  # nearest 0.5
             print(f"Saved bet: {team} {spread:+.1f}")   # <-- prints to console
-            st.session_state.bets[team] = (spread, datetime.now().timestamp())
-            # save the bets for when refresh happens
-            with open(bet_file, 'w') as f:
-                json.dump(st.session_state.bets, f, indent=4)
+            # append it to the ledger (see bet_ledger.py) so it's there for when refresh happens
+            get_ledger().place(st.session_state["selected_week"], team, spread)
+            st.session_state.bets = initialize_bet_dict(st.session_state["selected_week"])
         except ValueError:
             print(f"Bad spread for {team}: {params['spread']}")
 
@@ -90,7 +97,7 @@ def main():
         st.query_params.clear()
     
     if "clear_bets" in params:
-        st.session_state.bets = initialize_bet_dict(bet_file, clear=True)
+        st.session_state.bets = initialize_bet_dict(st.session_state["selected_week"], clear=True)
         st.query_params.clear()
 
     # --- Title and Menu ---
@@ -128,19 +135,20 @@ def main():
     # --- LEFT: lineups and bet area grouped together ---
     with left:
         # Group both fantasy lineups side by side
-        lineup_cols = st.columns(2, gap="medium")
-        with lineup_cols[0]:
-            show_lineup(my_lineup, opp_lineup)
-        with lineup_cols[1]:
-            show_lineup(opp_lineup, my_lineup)
+        show_live_lineups(league_id, username, st.session_state["selected_week"])
 
         # Bet area directly beneath both lineups
         st.markdown("<div style='margin-top:12px;'></div>", unsafe_allow_html=True)
-        show_bet_input_area()
+        show_bet_input_area(get_snapshot(league_id, username, st.session_state["selected_week"]).games)
 
     # --- RIGHT: games list ---
     with right:
-        show_games(st.session_state["selected_week"], st.session_state.bets)
+        show_live_games(league_id, username, st.session_state["selected_week"])
+        if len(league_ids) > 1:
+            show_live_portfolio(league_ids, username, st.session_state["selected_week"])
+
+    # only recorded once per process, see startup.py (the times are in the diagnostics panel)
+    startup.mark("first render")
 
     # # --- Bet Entry Section directly below lineups ---
     # with st.container():
@@ -157,155 +165,107 @@ def main():
     #         show_bet_input_area()
 
 
+# The lineups and the slate redraw themselves every poll without rerunning the whole page. They read the
+# background poller's latest snapshot (see live_cache.py). Every row is still sent on every run, only
+# the html for rows that changed since this session last drew them gets rebuilt (see render_rows.py).
+@st.fragment(run_every=FAST_INTERVAL)
+def show_live_lineups(league_id, username, week):
+    data = get_snapshot(league_id, username, week)
+    win_prob = data.win_prob
+    st.caption(f"Win probability {win_prob.win_prob:.0%} · projected {win_prob.my_projection:.1f} "
+               f"({win_prob.my_range[0]:.0f}-{win_prob.my_range[1]:.0f}) vs {win_prob.opp_projection:.1f} "
+               f"({win_prob.opp_range[0]:.0f}-{win_prob.opp_range[1]:.0f})")
+    lineup_cols = st.columns(2, gap="medium")
+    with lineup_cols[0]:
+        show_lineup(data.my_lineup, data.opp_lineup, "my_lineup_rows")
+    with lineup_cols[1]:
+        show_lineup(data.opp_lineup, data.my_lineup, "opp_lineup_rows")
+    if data.stat_lines:
+        with st.expander("Play by play"):
+            for player in data.my_lineup.player_list:
+                line = data.stat_lines.get(player.player_id)
+                if line is None:
+                    continue
+                st.markdown(f"**{player.first_name} {player.last_name}** ({player.player_points:.2f} pts) "
+                            f"{line['summary']}")
+                for quarter, clock, text in reversed(line["recent"]):
+                    st.caption(f"Q{quarter} {clock} · {text}")
+
+@st.fragment(run_every=FAST_INTERVAL)
+def show_live_games(league_id, username, week):
+    data = get_snapshot(league_id, username, week)
+    show_games(week, data.games)
+    st.caption(f"Updated {datetime.fromtimestamp(data.fetched_at):%I:%M:%S %p} · {data.timing_report}")
+
+@st.fragment(run_every=FAST_INTERVAL)
+def show_live_portfolio(league_ids, username, week):
+    portfolio = get_portfolio(league_ids, username, week)
+    st.subheader("All Leagues")
+    for my_lineup, opp_lineup in portfolio.matchups.values():
+        st.markdown(f"**{my_lineup.team_name}** {my_lineup.total_points:.2f} - {opp_lineup.total_points:.2f} "
+                    f"{opp_lineup.team_name}")
+    # which of my starters are in each game that's on, across every league
+    for game in portfolio.games:
+        if game["status"] != "In Progress":
+            continue
+        exposures = portfolio.in_game(game)
+        if exposures:
+            names = ", ".join(f"{e.player.last_name} ({e.team_name})" for e in exposures)
+            st.caption(f"{game['away_team']} @ {game['home_team']}: {names}")
+    st.caption(portfolio.timing_report())
+
 # helper to render a Lineup
-def show_lineup(lineup, other_lineup):
+def show_lineup(lineup, other_lineup, rows_key):
     st.subheader(f"{lineup.team_name} ({lineup.username})")
     st.metric("Total Points", f"{lineup.total_points:.2f}")
     # st.write("---")
 
-    lineup.order_list()
-    other_lineup.order_list()
-
-    for p, op in zip(lineup.player_list, other_lineup.player_list):
-        color = diff_color(p.player_points, op.player_points)
-        text_color = "white" if p.player_points - op.player_points < 0 else "black"
-        st.markdown(
-            f"""
-            <div style="
-                background-color:{color};
-                color:black;
-                padding:10px 14px;
-                margin-bottom:6px;
-                border-radius:10px;
-                font-weight:500;
-            ">
-                <b>{p.first_name} {p.last_name}</b> ({p.team} {p.position}) - {p.player_points:.1f} pts
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+    # the poller orders both lineups before publishing them
+    if rows_key not in st.session_state:
+        st.session_state[rows_key] = LineupRows()
 
-def diff_color(p_points, op_points):
-    """
-    Returns a hex color smoothly transitioning from red (down 10)
-    to yellow (even) to green (up 10).
-    """
-
-    diff = max(-10, min(10, p_points - op_points))  # clamp between -10 and 10
-    normalized = (diff + 10) / 20.0  # map [-10, 10] → [0, 1]
+    with tracing.span("render lineup rows"):
+        # streamlit redraws every element each run, so which rows were rebuilt doesn't matter here
+        rows, _ = st.session_state[rows_key].render(lineup, other_lineup)
+        for row in rows:
+            st.markdown(row, unsafe_allow_html=True)
 
-    # cmap = mcolors.LinearSegmentedColormap.from_list("perf", ["#F14B4B", "#F0F04B", "#50EE50"])  # red → yellow → green
-    cmap = mcolors.LinearSegmentedColormap.from_list("perf", ["#F63737", "#DCDADA", "#33F333"])
-    return mcolors.to_hex(cmap(normalized))
-
-def show_games(week, bet_dict):
+def show_games(week, games):
     st.subheader("Full Slate")
-    games = pull_games(week)
 
     if "selected_team" not in st.session_state:
         st.session_state.selected_team = None
     if "bets" not in st.session_state:
         st.session_state.bets = {}
 
-    team_colors = {
-        "NYG": "#003C7E", "WSH": "#773141", "DAL": "#041E42", "PHI": "#004C54",
-        "BUF": "#00338D", "MIA": "#008E97", "NYJ": "#125740", "NE": "#002244",
-        "GB": "#203731", "MIN": "#4F2683", "DET": "#0076B6", "CHI": "#0B162A",
-        "CIN": "#FB4F14", "CLE": "#311D00", "BAL": "#241773", "PIT": "#FFB612",
-        "SF": "#AA0000", "LAR": "#003594", "SEA": "#002244", "ARI": "#97233F",
-        "LV": "#000000", "DEN": "#FB4F14", "KC": "#E31837", "LAC": "#0080C6",
-        "CAR": "#0085CA", "ATL": "#A71930", "NO": "#D3BC8D", "TB": "#D50A0A",
-        "IND": "#002C5F", "TEN": "#4B92DB", "HOU": "#03202F", "JAX": "#006778",
-    }
-
-    for game in games:
-        away_team = game["away_team"]; home_team = game["home_team"]
-        away_color = team_colors.get(away_team, "#888"); home_color = team_colors.get(home_team, "#888")
-        status = f"Q{game['quarter']} {game['clock']}" if game["status"] == "In Progress" else "TBD" if game["status"] == "Scheduled" else game["status"]
-        away_score = f"{int(game['away_score']):>2}"; home_score = f"{int(game['home_score']):>2}"
-
-        def construct_bet_string(team, spread):
-            if spread == 0:
-                string = f'{team}: ML'
-            else:
-                string = f'{team}: {spread:+.1f}'
-            return string
-
-        if bet_dict[away_team][0] is not None and bet_dict[home_team][0] is not None:
-            # take the more recently placed bet (we could clear the other bet but unnecessary)
-            if bet_dict[away_team][1] >= bet_dict[home_team][1]:
-                bet_string = construct_bet_string(away_team, bet_dict[away_team][0])
-            else:
-                bet_string = construct_bet_string(home_team, bet_dict[home_team][0])
-        elif bet_dict[away_team][0] is not None:
-            bet_string = construct_bet_string(away_team, bet_dict[away_team][0])
-        elif bet_dict[home_team][0] is not None:
-            bet_string = construct_bet_string(home_team, bet_dict[home_team][0])
-        else:
-            bet_string = '---'
-
-        params = st.query_params
-        if "clicked_team" in params:
-            clicked = params["clicked_team"]
-            print(f"Clicked {clicked}")  # appears in terminal
-            st.session_state.selected_team = clicked
-            st.query_params.clear()  # reset after handling
-
-        st.markdown(f"""
-        <div style="
-            background-color: #f8f8f8;
-            border: 1px solid #ddd;
-            border-radius: 2px;
-            padding: 4px 4px;
-            margin: 0px;            /* eliminates spacing */
-        ">
-        <div style="display:flex; align-items:center;">
-            <div style="flex:0.4;">
-                <form action="" method="get" style="margin:0;">
-                <input type="hidden" name="select_team" value="{away_team}">
-                    <button type="submit" style="
-                        background-color:{away_color};
-                        color:white;
-                        border:2px solid black;
-                        border-radius:6px;
-                        font-weight:700;
-                        width:3.8em;
-                        height:2em;
-                        cursor:pointer;
-                    ">
-                        {away_team}
-                    </button>
-                </form>
-            </div>
-            <div style="flex:0.8; text-align:center; font-family:monospace; font-weight:bold;">
-            {away_score} - {home_score}
-            </div>
-            <div style="flex:0.4;">
-                <form action="" method="get" style="margin:0;">
-                <input type="hidden" name="select_team" value="{home_team}">
-                    <button type="submit" style="
-                        background-color:{home_color};
-                        color:white;
-                        border:2px solid black;
-                        border-radius:6px;
-                        font-weight:700;
-                        width:3.8em;
-                        height:2em;
-                        cursor:pointer;
-                    ">
-                        {home_team}
-                    </button>
-                </form>
-            </div>
-            <div style="flex:2.0; font-family:monospace; margin-left:10px;">
-            | {status} | {bet_string}
-            </div>
-        </div>
-        </div>
-        """, unsafe_allow_html=True)
-
+    if "slate_rows" not in st.session_state:
+        st.session_state.slate_rows = SlateRows()
 
-def show_bet_input_area():
+    params = st.query_params
+    if "clicked_team" in params:
+        clicked = params["clicked_team"]
+        print(f"Clicked {clicked}")  # appears in terminal
+        st.session_state.selected_team = clicked
+        st.query_params.clear()  # reset after handling
+
+    # imported here, bet_grading needs pandas (it's warmed up in the background, see startup.py)
+    from bet_grading import BetGrader, describe_bets
+    if "bet_grader" not in st.session_state:
+        st.session_state.bet_grader = BetGrader()
+
+    # every game's bet graded at once (only games whose score or bet changed get re-graded), see bet_grading.py
+    bets = get_ledger().bets(week)
+    graded = st.session_state.bet_grader.update(games, bets)
+    bet_strings = describe_bets(week, games, bets, graded, get_line_history())
+
+    # only games whose score/clock/status (or bet) changed since this session's last draw get their html rebuilt
+    with tracing.span("render slate rows"):
+        rows, _ = st.session_state.slate_rows.render(games, bet_strings)
+        for row in rows:
+            st.markdown(row, unsafe_allow_html=True)
+
+
+def show_bet_input_area(games):
     team = st.session_state.get("selected_team")
     st.markdown("<hr style='margin-top:2px; margin-bottom:4px;'>", unsafe_allow_html=True)
 
@@ -343,13 +303,19 @@ def show_bet_input_area():
         st.info("Click a team in the game list to start or edit a bet.")
         return
 
+    # prefill the current line for the team, so most of the time it's just "Save Bet"
+    current_spread = ""
+    for game in games:
+        if team in (game["home_team"], game["away_team"]) and game.get("home_spread") is not None:
+            current_spread = game["home_spread"] if team == game["home_team"] else -game["home_spread"]
+
     st.markdown(f"""
     <div style="margin-left:6px; margin-top:-5px; font-weight:700; font-size:1.1em;">
         Enter the spread for the bet you placed on <span style="color:#0073e6;">{team}</span> (Moneyline=0):
     </div>
     <div style="margin-top:4px; margin-left:6px; display:flex; align-items:center;">
         <form action="" method="get" style="display:flex; align-items:center; gap:8px;">
-            <input type="number" name="spread" step="0.5" required
+            <input type="number" name="spread" step="0.5" value="{current_spread}" required
                    style="width:90px;height:30px;font-size:14px;border-radius:6px;border:1px solid #bbb;text-align:center;">
             <input type="hidden" name="bet_team" value="{team}">
             <button type="submit"
@@ -361,28 +327,54 @@ def show_bet_input_area():
     """, unsafe_allow_html=True)
 
 
-def initialize_bet_dict(bet_file, clear=False):
-    os.makedirs(os.path.dirname(bet_file), exist_ok=True)
-    if not os.path.exists(bet_file) or clear is True:
-        # dictionary of a tuple where the first entry is the spread and the second is the datetime it was entered
-        bets = {
-            "NYG": (None, None), "WSH": (None, None), "DAL": (None, None), "PHI": (None, None),
-            "BUF": (None, None), "MIA": (None, None), "NYJ": (None, None), "NE": (None, None),
-            "GB": (None, None), "MIN": (None, None), "DET": (None, None), "CHI": (None, None),
-            "CIN": (None, None), "CLE": (None, None), "BAL": (None, None), "PIT": (None, None),
-            "SF": (None, None), "LAR": (None, None), "SEA": (None, None), "ARI": (None, None),
-            "LV": (None, None), "DEN": (None, None), "KC": (None, None), "LAC": (None, None),
-            "CAR": (None, None), "ATL": (None, None), "NO": (None, None), "TB": (None, None),
-            "IND": (None, None), "TEN": (None, None), "HOU": (None, None), "JAX": (None, None),
-        }
-        with open(bet_file, 'w') as f:
-            json.dump(bets, f, indent=4)
-    else:
-        with open(bet_file, 'r') as f:
-            bets = json.load(f)
+def show_diagnostics(profile=None):
+    """
+    The collapsible diagnostics panel: span timings (with SUNDAY_TRACE set), the upstream endpoints, startup
+    times, a Prometheus dump of all of it, and the sampling profiler for one rerun.
+    """
+    with st.expander("Diagnostics", expanded=profile is not None):
+        if tracing.ENABLED:
+            spans = tracing.report()
+            st.markdown("**Spans**")
+            st.table([{"span": name, "count": s["count"], "p50 ms": round(s["p50_ms"], 2),
+                       "p95 ms": round(s["p95_ms"], 2), "max ms": round(s["max_ms"], 2)} for name, s in spans.items()])
+        else:
+            st.caption("Span tracing is off, start the dashboard with SUNDAY_TRACE=1 to turn it on.")
+
+        st.markdown("**Upstream endpoints**")
+        st.table([{"endpoint": endpoint, "requests": s["requests"], "304s": s["not_modified"], "errors": s["errors"],
+                   "throttled": s["throttled"], "merged": s["merged"], "p50 ms": round(s["p50_ms"], 1), "p95 ms": round(s["p95_ms"], 1), "max ms": round(s["max_ms"], 1)}
+                  for endpoint, s in http_client.stats().items()])
+        st.caption(f"Startup: {startup.report()}")
+        st.download_button("Prometheus metrics", tracing.prometheus(), file_name="metrics.prom", mime="text/plain")
+
+        if st.button("Profile the next rerun"):
+            st.session_state.profile_next_rerun = True
+            st.rerun()
+        if profile is not None:
+            st.code(profile.report())
 
-    return bets
+
+def initialize_bet_dict(week, clear=False):
+    """
+    Returns the week's bets as {team: (spread, timestamp)}, (None, None) for no bet. These live in the bet
+    ledger now (see bet_ledger.py), an old bets/wk{N}.json for the week gets imported the first time.
+    """
+    ledger = get_ledger()
+    if clear is True:
+        ledger.clear(week)
+    else:
+        ledger.import_json(week, f'bets/wk{week}.json')
+    return ledger.bets(week)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    profile = None
+    if st.session_state.pop("profile_next_rerun", False):
+        # only this one rerun is sampled, see tracing.sample_profile
+        with tracing.sample_profile() as profile:
+            main()
+    else:
+        with tracing.span("rerun"):
+            main()
+    show_diagnostics(profile)
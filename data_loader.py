@@ -0,0 +1,96 @@
+"""
+This houses the data loading for one dashboard render. Everything the page needs that doesn't depend on
+anything else (league users, rosters, your user_id, the week's matchups, the ESPN scoreboard, and the player
+metadata) is fired off at the same time on a small thread pool and gathered before any UI gets drawn, so a
+render waits for the slowest request instead of the sum of all of them.
+The odds come along inside the scoreboard response, so there's no separate odds request to fan out.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+from espn_pull import pull_games
+from sleeper_pull import build_lineups, get_league_context, get_player_metadata, pull_matchups, resolve_user_id, \
+    settle_matchups
+from tracing import traced
+
+# upstream calls per render top out around 6, this leaves room for a couple of sessions rendering at once
+MAX_WORKERS = 8
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="data_loader")
+
+
+class RenderData:
+    """
+    Everything one render of the dashboard needs, plus how long each piece took to load.
+    timings maps each request name to its wall-clock seconds, total is the wall-clock for the whole load.
+    """
+    def __init__(self, my_lineup, opp_lineup, games, timings, total):
+        self.my_lineup = my_lineup
+        self.opp_lineup = opp_lineup
+        self.games = games
+        self.timings = timings
+        self.total = total
+
+    def timing_report(self):
+        """
+        e.g. "Loaded in 312 ms (matchups 305, scoreboard 188, metadata 1)". If the fan-out is doing its job
+        the total is about the slowest request, not the sum.
+        """
+        parts = ", ".join(f"{name} {1000 * secs:.0f}" for name, secs in
+                          sorted(self.timings.items(), key=lambda item: -item[1]))
+        return f"Loaded in {1000 * self.total:.0f} ms ({parts})"
+
+
+def timed(fn, *args):
+    """
+    Calls fn(*args) and returns (result, seconds it took), for submitting to a pool and timing each pull.
+    """
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+@traced()
+def load_render_data(league_id, username, week):
+    """
+    Loads the user's lineup, the opponent's lineup and the week's games concurrently.
+
+    Parameters:
+        - league_id (str): Sleeper league id.
+        - username (str): The user's sleeper username.
+        - week (int): Week number of interest.
+
+    Returns:
+        - RenderData
+    """
+    start = time.perf_counter()
+    league = get_league_context(league_id, username, fetch=False)
+
+    futures = {
+        "matchups": _pool.submit(timed, pull_matchups, league_id, week),
+        "scoreboard": _pool.submit(timed, pull_games, week),
+        "metadata": _pool.submit(timed, get_player_metadata),
+    }
+    # checked once: the context is shared, and its ttl can run out while we wait on the futures
+    stale = league.is_stale()
+    if stale:
+        # only on the first render (or once the context's ttl runs out)
+        futures["users"] = _pool.submit(timed, http_client.get_json,
+                                        f'https://api.sleeper.app/v1/league/{league_id}/users')
+        futures["rosters"] = _pool.submit(timed, http_client.get_json,
+                                          f'https://api.sleeper.app/v1/league/{league_id}/rosters')
+        futures["user"] = _pool.submit(timed, resolve_user_id, username)
+
+    results = {}
+    timings = {}
+    for name, future in futures.items():
+        results[name], timings[name] = future.result()
+
+    if stale:
+        league.load(results["users"], results["rosters"])
+    # the matchups went out before we knew whether the week is over
+    settle_matchups(league_id, week, results["matchups"], results["scoreboard"])
+
+    my_lineup, opp_lineup = build_lineups(league, results["matchups"], results["metadata"])
+    return RenderData(my_lineup, opp_lineup, results["scoreboard"], timings, time.perf_counter() - start)
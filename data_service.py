@@ -0,0 +1,185 @@
+"""
+This houses the data service behind the Dash front end (app.py). There's one per process and week, and it
+owns everything the page shows: the scoreboard and lineups (read from the background poller's snapshots, see
+live_cache.py) and the bets (the bet ledger, graded once here instead of once per viewer).
+Each part of the page is a Component: a list of plain, JSON-able rows with a version that only goes up when a
+row actually changed. Components also remember which rows changed in their last HISTORY versions. A viewer
+sends the versions it has and gets back only the components that moved, and for a viewer that's just a few
+versions behind, only the rows that moved. Upstream requests come from the poller alone, so they don't
+depend on how many viewers there are.
+"""
+import threading
+from collections import deque
+
+from bet_ledger import get_ledger
+from color_scale import diff_colors
+from line_history import get_line_history
+from live_cache import get_snapshot
+from render_rows import status_text
+from snapshot_diff import game_key
+
+COMPONENTS = ("header", "my_lineup", "opp_lineup", "slate")
+# how many versions back a viewer can be and still get just the changed rows
+HISTORY = 32
+
+
+class Component:
+    """
+    One versioned part of the page.
+    - version (int): Goes up by one every time any row changes. 0 means nothing has been published yet.
+    - rows (list): The current rows.
+    - history (deque): (version, set of changed row indexes) for recent versions, None for "everything"
+    (the number of rows changed).
+    """
+    __slots__ = ("version", "rows", "history")
+
+    def __init__(self):
+        self.version = 0
+        self.rows = []
+        self.history = deque(maxlen=HISTORY)
+
+    def publish(self, rows):
+        """
+        Swaps in new rows, bumping the version only if something is different. Returns whether it was.
+        """
+        if rows == self.rows:
+            return False
+        if len(rows) == len(self.rows):
+            changed = {i for i, (old, new) in enumerate(zip(self.rows, rows)) if old != new}
+        else:
+            changed = None
+        self.rows = rows
+        self.version += 1
+        self.history.append((self.version, changed))
+        return True
+
+    def since(self, version):
+        """
+        What a viewer at version needs: None if it's current, {"version", "rows"} if it needs everything, or
+        {"version", "patch": {index: row}} if it only needs some rows.
+        """
+        if version == self.version:
+            return None
+        oldest = self.history[0][0] if self.history else self.version + 1
+        if version is None or version > self.version or version < oldest - 1:
+            return {"version": self.version, "rows": self.rows}
+        changed = set()
+        for v, indexes in self.history:
+            if v <= version:
+                continue
+            if indexes is None:
+                return {"version": self.version, "rows": self.rows}
+            changed |= indexes
+        return {"version": self.version, "patch": {i: self.rows[i] for i in sorted(changed)}}
+
+
+def header_row(snapshot):
+    my_lineup, opp_lineup, win_prob = snapshot.my_lineup, snapshot.opp_lineup, snapshot.win_prob
+    row = {"my_team": my_lineup.team_name, "my_user": my_lineup.username, "my_points": round(my_lineup.total_points, 2),
+           "opp_team": opp_lineup.team_name, "opp_user": opp_lineup.username,
+           "opp_points": round(opp_lineup.total_points, 2)}
+    if win_prob is not None:
+        row.update(win_prob=round(win_prob.win_prob, 3), my_projection=round(win_prob.my_projection, 1),
+                   opp_projection=round(win_prob.opp_projection, 1))
+    return row
+
+
+def lineup_rows(lineup, other_lineup):
+    """
+    One row per starter, colored against the player across from them (same pairing as LineupRows).
+    """
+    pairs = list(zip(lineup.player_list, other_lineup.player_list))
+    colors = diff_colors([p.player_points for p, _ in pairs], [op.player_points for _, op in pairs])
+    return [{"player_id": p.player_id, "name": f"{p.first_name} {p.last_name}", "team": p.team,
+             "position": p.position, "points": round(p.player_points, 2), "color": color}
+            for (p, _), color in zip(pairs, colors)]
+
+
+def slate_rows(games, bet_strings):
+    return [{"away_team": g["away_team"], "home_team": g["home_team"], "away_score": int(g["away_score"]),
+             "home_score": int(g["home_score"]), "status": status_text(g),
+             "bet": bet_strings.get(game_key(g), "---")}
+            for g in games]
+
+
+class DataService:
+    """
+    The shared state for one league/user/week. Every viewer's update goes through changes_since(), bets go
+    through place_bet()/clear_bets(). Safe to use from every request thread at once.
+    """
+    def __init__(self, league_id, username, week):
+        self.league_id = league_id
+        self.username = username
+        self.week = week
+        self.components = {name: Component() for name in COMPONENTS}
+        self._seen = (None, None)    # (snapshot version, bets) the components were built from
+        self._grader = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Rebuilds the components if there's a newer snapshot or the bets changed. Cheap when neither did, which
+        is almost every call: the ledger's bets dict is the same object until someone bets.
+        """
+        snapshot = get_snapshot(self.league_id, self.username, self.week)
+        bets = get_ledger().bets(self.week)
+        with self._lock:
+            if self._seen[0] == snapshot.version and self._seen[1] is bets:
+                return
+            # imported here so the service (and app.py) start without pandas, like the streamlit dashboard
+            from bet_grading import BetGrader, describe_bets
+            if self._grader is None:
+                self._grader = BetGrader()
+            graded = self._grader.update(snapshot.games, bets)
+            bet_strings = describe_bets(self.week, snapshot.games, bets, graded, get_line_history())
+
+            self.components["header"].publish([header_row(snapshot)])
+            self.components["my_lineup"].publish(lineup_rows(snapshot.my_lineup, snapshot.opp_lineup))
+            self.components["opp_lineup"].publish(lineup_rows(snapshot.opp_lineup, snapshot.my_lineup))
+            self.components["slate"].publish(slate_rows(snapshot.games, bet_strings))
+            self._seen = (snapshot.version, bets)
+
+    def changes_since(self, versions):
+        """
+        Returns {component: update} for every component that's newer than versions ({component: version},
+        missing components count as never seen). See Component.since() for what an update looks like.
+        """
+        self.refresh()
+        with self._lock:
+            updates = {name: component.since(versions.get(name)) for name, component in self.components.items()}
+        return {name: update for name, update in updates.items() if update is not None}
+
+    def teams(self):
+        """
+        Every team on the slate as it was last published, for the bet form. Empty until the first poll is in.
+        """
+        with self._lock:
+            return sorted(team for row in self.components["slate"].rows for team in (row["away_team"], row["home_team"]))
+
+    def place_bet(self, team, spread):
+        """
+        Records a bet (rounded to the nearest half point). Every viewer gets the slate change on their next update.
+        """
+        spread = round(float(spread) * 2) / 2.0
+        get_ledger().place(self.week, team, spread)
+        self.refresh()
+        return spread
+
+    def clear_bets(self):
+        get_ledger().clear(self.week)
+        self.refresh()
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_service(league_id, username, week):
+    """
+    Returns the process-wide DataService for this league/user/week.
+    """
+    key = (league_id, username, week)
+    with _services_lock:
+        if key not in _services:
+            _services[key] = DataService(league_id, username, week)
+        return _services[key]
@@ -2,44 +2,70 @@
 This houses all of the code to pull the live nfl game data from espn
 Technically this is unofficial... if we were to commericalize I think we'd have to use something else
 """
-import requests
+import http_client
+from line_history import get_line_history
+from response_cache import get_cache
+from scoreboard import all_final, decode_scoreboard
+from tracing import traced
 
 def main():
     # games = pull_games(3)
     # print(games)
-    pull_lines()
+    for game in pull_lines():
+        print(game)
 
-def pull_games(week):
-    url = f"https://site.api.espn.com/apis/site/v2/sports/football/nfl/scoreboard?week={week}"
-    data = requests.get(url).json()
-    games = []
-    for e in data["events"]:
-        comp = e["competitions"][0]
-        home = comp["competitors"][0]
-        away = comp["competitors"][1]
-        games.append({
-            "home_team": home["team"]["abbreviation"],
-            "away_team": away["team"]["abbreviation"],
-            "home_score": int(home["score"]),
-            "away_score": int(away["score"]),
-            "status": comp["status"]["type"]["description"],
-            "quarter": comp["status"]["period"],
-            "clock": comp["status"].get("displayClock", "")
-        })
+@traced()
+def pull_scoreboard(week=None, season=None):
+    """
+    Returns the week's scoreboard decoded into a tuple of GameRecords (see scoreboard.py). season (e.g. 2025)
+    pulls that season's regular season week instead of the current one, week=None is whatever ESPN calls
+    the current week (not cached, since we don't know which week that is).
+    """
+    url = "https://site.api.espn.com/apis/site/v2/sports/football/nfl/scoreboard"
+    if week is None:
+        return decode_scoreboard(http_client.get_json(url))
+    url += f"?week={week}"
+    if season is not None:
+        url += f"&dates={season}&seasontype=2"
+    # the finality check needs the decoded records anyway, so keep them instead of decoding a second time
+    decoded = []
+    def is_final(data):
+        decoded.append(decode_scoreboard(data))
+        return all_final(decoded[-1])
+    # weeks where every game is final are cached on disk for good, see response_cache.py
+    data = get_cache().fetch("scoreboard", None, week, lambda: http_client.get_json(url), is_final, season)
+    return decoded[-1] if decoded else decode_scoreboard(data)
+
+@traced()
+def pull_games(week, season=None):
+    """
+    Returns a list of games for the week (GameRecords, which read like the old game dicts). Lines are
+    recorded in the line history for the current season.
+    """
+    games = list(pull_scoreboard(week, season))
+    if season is None:
+        # the odds come in the same response, keep a history of them (only changed lines get written)
+        get_line_history().record(week, games)
     return games
 
-def pull_lines():
-    resp = requests.get("https://site.api.espn.com/apis/site/v2/sports/football/nfl/scoreboard")
-    data = resp.json()
+def parse_games(data):
+    """
+    Turns a raw scoreboard response into the games pull_games() returns.
+    """
+    return list(decode_scoreboard(data))
+
+def scoreboard_is_final(data):
+    """
+    True once every game on a scoreboard response is over, at which point it can't change anymore.
+    """
+    return all_final(decode_scoreboard(data))
 
-    for event in data["events"]:
-        print(event)
-        comp = event["competitions"][0]
-        if "odds" in comp:
-            odds = comp["odds"][0]
-            home = comp["competitors"][0]["team"]["abbreviation"]
-            away = comp["competitors"][1]["team"]["abbreviation"]
-            print(home, away, odds["details"])
+def pull_lines(week=None):
+    """
+    Returns [{"home_team", "away_team", "home_spread", "total", "home_ml", "away_ml"}, ...] for the week
+    (the current one if None). This reads the same decoded scoreboard as pull_games.
+    """
+    return [game.line() for game in pull_scoreboard(week)]
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
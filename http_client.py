@@ -0,0 +1,325 @@
+"""
+This houses the one HTTP client that every upstream call (Sleeper and ESPN) goes through.
+- Keeps a keep-alive session per host, so repeat calls reuse the same TCP+TLS connection.
+- Remembers ETag / Last-Modified for each url and revalidates with If-None-Match / If-Modified-Since, so an
+unchanged response comes back as a tiny 304 and we hand back the copy we already parsed.
+- Asks for gzip, has timeouts, and retries with backoff on connection errors and 5xx. A 429 isn't retried:
+it empties the host's bucket and we answer with the last response we have, if any.
+- Counts requests, 304s, errors and latency (avg, p50/p95, max) per endpoint (see stats()).
+- Goes through the scheduler (see scheduler.py): each host has a token bucket, a url whose host is out of
+tokens gets the last response we have for it, and identical requests in flight together share one fetch.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scheduler import MAX_WAIT, RateBudget, RateBudgetExhausted, SingleFlight
+from tracing import percentile
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (3.05, 15)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+# enough for a portfolio's worth of leagues fetching from Sleeper at once (see portfolio.py)
+DEFAULT_POOL_SIZE = 16
+# how many urls we keep the last parsed body (and its validators) for
+MAX_CACHED_RESPONSES = 256
+# latencies kept per endpoint for the percentiles in stats()
+LATENCY_SAMPLES = 512
+
+# per-thread override of the client's max_wait, see waiting()
+_patience = threading.local()
+
+
+class EndpointStats:
+    """
+    Running totals for one endpoint. Latencies are in seconds.
+    """
+    __slots__ = ("requests", "not_modified", "errors", "throttled", "merged", "total_time", "max_time", "samples")
+
+    def __init__(self):
+        self.requests = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.throttled = 0   # answered from the last response because the host was out of budget
+        self.merged = 0      # shared another caller's in-flight fetch
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+
+    def as_dict(self):
+        samples = sorted(self.samples)
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "merged": self.merged,
+            "avg_ms": 1000 * self.total_time / self.requests if self.requests else 0.0,
+            "p50_ms": 1000 * percentile(samples, 50),
+            "p95_ms": 1000 * percentile(samples, 95),
+            "max_ms": 1000 * self.max_time,
+        }
+
+
+class HttpClient:
+    """
+    Pooled, revalidating JSON client. One of these is shared by the whole process (see get_client()), it is
+    safe to use from multiple threads.
+
+    Parameters:
+        - timeout (float or tuple): Passed straight to requests, (connect, read) in seconds.
+        - retries (int): How many times to retry a failed GET (connection errors and 5xx).
+        - backoff (float): Backoff factor between retries, the waits go backoff * (1, 2, 4, ...).
+        - pool_size (int): Max keep-alive connections kept open per host.
+        - adapter (requests.adapters.BaseAdapter): Use this transport for every host instead of the pooled,
+        retrying HTTPAdapter, e.g. replay.ReplayAdapter to serve recorded fixtures.
+        - budget (scheduler.RateBudget): The per-host token buckets, scheduler.HOST_LIMITS by default.
+        - max_wait (float): Seconds a request waits for its host's next token before falling back.
+    """
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 pool_size=DEFAULT_POOL_SIZE, adapter=None, budget=None, max_wait=MAX_WAIT):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.adapter = adapter
+        self.budget = RateBudget() if budget is None else budget
+        self.max_wait = max_wait
+        self._flights = SingleFlight()
+        self._sessions = {}
+        self._cache = OrderedDict()   # url -> (etag, last_modified, parsed body)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def session(self, host):
+        """
+        Returns the keep-alive session for a host, making it the first time we see that host.
+        """
+        with self._lock:
+            sess = self._sessions.get(host)
+            if sess is None:
+                adapter = self.adapter
+                if adapter is None:
+                    retry = Retry(total=self.retries, backoff_factor=self.backoff,
+                                  status_forcelist=(500, 502, 503, 504), allowed_methods=("GET",),
+                                  # urllib3 would otherwise still retry a 429 (or 503) that has a Retry-After
+                                  respect_retry_after_header=False)
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+                sess = requests.Session()
+                sess.headers.update({"Accept-Encoding": "gzip, deflate", "Accept": "application/json"})
+                sess.mount(f"https://{host}", adapter)
+                sess.mount(f"http://{host}", adapter)
+                self._sessions[host] = sess
+            return sess
+
+    def get_json(self, url, params=None):
+        """
+        GETs url and returns the parsed JSON. If the server gave us an ETag or Last-Modified last time we
+        send it back, and on a 304 return the body we already have. Don't mutate what comes back, the
+        same object is handed to every caller until the upstream data changes.
+        If the url's host is out of budget it returns the body we already have, and raises
+        scheduler.RateBudgetExhausted if there isn't one.
+        """
+        if params:
+            url = requests.Request("GET", url, params=params).prepare().url
+        result, shared = self._flights.do(url, lambda: self._get_json(url))
+        if shared:
+            with self._lock:
+                self._stat_for_locked(endpoint_name(url)).merged += 1
+        return result
+
+    def _get_json(self, url):
+        headers = {}
+        with self._lock:
+            cached = self._cache.get(url)
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        host = urlsplit(url).netloc
+        if not self.budget.acquire(host, self._max_wait()):
+            stat = self._stat_for(endpoint_name(url))
+            with self._lock:
+                stat.throttled += 1
+            if cached is not None:
+                return cached[2]
+            raise RateBudgetExhausted(f"Out of request budget for {host}, nothing cached for {url}")
+
+        with self._timed(url) as stat:
+            try:
+                resp = self.session(host).get(url, headers=headers, timeout=self.timeout)
+            except requests.exceptions.RetryError:
+                # the retries ran out on 5xxs, stop spending on this host until its bucket refills
+                self.budget.drain(host)
+                raise
+            if resp.status_code == 429:
+                # not retried (those retries wouldn't take tokens), back off until the bucket refills instead
+                self.budget.drain(host)
+                if cached is not None:
+                    with self._lock:
+                        stat.throttled += 1
+                    return cached[2]
+            if resp.status_code == 304 and cached is not None:
+                with self._lock:
+                    stat.not_modified += 1
+                    self._cache.move_to_end(url)
+                return cached[2]
+            resp.raise_for_status()
+            data = resp.json()
+
+        # kept even without validators, it's what we fall back on when the host is out of budget
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        with self._lock:
+            self._cache[url] = (etag, last_modified, data)
+            self._cache.move_to_end(url)
+            while len(self._cache) > MAX_CACHED_RESPONSES:
+                self._cache.popitem(last=False)
+        return data
+
+    @contextmanager
+    def stream(self, url):
+        """
+        GETs url without reading the body, for big downloads. Use as a context manager and read the body
+        with resp.iter_content(). No revalidation here since we don't keep the body around.
+        """
+        host = urlsplit(url).netloc
+        if not self.budget.acquire(host, self._max_wait()):
+            raise RateBudgetExhausted(f"Out of request budget for {host}")
+        with self._timed(url):
+            resp = self.session(host).get(url, stream=True, timeout=self.timeout)
+            try:
+                resp.raise_for_status()
+            except Exception:
+                # nobody gets to read this one, give the connection back to the pool
+                resp.close()
+                raise
+        try:
+            yield resp
+        finally:
+            resp.close()
+
+    def _max_wait(self):
+        wait = getattr(_patience, "max_wait", None)
+        return self.max_wait if wait is None else wait
+
+    @contextmanager
+    def _timed(self, url):
+        stat = self._stat_for(endpoint_name(url))
+        start = time.perf_counter()
+        try:
+            yield stat
+        except Exception:
+            with self._lock:
+                stat.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stat.requests += 1
+                stat.total_time += elapsed
+                stat.max_time = max(stat.max_time, elapsed)
+                stat.samples.append(elapsed)
+
+    def _stat_for(self, endpoint):
+        with self._lock:
+            return self._stat_for_locked(endpoint)
+
+    def _stat_for_locked(self, endpoint):
+        stat = self._stats.get(endpoint)
+        if stat is None:
+            stat = self._stats[endpoint] = EndpointStats()
+        return stat
+
+    def stats(self):
+        """
+        Returns {endpoint: {"requests", "not_modified", "errors", "throttled", "merged", "avg_ms", "p50_ms",
+        "p95_ms", "max_ms"}}.
+        """
+        with self._lock:
+            return {endpoint: stat.as_dict() for endpoint, stat in self._stats.items()}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+    def close(self):
+        with self._lock:
+            for sess in self._sessions.values():
+                sess.close()
+            self._sessions.clear()
+
+
+def endpoint_name(url):
+    """
+    Groups urls by endpoint for the stats, e.g.
+    https://api.sleeper.app/v1/league/1180303931006689280/matchups/3 -> api.sleeper.app/v1/league/{id}/matchups/{id}
+    Query strings are dropped.
+    """
+    parts = urlsplit(url)
+    return parts.netloc + re.sub(r"/\d+(?=/|$)", "/{id}", parts.path)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the shared client, making it on first use.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def configure(**kwargs):
+    """
+    Replaces the shared client with one built from kwargs (see HttpClient). Mostly for pointing timeouts
+    and retries somewhere else, or starting with fresh stats.
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = HttpClient(**kwargs)
+        return _client
+
+
+@contextmanager
+def waiting(seconds):
+    """
+    Lets requests made on this thread inside the block wait up to seconds for their host's next token, instead
+    of the client's max_wait. For batch jobs like the backfill, which would rather go slow than fall back.
+    """
+    previous = getattr(_patience, "max_wait", None)
+    _patience.max_wait = seconds
+    try:
+        yield
+    finally:
+        _patience.max_wait = previous
+
+
+def get_json(url, params=None):
+    return get_client().get_json(url, params=params)
+
+
+def stream(url):
+    return get_client().stream(url)
+
+
+def stats():
+    return get_client().stats()
@@ -0,0 +1,142 @@
+"""
+This houses the line history: every time the scoreboard is pulled, each game's odds (home spread, total and
+both moneylines, see scoreboard.py) are appended to a SQLite table with a timestamp, but only when they
+differ from the last line stored for that game, so polling a game whose line hasn't moved writes nothing.
+The lines for each game are also kept in memory (oldest first), so "what's the line now" and "how far has it
+moved since the bet was placed" are a dict lookup and a bisect, cheap enough to ask for every game on every render.
+"""
+import bisect
+import os
+import sqlite3
+import threading
+import time
+
+from response_cache import current_season
+
+LINE_FIELDS = ("home_spread", "total", "home_ml", "away_ml")
+
+
+class LineHistory:
+    """
+    Parameters:
+        - db_file (str): Where the history lives. Made (with its folder) if it doesn't exist.
+    """
+    def __init__(self, db_file='bets/lines.db'):
+        self.db_file = db_file
+        if os.path.dirname(db_file):
+            os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS lines (
+                season INTEGER NOT NULL,
+                week INTEGER NOT NULL,
+                home_team TEXT NOT NULL,
+                away_team TEXT NOT NULL,
+                recorded_at REAL NOT NULL,
+                home_spread REAL,
+                total REAL,
+                home_ml INTEGER,
+                away_ml INTEGER
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS lines_game ON lines (season, week, home_team, away_team, recorded_at)")
+        self._lock = threading.Lock()
+        self._weeks = {}   # (season, week) -> {(home_team, away_team): ([recorded_at, ...], [line tuple, ...])}
+
+    def _load_week(self, season, week):
+        """
+        The in-memory history for one week, read from the database the first time it's asked for. Call with the lock held.
+        """
+        key = (season, week)
+        games = self._weeks.get(key)
+        if games is None:
+            games = self._weeks[key] = {}
+            rows = self._conn.execute("""
+                SELECT home_team, away_team, recorded_at, home_spread, total, home_ml, away_ml FROM lines
+                WHERE season = ? AND week = ? ORDER BY recorded_at""", key).fetchall()
+            for home_team, away_team, recorded_at, *line in rows:
+                times, lines = games.setdefault((home_team, away_team), ([], []))
+                times.append(recorded_at)
+                lines.append(tuple(line))
+        return games
+
+    def record(self, week, games, season=None, recorded_at=None):
+        """
+        Appends the line of every game in games (dicts from pull_games()) that changed since it was last recorded.
+        Games with no odds at all are skipped. Returns how many lines were written.
+        """
+        season = season or current_season()
+        recorded_at = time.time() if recorded_at is None else recorded_at
+        with self._lock:
+            history = self._load_week(season, week)
+            new_rows = []
+            for game in games:
+                line = tuple(game.get(field) for field in LINE_FIELDS)
+                if all(value is None for value in line):
+                    continue
+                times, lines = history.setdefault((game["home_team"], game["away_team"]), ([], []))
+                if lines and lines[-1] == line:
+                    continue
+                times.append(recorded_at)
+                lines.append(line)
+                new_rows.append((season, week, game["home_team"], game["away_team"], recorded_at) + line)
+            if new_rows:
+                self._conn.executemany("INSERT INTO lines VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", new_rows)
+            return len(new_rows)
+
+    def line_at(self, week, home_team, away_team, at=None, season=None):
+        """
+        Returns the line that was current at time at (a unix timestamp, now if None) as a dict of LINE_FIELDS
+        plus recorded_at, or None if nothing had been recorded for the game by then.
+        """
+        with self._lock:
+            entry = self._load_week(season or current_season(), week).get((home_team, away_team))
+            if not entry:
+                return None
+            times, lines = entry
+            i = len(times) if at is None else bisect.bisect_right(times, at)
+            if i == 0:
+                return None
+            return dict(zip(LINE_FIELDS, lines[i - 1]), recorded_at=times[i - 1])
+
+    def current_line(self, week, home_team, away_team, season=None):
+        return self.line_at(week, home_team, away_team, None, season)
+
+    def spread_movement(self, week, team, home_team, away_team, since, season=None):
+        """
+        team's spread (from their side) at time since (e.g. the bet's placed_at) and now, as (then, now).
+        Either can be None. now - then is the movement: positive means team's number got more generous
+        (e.g. -3 -> -1.5 is +1.5), so a bet already placed on them is now worse than what's on offer.
+        """
+        sign = 1 if team == home_team else -1
+        then = self.line_at(week, home_team, away_team, since, season)
+        now = self.current_line(week, home_team, away_team, season)
+        then_spread = None if then is None or then["home_spread"] is None else sign * then["home_spread"]
+        now_spread = None if now is None or now["home_spread"] is None else sign * now["home_spread"]
+        return then_spread, now_spread
+
+    def history(self, week, home_team, away_team, season=None):
+        """
+        Every recorded line for a game, oldest first, as a list of dicts (same shape as line_at).
+        """
+        with self._lock:
+            entry = self._load_week(season or current_season(), week).get((home_team, away_team))
+            if not entry:
+                return []
+            return [dict(zip(LINE_FIELDS, line), recorded_at=t) for t, line in zip(*entry)]
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_line_history(db_file='bets/lines.db'):
+    """
+    Returns the process-wide line history, opening it on first use.
+    """
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = LineHistory(db_file)
+        return _history
@@ -0,0 +1,270 @@
+"""
+This houses LineupBatch, a struct-of-arrays for holding a lot of lineups at once (a whole league's week, or a
+season of player-weeks from the backfill). Instead of one Player object per row, every column is one NumPy
+array: points as floats, position/team/injury status as small integer codes into a per-batch table of names,
+and which lineup each row belongs to. Totals, ordering and diffs then run once over the whole batch instead of
+lineup by lineup in Python, and Lineup/Player objects are only built for the lineups actually being shown.
+"""
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from lineup_order import NON_STARTER_SLOTS, SLOT_ELIGIBILITY, SLOT_TEMPLATES
+from sleeper_pull import Lineup, Player
+
+_EMPTY_POSITION = "None"
+# player rows for ids missing from players_data (same placeholders as build_players) and for no players_data at all
+_MISSING = {"first_name": "---", "last_name": "---", "number": 0, "injury_status": "None"}
+_UNKNOWN = {"first_name": None, "last_name": None, "number": None, "injury_status": None}
+
+
+def _encode(values):
+    """
+    (codes, names) for a column of strings/None: names[codes[i]] == values[i]. Codes are int16.
+    """
+    table = {}
+    codes = np.fromiter((table.setdefault(v, len(table)) for v in values), dtype=np.int16, count=len(values))
+    names = np.empty(len(table), dtype=object)
+    names[:] = list(table)
+    return codes, names
+
+
+class LineupBatch:
+    """
+    Many lineups, one row per starter, in lineup order (every lineup's rows are contiguous).
+
+    Columns (all the same length):
+        - lineup (int32): Which lineup the row belongs to (index into usernames/team_names).
+        - points (float64): player_points.
+        - position / team / injury (int16): Codes into position_names / team_names_table / injury_names.
+        - player_id, first_name, last_name, number (object): Passed through as-is, only needed to build views.
+    keys holds what each lineup is known by outside the batch (e.g. its roster_id), in lineup order.
+    """
+    def __init__(self, lineup, points, position, team, injury, player_id, first_name, last_name, number,
+                 position_names, team_names_table, injury_names, usernames, team_names, keys=None):
+        self.lineup = lineup
+        self.points = points
+        self.position = position
+        self.team = team
+        self.injury = injury
+        self.player_id = player_id
+        self.first_name = first_name
+        self.last_name = last_name
+        self.number = number
+        self.position_names = position_names
+        self.team_names_table = team_names_table
+        self.injury_names = injury_names
+        self.usernames = usernames
+        self.team_names = team_names
+        self.keys = list(range(len(team_names))) if keys is None else keys
+        self._orders = {}   # template -> (row order, each lineup's first position in it), see _rows_by_lineup
+
+    @classmethod
+    def from_lineups(cls, lineups):
+        """
+        Packs a list of Lineup objects into one batch.
+        """
+        players = [p for lineup in lineups for p in lineup.player_list]
+        lineup = np.repeat(np.arange(len(lineups), dtype=np.int32), [len(l.player_list) for l in lineups])
+        return cls._build(lineup, [p.player_points for p in players], [p.position for p in players],
+                          [p.team for p in players], [p.injury_status for p in players],
+                          [p.player_id for p in players], [p.first_name for p in players],
+                          [p.last_name for p in players], [p.number for p in players],
+                          [l.username for l in lineups], [l.team_name for l in lineups])
+
+    @classmethod
+    def from_frame(cls, players, players_data=None, by=("roster_id",), names=None):
+        """
+        Builds a batch from a players table (LeagueWeek.players, or backfill.load_table("players") with
+        by=("week", "roster_id") for a whole season). Every distinct by-key becomes one lineup, in key order.
+        names maps a by-key to its (username, team_name); without it usernames are left empty and team_names
+        holds the by-key. Player names come from players_data (the player store or a dict) if it's given,
+        players missing from it get the same placeholders build_players() uses.
+        """
+        players = players.sort_values(list(by) + (["slot"] if "slot" in players else []), kind="stable")
+        keys = players[list(by)]
+        lineup_codes, uniques = pd.MultiIndex.from_frame(keys).factorize()
+        ids = players["player_id"].to_numpy(dtype=object)
+        if players_data is not None:
+            meta = players_data.get_many(ids) if hasattr(players_data, "get_many") else players_data
+            rows = [meta.get(pid) or _MISSING for pid in ids]
+        else:
+            rows = [_UNKNOWN] * len(ids)
+        first_name = [r["first_name"] for r in rows]
+        last_name = [r["last_name"] for r in rows]
+        number = [r["number"] for r in rows]
+        injury = [r["injury_status"] for r in rows]
+        positions = [pos if r is not _MISSING else _EMPTY_POSITION for pos, r in zip(players["position"].tolist(), rows)]
+        teams = [team if r is not _MISSING else "--" for team, r in zip(players["team"].tolist(), rows)]
+        keys = [key[0] for key in uniques] if len(by) == 1 else list(uniques)
+        if names is None:
+            usernames, team_names = [None] * len(keys), keys
+        else:
+            usernames = [names.get(key, (None, key))[0] for key in keys]
+            team_names = [names.get(key, (None, key))[1] for key in keys]
+        return cls._build(lineup_codes.astype(np.int32), players["points"].to_numpy(dtype=float),
+                          positions, teams, injury, ids, first_name, last_name, number, usernames, team_names, keys)
+
+    @classmethod
+    def _build(cls, lineup, points, positions, teams, injuries, player_id, first_name, last_name, number,
+               usernames, team_names, keys=None):
+        position, position_names = _encode(positions)
+        team, team_names_table = _encode(teams)
+        injury, injury_names = _encode(injuries)
+        return cls(np.asarray(lineup, dtype=np.int32), np.asarray(points, dtype=np.float64), position, team, injury,
+                   np.asarray(player_id, dtype=object), np.asarray(first_name, dtype=object),
+                   np.asarray(last_name, dtype=object), np.asarray(number, dtype=object),
+                   position_names, team_names_table, injury_names, list(usernames), list(team_names), keys)
+
+    def __len__(self):
+        return len(self.points)
+
+    @property
+    def n_lineups(self):
+        return len(self.team_names)
+
+    def nbytes(self):
+        """
+        Bytes held by the numeric columns plus the object columns' pointers (not the strings they share).
+        """
+        return sum(a.nbytes for a in (self.lineup, self.points, self.position, self.team, self.injury,
+                                      self.player_id, self.first_name, self.last_name, self.number))
+
+    def totals(self):
+        """
+        Every lineup's total points, as a (n_lineups,) array (same as each Lineup's calc_total_points).
+        """
+        return np.bincount(self.lineup, weights=self.points, minlength=self.n_lineups)
+
+    def order(self, template="standard"):
+        """
+        Returns the row order (an index array) that puts every lineup in the same order order_players()
+        would, for all lineups at once. Each slot of the template is one vectorized pass over the batch.
+        """
+        slots = SLOT_TEMPLATES[template] if isinstance(template, str) else template
+        slots = [slot for slot in slots if slot not in NON_STARTER_SLOTS]
+        n = len(self)
+        rows = np.arange(n)
+        code_of = {name: code for code, name in enumerate(self.position_names)}
+        empty = self.position == code_of.get(_EMPTY_POSITION, -1)
+
+        # rank of each player within their (lineup, position) group: highest points first, ties in list order
+        by_group = np.lexsort((rows, -self.points, self.position, self.lineup))
+        group_start = np.ones(n, dtype=bool)
+        group_start[1:] = (self.lineup[by_group][1:] != self.lineup[by_group][:-1]) | \
+                          (self.position[by_group][1:] != self.position[by_group][:-1])
+        starts = np.flatnonzero(group_start)
+        group_rank = np.empty(n, dtype=np.int64)
+        group_rank[by_group] = np.arange(n) - np.repeat(starts, np.diff(np.append(starts, n)))
+
+        # fill the slots in template order, each one with the best unslotted eligible player in every lineup
+        slot_of = np.full(n, -1, dtype=np.int64)
+        for slot_index, slot in enumerate(slots):
+            eligible = [code_of[pos] for pos in SLOT_ELIGIBILITY.get(slot, (slot,)) if pos in code_of]
+            if not eligible:
+                continue
+            elig_rank = np.full(len(self.position_names), len(eligible), dtype=np.int64)
+            elig_rank[eligible] = np.arange(len(eligible))
+            candidates = np.flatnonzero((elig_rank[self.position] < len(eligible)) & (slot_of < 0) & ~empty)
+            if len(candidates) == 0:
+                continue
+            # best points, then the position listed first for the slot, then the group's own order
+            pick = candidates[np.lexsort((group_rank[candidates], elig_rank[self.position[candidates]],
+                                          -self.points[candidates], self.lineup[candidates]))]
+            first = np.ones(len(pick), dtype=bool)
+            first[1:] = self.lineup[pick][1:] != self.lineup[pick][:-1]
+            slot_of[pick[first]] = slot_index
+
+        # leftovers by points; ties go template positions first, then other positions by first appearance
+        template_positions = list(dict.fromkeys(pos for slot in slots for pos in SLOT_ELIGIBILITY.get(slot, (slot,))))
+        pos_order = np.full(n, len(template_positions), dtype=np.int64)
+        for i, pos in enumerate(template_positions):
+            if pos in code_of:
+                pos_order[self.position == code_of[pos]] = i
+        other = pos_order == len(template_positions)
+        if other.any():
+            first_seen = np.full((self.n_lineups, len(self.position_names)), n, dtype=np.int64)
+            np.minimum.at(first_seen, (self.lineup[other], self.position[other]), rows[other])
+            pos_order[other] += first_seen[self.lineup[other], self.position[other]]
+
+        category = np.where(slot_of >= 0, 0, np.where(empty, 2, 1))
+        leftover = category == 1
+        return np.lexsort((
+            rows,                                               # empties keep their order
+            np.where(leftover, group_rank, 0),
+            np.where(leftover, pos_order, 0),
+            np.where(leftover, -self.points, 0),
+            np.where(category == 0, slot_of, 0),
+            category,
+            self.lineup,
+        ))
+
+    def changed(self, previous):
+        """
+        Boolean mask of rows whose points or injury status differ from the same (lineup, player_id) row in
+        previous (rows that weren't there before count as changed). The batch version of diff_players.
+        """
+        if len(previous) == len(self) and np.array_equal(previous.lineup, self.lineup) and \
+                np.array_equal(previous.player_id, self.player_id):
+            # same rows in the same places (the usual poll-to-poll case), compare straight across
+            return (self.points != previous.points) | \
+                   (self.injury_names[self.injury] != previous.injury_names[previous.injury])
+        index = pd.MultiIndex.from_arrays([previous.lineup, previous.player_id])
+        where = index.get_indexer(pd.MultiIndex.from_arrays([self.lineup, self.player_id]))
+        found = where >= 0
+        changed = ~found
+        prev_rows = where[found]
+        changed[found] = (self.points[found] != previous.points[prev_rows]) | \
+                         (self.injury_names[self.injury[found]] != previous.injury_names[previous.injury[prev_rows]])
+        return changed
+
+    def _rows_by_lineup(self, template):
+        # order() (or the rows as they are, grouped by lineup) and where each lineup starts in it, worked out
+        # once per template so looking up every lineup of a league doesn't reorder the batch each time
+        key = tuple(template) if isinstance(template, list) else template
+        cached = self._orders.get(key)
+        if cached is None:
+            order = np.argsort(self.lineup, kind="stable") if template is None else self.order(template)
+            starts = np.searchsorted(self.lineup[order], np.arange(self.n_lineups + 1))
+            cached = self._orders[key] = (order, starts)
+        return cached
+
+    def lineup_view(self, i, template=None):
+        """
+        Lineup i as a regular Lineup of Player objects (ordered by template if one is given), for the
+        UI code that expects them. The Players are copies, built from the arrays on every call (LineupViews
+        keeps them). The batch is only ordered once per template, each view after that just slices it.
+        """
+        order, starts = self._rows_by_lineup(template)
+        rows = order[starts[i]:starts[i + 1]]
+        players = [Player(self.first_name[r], self.last_name[r], self.position_names[self.position[r]],
+                          self.injury_names[self.injury[r]], float(self.points[r]), self.team_names_table[self.team[r]],
+                          self.number[r], self.player_id[r])
+                   for r in rows]
+        return Lineup(players, self.usernames[i], self.team_names[i])
+
+
+class LineupViews(Mapping):
+    """
+    A read-only dict of key -> Lineup over a batch (e.g. roster_id -> Lineup for LeagueWeek.lineups). Each
+    Lineup is only built (with lineup_view) the first time it's looked up, so a league or season that's only
+    looked at in aggregate never makes any Player objects.
+    """
+    def __init__(self, batch, template=None):
+        self.batch = batch
+        self.template = template
+        self._index = {key: i for i, key in enumerate(batch.keys)}
+        self._built = {}
+
+    def __getitem__(self, key):
+        lineup = self._built.get(key)
+        if lineup is None:
+            lineup = self._built[key] = self.batch.lineup_view(self._index[key], self.template)
+        return lineup
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
@@ -0,0 +1,78 @@
+"""
+This houses the ordering of a lineup's starters for display: the best player at each roster slot first, then
+whoever's left over sorted by points, then empty slots. The slots come from a template, so leagues that aren't
+plain QB/RB/RB/WR/WR/TE/FLEX (superflex, 2TE, IDP, K/DEF...) get ordered the way their roster actually looks.
+Slot names match the ones in Sleeper's league "roster_positions", so a league's own list can be passed in too.
+"""
+
+# which positions can fill each flex-type slot; any other slot name just takes its own position
+SLOT_ELIGIBILITY = {
+    "FLEX": ("RB", "WR", "TE"),
+    "WRRB_FLEX": ("RB", "WR"),
+    "REC_FLEX": ("WR", "TE"),
+    "SUPER_FLEX": ("QB", "RB", "WR", "TE"),
+    "IDP_FLEX": ("DL", "LB", "DB"),
+}
+
+SLOT_TEMPLATES = {
+    # the original ordering: QB, 2 RB, 2 WR, TE, then everyone else by points
+    "standard": ("QB", "RB", "RB", "WR", "WR", "TE"),
+    "superflex": ("QB", "RB", "RB", "WR", "WR", "TE", "FLEX", "SUPER_FLEX"),
+    "2te": ("QB", "RB", "RB", "WR", "WR", "TE", "TE", "FLEX"),
+    "k_def": ("QB", "RB", "RB", "WR", "WR", "TE", "FLEX", "K", "DEF"),
+    "idp": ("QB", "RB", "RB", "WR", "WR", "TE", "FLEX", "K", "DEF", "DL", "LB", "DB", "IDP_FLEX"),
+}
+
+# slots in sleeper's roster_positions that aren't starters
+NON_STARTER_SLOTS = ("BN", "IR", "TAXI")
+
+
+def _points(player):
+    return player.player_points
+
+
+def order_players(players, template="standard"):
+    """
+    Returns a new list with players ordered by slot template (see SLOT_TEMPLATES), then by points.
+
+    Parameters:
+        - players (list): Player objects.
+        - template (str or tuple): A key of SLOT_TEMPLATES, or a sequence of slot names such as a league's
+        roster_positions (bench/IR slots are ignored).
+
+    Players are grouped by position in one pass and each group is sorted once (stable, highest points
+    first). Each slot then takes the best remaining eligible player, everyone not placed in a slot follows
+    by points, and empty/unknown ("None") players go last in the order they came in.
+    """
+    slots = SLOT_TEMPLATES[template] if isinstance(template, str) else template
+
+    groups = {}
+    for player in players:
+        groups.setdefault(player.position, []).append(player)
+    empty = groups.pop("None", [])
+    for group in groups.values():
+        group.sort(key=_points, reverse=True)
+    taken = dict.fromkeys(groups, 0)   # position -> how many of its group are already slotted
+
+    ordered = []
+    for slot in slots:
+        if slot in NON_STARTER_SLOTS:
+            continue
+        best_pos = None
+        for pos in SLOT_ELIGIBILITY.get(slot, (slot,)):
+            group = groups.get(pos)
+            if group is None or taken[pos] >= len(group):
+                continue
+            if best_pos is None or group[taken[pos]].player_points > groups[best_pos][taken[best_pos]].player_points:
+                best_pos = pos
+        if best_pos is not None:
+            ordered.append(groups[best_pos][taken[best_pos]])
+            taken[best_pos] += 1
+
+    # leftovers in template position order first (then anything else) so ties keep a sensible order
+    position_order = list(dict.fromkeys(pos for slot in slots for pos in SLOT_ELIGIBILITY.get(slot, (slot,))))
+    position_order += [pos for pos in groups if pos not in position_order]
+    leftovers = [p for pos in position_order if pos in groups for p in groups[pos][taken[pos]:]]
+    leftovers.sort(key=_points, reverse=True)
+
+    return ordered + leftovers + empty
@@ -0,0 +1,199 @@
+"""
+This houses the background poller that keeps the scoreboard and lineups up to date. Instead of every
+Streamlit rerun (in every open tab) hitting ESPN and Sleeper itself, one thread per process and week does the
+fetching on its own schedule and publishes immutable snapshots. The UI only ever reads the latest snapshot,
+so upstream requests per minute stay the same no matter how many sessions are connected or how often they rerun.
+"""
+import threading
+import time
+
+import http_client
+from data_loader import load_render_data
+from play_by_play import PlayByPlay
+from portfolio import load_portfolio
+from projection import win_probability
+from scheduler import IDLE_INTERVAL, LIVE_INTERVAL, RateBudgetExhausted, poll_interval
+from tracing import span
+
+# seconds between polls while any game is in progress, and otherwise (see scheduler.poll_interval for the rest)
+FAST_INTERVAL = LIVE_INTERVAL
+SLOW_INTERVAL = IDLE_INTERVAL
+# stop polling a week nobody has looked at for this long (seconds)
+IDLE_TIMEOUT = 600
+
+
+class NoSnapshotYet(Exception):
+    """
+    Raised when a week hasn't had a successful poll yet (e.g. upstream is down). The first poll's error is
+    the __cause__, the poller keeps retrying.
+    """
+
+
+class Snapshot:
+    """
+    One immutable poll result. games is a tuple of read-only GameRecords, the lineups are already ordered.
+    version goes up by one with every successful poll.
+    win_prob is the WinProbability for my_lineup vs opp_lineup at this point (see projection.py).
+    stat_lines is player_id -> stat line from the play-by-play (see play_by_play.py) for my starters in
+    games that are on or have finished since polling started.
+    """
+    __slots__ = ("games", "my_lineup", "opp_lineup", "fetched_at", "version", "timing_report",
+                 "win_prob", "stat_lines")
+
+    def __init__(self, games, my_lineup, opp_lineup, fetched_at, version, timing_report, win_prob=None,
+                 stat_lines=None):
+        for name, value in (("games", games), ("my_lineup", my_lineup), ("opp_lineup", opp_lineup),
+                            ("fetched_at", fetched_at), ("version", version), ("timing_report", timing_report),
+                            ("win_prob", win_prob), ("stat_lines", stat_lines or {})):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Snapshots are read-only")
+
+    def any_in_progress(self):
+        return any(game["state"] == "in" for game in self.games)
+
+
+class Poller(threading.Thread):
+    """
+    Polls one league/user/week until nobody has asked for it in IDLE_TIMEOUT seconds.
+    """
+    def __init__(self, league_id, username, week):
+        super().__init__(name=f"poller-{league_id}-wk{week}", daemon=True)
+        self.league_id = league_id
+        self.username = username
+        self.week = week
+        self._snapshot = None
+        self._error = None
+        self._failures = 0   # polls in a row that failed, for the backoff
+        self._play_by_play = PlayByPlay()   # per-game cursors, so each poll only reads the new plays
+        self._ready = threading.Event()
+        self._stopping = threading.Event()
+        self._last_read = time.monotonic()
+
+    def run(self):
+        while not self._stopping.is_set():
+            self.poll()
+            if time.monotonic() - self._last_read > IDLE_TIMEOUT:
+                break
+            self._stopping.wait(self.interval())
+
+    def poll(self):
+        with span("poll"):
+            self._poll()
+
+    def _poll(self):
+        try:
+            data = load_render_data(self.league_id, self.username, self.week)
+        except Exception as e:
+            # keep serving the last good snapshot, only the very first poll's error is surfaced to readers
+            self._failed(e)
+            return
+        data.my_lineup.order_list()
+        data.opp_lineup.order_list()
+        previous = self._snapshot
+        version = previous.version + 1 if previous else 1
+        games = tuple(data.games)
+        # cached on the game state, so a poll where nothing moved doesn't rerun the simulation
+        win_prob = win_probability(data.my_lineup, data.opp_lineup, games)
+        stat_lines = self._play_by_play.update(games, data.my_lineup.player_list)
+        # GameRecords are already read-only (see scoreboard.py)
+        self._snapshot = Snapshot(games, data.my_lineup, data.opp_lineup, time.time(), version, data.timing_report(),
+                                  win_prob, stat_lines)
+        self._error = None
+        self._failures = 0
+        self._ready.set()
+
+    def _failed(self, e):
+        if isinstance(e, RateBudgetExhausted):
+            print(f"Poll for week {self.week} skipped, out of request budget: {e}")
+        else:
+            print(f"Poll failed for week {self.week}: {e}")
+        self._error = e
+        self._failures += 1
+        self._ready.set()
+
+    def interval(self):
+        """
+        Seconds until the next poll, see scheduler.poll_interval: fast while games are on, slow before and
+        after, backing off when polls fail or the request budget runs low.
+        """
+        snapshot = self._snapshot
+        return poll_interval(None if snapshot is None else snapshot.games, self._failures,
+                             http_client.get_client().budget.level())
+
+    def latest(self):
+        """
+        Returns the newest snapshot, waiting for the first poll if it hasn't finished yet. Raises NoSnapshotYet
+        if that poll failed.
+        """
+        self._last_read = time.monotonic()
+        self._ready.wait()
+        if self._snapshot is None:
+            raise NoSnapshotYet(f"No data for week {self.week} yet: {self._error}") from self._error
+        return self._snapshot
+
+    def stop(self):
+        self._stopping.set()
+
+
+class PortfolioPoller(Poller):
+    """
+    Polls every league in a portfolio together (see portfolio.py). The published snapshot is the Portfolio
+    itself, nothing in it gets mutated after it's built.
+    """
+    def __init__(self, league_ids, username, week):
+        super().__init__(league_ids, username, week)
+        self.name = f"portfolio-{len(league_ids)}-wk{week}"
+        self.league_ids = league_ids
+
+    def _poll(self):
+        try:
+            portfolio = load_portfolio(self.league_ids, self.username, self.week)
+        except Exception as e:
+            self._failed(e)
+            return
+        for my_lineup, opp_lineup in portfolio.matchups.values():
+            my_lineup.order_list()
+            opp_lineup.order_list()
+        self._snapshot = portfolio
+        self._error = None
+        self._failures = 0
+        self._ready.set()
+
+
+_pollers = {}
+_pollers_lock = threading.Lock()
+
+
+def get_poller(league_id, username, week):
+    """
+    Returns the process-wide poller for this league/user/week, starting one if there isn't one running.
+    """
+    key = (league_id, username, week)
+    with _pollers_lock:
+        poller = _pollers.get(key)
+        if poller is None or not poller.is_alive():
+            poller = _pollers[key] = Poller(league_id, username, week)
+            poller.start()
+        return poller
+
+
+def get_portfolio(league_ids, username, week):
+    """
+    Returns the latest Portfolio for these leagues and week, from a poller shared like get_poller()'s.
+    """
+    key = ("portfolio", tuple(league_ids), username, week)
+    with _pollers_lock:
+        poller = _pollers.get(key)
+        if poller is None or not poller.is_alive():
+            poller = _pollers[key] = PortfolioPoller(tuple(league_ids), username, week)
+            poller.start()
+    return poller.latest()
+
+
+def get_snapshot(league_id, username, week):
+    """
+    Returns the latest snapshot for the week. Only the first call for a week waits on the network.
+    """
+    return get_poller(league_id, username, week).latest()
@@ -0,0 +1,282 @@
+"""
+This houses the play-by-play ingestion, for seeing why a starter's points moved and not just that they did.
+For every game in progress that has one of the lineups' starters in it (joined on Player.team), the ESPN
+per-game summary is fetched (all of those games at once), and only the plays after that game's cursor (the
+last sequenceNumber we processed) get parsed into rolling per-player stat lines kept in memory.
+ESPN's site API doesn't tag plays with athlete ids, so players are matched on the "F.Last" short names the
+play text uses. The summary lists plays oldest first inside drives, so the new plays are found by walking back
+from the end until we hit the cursor. Work per poll then scales with the number of new plays, not how long
+the game has been going (the response itself still has to be downloaded and parsed, though a game with no
+new plays comes back as a 304).
+"""
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+from scoreboard import TEAM_ALIASES
+from tracing import traced
+
+SUMMARY_URL = "https://site.api.espn.com/apis/site/v2/sports/football/nfl/summary"
+STAT_FIELDS = ("pass_att", "pass_cmp", "pass_yds", "pass_td", "interceptions", "rush_att", "rush_yds", "rush_td",
+               "receptions", "rec_yds", "rec_td", "fumbles", "fg_made", "fg_missed", "xp_made")
+# plays kept per player for the "why" (newest last)
+RECENT_PLAYS = 5
+MAX_WORKERS = 8
+
+# ESPN's play text names players like "P.Mahomes", "A.St. Brown" or "K.Walker III"
+NAME = r"\b[A-Z][A-Za-z]{0,2}\.[A-Z][\w'\-]*(?:\.\s?[A-Z][\w'\-]+)?(?: (?:Jr\.|Sr\.|II|III|IV))?"
+# formation and timing notes before the play itself, e.g. "(Shotgun) " or "(12:41 - 2nd) "
+_PREFIX = re.compile(r"^(?:\([^)]*\)\s*)+")
+_PASS = re.compile(rf"^(?P<passer>{NAME}) pass (?P<rest>.*)")
+_RECEIVER = re.compile(rf" to (?P<receiver>{NAME})")
+_LEADING_NAME = re.compile(rf"^(?P<name>{NAME}) ")
+_FUMBLE = re.compile(rf"(?P<name>{NAME}) FUMBLES")
+_EXTRA_POINT = re.compile(rf"(?P<name>{NAME}) extra point is GOOD")
+_SUFFIX = re.compile(r"\s+(?:Jr\.?|Sr\.?|II|III|IV|V)$")
+_PUNCTUATION = re.compile(r"[\s.'\-]")
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="play_by_play")
+
+
+def short_name(first_name, last_name):
+    """
+    The key a player is matched on: first initial and last name, lowercased with suffixes, punctuation and
+    spaces dropped, so Sleeper's "Amon-Ra" "St. Brown" and the play text's "A.St. Brown" both give "a.stbrown".
+    """
+    last = _SUFFIX.sub("", last_name or "")
+    return f"{(first_name or '')[:1]}.{_PUNCTUATION.sub('', last)}".lower()
+
+
+def _key(text_name):
+    first, _, last = text_name.partition(".")
+    return short_name(first, last)
+
+
+class StatLine:
+    """
+    One player's rolling stats for a game: a counter per STAT_FIELDS entry plus the last few plays they were
+    credited on, as (quarter, clock, text).
+    """
+    __slots__ = STAT_FIELDS + ("recent",)
+
+    def __init__(self):
+        for field in STAT_FIELDS:
+            setattr(self, field, 0)
+        self.recent = deque(maxlen=RECENT_PLAYS)
+
+    def as_dict(self):
+        """
+        A copy that later plays won't change, with only the stats that aren't 0, e.g. for a snapshot. Also has
+        the summary() text and the recent plays.
+        """
+        line = {field: getattr(self, field) for field in STAT_FIELDS if getattr(self, field)}
+        line["summary"] = self.summary()
+        line["recent"] = tuple(self.recent)
+        return line
+
+    def summary(self):
+        """
+        e.g. "18/27 231 pass yds 2 TD, 3 rush 12 yds".
+        """
+        parts = []
+        if self.pass_att:
+            parts.append(f"{self.pass_cmp}/{self.pass_att} {self.pass_yds} pass yds"
+                         + (f" {self.pass_td} TD" if self.pass_td else "") + (f" {self.interceptions} INT" if self.interceptions else ""))
+        if self.rush_att:
+            parts.append(f"{self.rush_att} rush {self.rush_yds} yds" + (f" {self.rush_td} TD" if self.rush_td else ""))
+        if self.receptions:
+            parts.append(f"{self.receptions} rec {self.rec_yds} yds" + (f" {self.rec_td} TD" if self.rec_td else ""))
+        if self.fg_made or self.fg_missed:
+            parts.append(f"{self.fg_made}/{self.fg_made + self.fg_missed} FG")
+        if self.xp_made:
+            parts.append(f"{self.xp_made} XP")
+        if self.fumbles:
+            parts.append(f"{self.fumbles} fum")
+        return ", ".join(parts)
+
+    def __repr__(self):
+        return f"StatLine({self.summary()})"
+
+
+def parse_play(play):
+    """
+    The stat credits in one play: a list of (player key, stat, amount). Penalties that wipe out the play,
+    and play types we don't keep stats for (punts, kickoffs, sacks...), give nothing.
+    """
+    text = play.get("text") or ""
+    kind = (play.get("type") or {}).get("text", "")
+    if not text or "No Play" in kind or "NO PLAY" in text:
+        return []
+    text = _PREFIX.sub("", text)
+    yards = play.get("statYardage") or 0
+    touchdown = "TOUCHDOWN" in text
+    credits = []
+
+    if kind.startswith("Pass") or "Interception" in kind:
+        m = _PASS.match(text)
+        if m is None:
+            return credits
+        passer = _key(m.group("passer"))
+        credits.append((passer, "pass_att", 1))
+        if "INTERCEPTED" in text:
+            credits.append((passer, "interceptions", 1))
+        elif "incomplete" not in m.group("rest"):
+            credits.append((passer, "pass_cmp", 1))
+            credits.append((passer, "pass_yds", yards))
+            receiver = _RECEIVER.search(m.group("rest"))
+            if receiver is not None:
+                receiver = _key(receiver.group("receiver"))
+                credits += [(receiver, "receptions", 1), (receiver, "rec_yds", yards)]
+                if touchdown:
+                    credits.append((receiver, "rec_td", 1))
+            if touchdown:
+                credits.append((passer, "pass_td", 1))
+    elif kind.startswith("Rush"):
+        m = _LEADING_NAME.match(text)
+        if m is not None:
+            rusher = _key(m.group("name"))
+            credits += [(rusher, "rush_att", 1), (rusher, "rush_yds", yards)]
+            if touchdown:
+                credits.append((rusher, "rush_td", 1))
+    elif kind.startswith("Field Goal"):
+        m = _LEADING_NAME.match(text)
+        if m is not None:
+            credits.append((_key(m.group("name")), "fg_made" if "Good" in kind else "fg_missed", 1))
+
+    # extra points ride along in the touchdown play's text, fumbles can happen on anything
+    m = _EXTRA_POINT.search(text)
+    if m is not None:
+        credits.append((_key(m.group("name")), "xp_made", 1))
+    for m in _FUMBLE.finditer(text):
+        credits.append((_key(m.group("name")), "fumbles", 1))
+    return credits
+
+
+def new_plays(summary, cursor):
+    """
+    The plays in a summary response after sequence number cursor, oldest first. Walks back from the newest
+    play and stops at the first one at or before the cursor, so it only touches the new ones. Only strictly
+    decreasing sequence numbers are taken on the way back, since the drive in progress can show up both as
+    "current" and as the last of "previous", and its plays mustn't be counted twice.
+    """
+    drives = summary.get("drives") or {}
+    current = drives.get("current")
+    previous = drives.get("previous") or []
+    newest_first = []
+    floor = None
+    for drive in ([current] if current else []) + previous[::-1]:
+        for play in reversed(drive.get("plays") or ()):
+            seq = _sequence(play)
+            if seq <= cursor:
+                return newest_first[::-1]
+            if floor is not None and seq >= floor:
+                continue
+            newest_first.append(play)
+            floor = seq
+    return newest_first[::-1]
+
+
+def _sequence(play):
+    try:
+        return int(play.get("sequenceNumber") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class GameFeed:
+    """
+    What's been ingested for one game: the cursor (last sequenceNumber processed) and a StatLine per player key.
+    """
+    __slots__ = ("event_id", "cursor", "lines", "plays_processed")
+
+    def __init__(self, event_id):
+        self.event_id = event_id
+        self.cursor = -1
+        self.lines = {}
+        self.plays_processed = 0
+
+    def ingest(self, summary):
+        """
+        Processes the plays after the cursor. Returns how many there were.
+        """
+        plays = new_plays(summary, self.cursor)
+        for play in plays:
+            credits = parse_play(play)
+            if credits:
+                when = ((play.get("period") or {}).get("number"), (play.get("clock") or {}).get("displayValue"),
+                        play.get("text"))
+                credited = set()
+                for key, stat, amount in credits:
+                    line = self.lines.get(key)
+                    if line is None:
+                        line = self.lines[key] = StatLine()
+                    setattr(line, stat, getattr(line, stat) + amount)
+                    if key not in credited:
+                        line.recent.append(when)
+                        credited.add(key)
+            self.cursor = max(self.cursor, _sequence(play))
+        self.plays_processed += len(plays)
+        return len(plays)
+
+
+class PlayByPlay:
+    """
+    The per-game feeds for one week. Keep one per poller; update() is called once per poll.
+    """
+    def __init__(self):
+        self.feeds = {}   # event_id -> GameFeed
+        self._finished = set()   # event_ids that got their last pass after going final
+        self._lock = threading.Lock()
+
+    @traced()
+    def update(self, games, players):
+        """
+        Fetches (concurrently) and ingests the live games any of players is in, and returns the stat lines.
+
+        Parameters:
+            - games (list): The week's games from pull_games().
+            - players (list): The Player objects to follow (e.g. my lineup's starters).
+
+        Returns:
+            - dict: player_id -> StatLine.as_dict() for every player with something credited this week.
+        """
+        teams = {TEAM_ALIASES.get(p.team, p.team) for p in players}
+        game_for_team = {}
+        to_fetch = []
+        with self._lock:
+            for game in games:
+                if game["home_team"] not in teams and game["away_team"] not in teams:
+                    continue
+                game_for_team[game["home_team"]] = game_for_team[game["away_team"]] = game["event_id"]
+                feed = self.feeds.get(game["event_id"])
+                # in progress, plus one last pass for a game that finished since the previous poll
+                if game.get("state") == "in" or (game.get("state") == "post" and feed is not None
+                                                  and game["event_id"] not in self._finished):
+                    if feed is None:
+                        feed = self.feeds[game["event_id"]] = GameFeed(game["event_id"])
+                    to_fetch.append((feed, game.get("state") == "post"))
+
+        futures = [(feed, final, _pool.submit(http_client.get_json, SUMMARY_URL, {"event": feed.event_id}))
+                   for feed, final in to_fetch]
+        for feed, final, future in futures:
+            try:
+                summary = future.result()
+            except Exception as e:
+                # the stat lines just lag a poll, the scores and points don't depend on them
+                print(f"Play-by-play fetch failed for event {feed.event_id}: {e}")
+                continue
+            with self._lock:
+                feed.ingest(summary)
+                if final:
+                    self._finished.add(feed.event_id)
+
+        lines = {}
+        with self._lock:
+            for p in players:
+                feed = self.feeds.get(game_for_team.get(TEAM_ALIASES.get(p.team, p.team)))
+                line = feed.lines.get(short_name(p.first_name, p.last_name)) if feed is not None else None
+                if line is not None:
+                    lines[p.player_id] = line.as_dict()
+        return lines
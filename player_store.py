@@ -0,0 +1,206 @@
+"""
+This houses the compact player metadata store. Sleeper's /players/nfl dump has every player in the league
+with a ton of fields we never look at, and json.load-ing all of it every rerun is slow. Instead we keep only
+the fields a Player needs in a small SQLite table indexed by player_id, built once per daily pull.
+"""
+import codecs
+import json
+import os
+import sqlite3
+import threading
+
+# the only fields build_players() actually reads, in the order they're stored
+PLAYER_FIELDS = ("first_name", "last_name", "position", "injury_status", "team", "number")
+
+
+def build_player_store(players_data, db_file):
+    """
+    Builds the store from the full Sleeper players dict (player_id -> metadata). Writes to a temp file
+    first and then swaps it in, so a reader never sees a half-built store.
+
+    Parameters:
+        - players_data (dict): The raw response from /players/nfl.
+        - db_file (str): Where the store should live.
+    """
+    rows = ((pid,) + tuple(p.get(field) for field in PLAYER_FIELDS) for pid, p in players_data.items())
+    write_player_store(rows, db_file)
+
+
+def stream_player_store(chunks, db_file):
+    """
+    Builds the store straight from the raw /players/nfl response body, given as an iterable of byte chunks
+    (e.g. response.iter_content()). Players are parsed one at a time as their bytes arrive, so we only ever
+    hold about one player's worth of JSON instead of the whole 5MB dump.
+    """
+    rows = ((pid,) + tuple(p.get(field) for field in PLAYER_FIELDS) for pid, p in iter_json_object(chunks))
+    write_player_store(rows, db_file)
+
+
+def iter_json_object(chunks):
+    """
+    Incrementally parses a top-level JSON object from an iterable of byte chunks, yielding (key, value)
+    pairs as soon as each value is complete. The buffer only grows to the size of the largest single value.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buf = ""
+    pos = 0
+    done = False
+
+    def more():
+        # pull the next chunk into the buffer, dropping whatever we've already consumed
+        nonlocal buf, pos, done
+        try:
+            buf = buf[pos:] + utf8.decode(next(chunks))
+        except StopIteration:
+            buf = buf[pos:] + utf8.decode(b"", final=True)
+            done = True
+        pos = 0
+
+    def skip_ws():
+        # returns the next non-whitespace character (reading more if needed), or "" at the end of the input
+        nonlocal pos
+        while True:
+            pos = _skip(buf, pos)
+            if pos < len(buf) or done:
+                return buf[pos:pos + 1]
+            more()
+
+    if skip_ws() != "{":
+        raise ValueError("Expected a JSON object")
+    pos += 1
+
+    while True:
+        c = skip_ws()
+        if c == "}":
+            return
+        if c == ",":
+            pos += 1
+            continue
+        start = pos
+        while True:
+            try:
+                key, end = decoder.raw_decode(buf, start)
+                end = _skip(buf, end)
+                if end >= len(buf) or buf[end] != ":":
+                    raise ValueError("incomplete key")
+                value, end = decoder.raw_decode(buf, _skip(buf, end + 1))
+                # a number at the very end of the buffer might still be getting more digits
+                if _skip(buf, end) >= len(buf) and not done:
+                    raise ValueError("value may be incomplete")
+                break
+            except ValueError:
+                if done:
+                    raise
+                # not enough of the value has arrived yet, read more and try again from the key
+                offset = start - pos
+                more()
+                start = offset
+        pos = end
+        yield key, value
+
+
+def _skip(buf, i):
+    while i < len(buf) and buf[i] in " \t\r\n":
+        i += 1
+    return i
+
+
+def write_player_store(rows, db_file):
+    """
+    Writes an iterable of (player_id, first_name, last_name, position, injury_status, team, number) rows
+    into a fresh store at db_file. The rows can be a generator, so callers never have to hold everything.
+    Everything goes into a temp file that is only renamed over db_file once it's complete, so a crash (or a
+    dropped connection) partway through leaves the previous store untouched.
+    """
+    tmp_file = f"{db_file}.tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+
+    conn = sqlite3.connect(tmp_file)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        # no declared type on the metadata columns so values keep whatever type Sleeper gave them
+        columns = ", ".join(PLAYER_FIELDS)
+        conn.execute(f"CREATE TABLE players (player_id TEXT PRIMARY KEY, {columns}) WITHOUT ROWID")
+        placeholders = ", ".join("?" * (len(PLAYER_FIELDS) + 1))
+        conn.executemany(f"INSERT OR REPLACE INTO players VALUES ({placeholders})", rows)
+        conn.commit()
+    except BaseException:
+        conn.close()
+        os.remove(tmp_file)
+        raise
+    conn.close()
+
+    os.replace(tmp_file, db_file)
+    _open_stores.pop(os.path.abspath(db_file), None)
+
+
+class PlayerStore:
+    """
+    Read-only view of the store. It acts enough like the old players dict that build_players() doesn't care
+    which one it gets: store[player_id] returns a dict of PLAYER_FIELDS and raises KeyError if it's missing.
+    """
+    def __init__(self, db_file):
+        self.db_file = db_file
+        # streamlit runs each session in its own thread, so share one connection behind a lock
+        self._conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._select = f"SELECT player_id, {', '.join(PLAYER_FIELDS)} FROM players WHERE player_id"
+
+    def __getitem__(self, player_id):
+        with self._lock:
+            row = self._conn.execute(f"{self._select} = ?", (player_id,)).fetchone()
+        if row is None:
+            raise KeyError(player_id)
+        return dict(zip(PLAYER_FIELDS, row[1:]))
+
+    def __contains__(self, player_id):
+        try:
+            self[player_id]
+        except KeyError:
+            return False
+        return True
+
+    def get_many(self, player_ids):
+        """
+        Looks up a batch of ids in one query. Returns a dict of player_id -> fields, skipping unknown ids.
+        """
+        player_ids = list(set(player_ids))
+        found = {}
+        # stay well under sqlite's bound-parameter limit
+        for start in range(0, len(player_ids), 500):
+            chunk = player_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(f"{self._select} IN ({placeholders})", chunk).fetchall()
+            for row in rows:
+                found[row[0]] = dict(zip(PLAYER_FIELDS, row[1:]))
+        return found
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+_open_stores = {}
+
+
+def open_player_store(db_file):
+    """
+    Returns a (cached) PlayerStore for db_file. Streamlit reruns keep the module around, so after the first
+    call this is just a dict lookup. The cache is keyed on the file's mtime so a new daily pull gets picked up.
+    """
+    key = os.path.abspath(db_file)
+    mtime = os.path.getmtime(db_file)
+    cached = _open_stores.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    store = PlayerStore(db_file)
+    _open_stores[key] = (mtime, store)
+    return store
@@ -0,0 +1,164 @@
+"""
+This houses portfolio mode: one user's matchups across several leagues at once. Running the single-league
+load once per league would look the user up, load the player metadata and fetch the scoreboard once per
+league. Here every league's matchups (and users/rosters, when a league's context is stale) go out together
+on one thread pool, next to one user lookup, one scoreboard pull and one metadata load. All the leagues'
+starters are then looked up in the player store in a single query.
+The result is also indexed by player (player_id -> where they start for me) and by NFL team. That makes
+"which of my starters, in any league, are in this game" two dict lookups instead of a scan of every lineup.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+from data_loader import timed
+from espn_pull import pull_games
+from scoreboard import TEAM_ALIASES
+from sleeper_pull import build_lineups, get_league_context, get_player_metadata, pull_matchups, resolve_user_id, \
+    settle_matchups
+from tracing import traced
+
+# ~10 leagues, each with a matchups request (plus users/rosters on a cold start), share these
+MAX_WORKERS = 16
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="portfolio")
+
+
+class Exposure:
+    """
+    One of my starters in one league.
+    - league_id (str): The league they start in.
+    - team_name (str): My team's name in that league.
+    - slot (int): Their index in my starters list (the roster slot they're in).
+    - opponent (str): The team I'm playing in that league this week.
+    - player (Player): The player itself, with their current points.
+    """
+    __slots__ = ("league_id", "team_name", "slot", "opponent", "player")
+
+    def __init__(self, league_id, team_name, slot, opponent, player):
+        self.league_id = league_id
+        self.team_name = team_name
+        self.slot = slot
+        self.opponent = opponent
+        self.player = player
+
+    def __repr__(self):
+        return f"Exposure({self.player.first_name} {self.player.last_name}, {self.league_id} slot {self.slot} " \
+               f"vs {self.opponent})"
+
+
+class Portfolio:
+    """
+    Every league's matchup for one user and week, plus the exposure indexes.
+    - matchups (dict): league_id -> (my Lineup, opponent's Lineup), in the order the leagues were given.
+    - games (list): The week's games from pull_games(), shared by all the leagues.
+    - exposure (dict): player_id -> tuple of Exposures, one per league they start for me in.
+    - by_team (dict): NFL team (ESPN spelling, like the scoreboard) -> tuple of Exposures.
+    - timings (dict) / total (float): Seconds per request group and for the whole load, like RenderData.
+    """
+    def __init__(self, username, week, matchups, games, timings, total):
+        self.username = username
+        self.week = week
+        self.matchups = matchups
+        self.games = games
+        self.timings = timings
+        self.total = total
+
+        exposure = {}
+        by_team = {}
+        for league_id, (my_lineup, opp_lineup) in matchups.items():
+            # built before anything orders the lineup, so the index is the starters slot
+            for slot, player in enumerate(my_lineup.player_list):
+                entry = Exposure(league_id, my_lineup.team_name, slot, opp_lineup.team_name, player)
+                exposure.setdefault(player.player_id, []).append(entry)
+                by_team.setdefault(TEAM_ALIASES.get(player.team, player.team), []).append(entry)
+        self.exposure = {pid: tuple(entries) for pid, entries in exposure.items()}
+        self.by_team = {team: tuple(entries) for team, entries in by_team.items()}
+
+    def exposures(self, player_id):
+        """
+        Every league player_id starts for me in, as Exposures (empty if none).
+        """
+        return self.exposure.get(player_id, ())
+
+    def in_game(self, game):
+        """
+        My starters across all leagues playing in game (a GameRecord or any mapping with home_team/away_team).
+        """
+        return self.by_team.get(game["home_team"], ()) + self.by_team.get(game["away_team"], ())
+
+    def totals(self):
+        """
+        {league_id: (my points, opponent's points)}.
+        """
+        return {league_id: (my_lineup.total_points, opp_lineup.total_points)
+                for league_id, (my_lineup, opp_lineup) in self.matchups.items()}
+
+    def any_in_progress(self):
+        return any(game["state"] == "in" for game in self.games)
+
+    def timing_report(self):
+        parts = ", ".join(f"{name} {1000 * secs:.0f}" for name, secs in
+                          sorted(self.timings.items(), key=lambda item: -item[1]))
+        return f"{len(self.matchups)} leagues loaded in {1000 * self.total:.0f} ms ({parts})"
+
+
+def _gather(futures, timings, name):
+    """
+    Waits on a list of timed futures, records the slowest under name and returns the results in order.
+    """
+    results = [future.result() for future in futures]
+    if results:
+        timings[name] = max(secs for _, secs in results)
+    return [result for result, _ in results]
+
+
+@traced()
+def load_portfolio(league_ids, username, week):
+    """
+    Loads my lineup and my opponent's in every league, concurrently.
+
+    Parameters:
+        - league_ids (list): Sleeper league ids.
+        - username (str): The user's sleeper username (the same account in every league).
+        - week (int): Week number of interest.
+
+    Returns:
+        - Portfolio
+    """
+    start = time.perf_counter()
+    league_ids = list(dict.fromkeys(league_ids))
+    leagues = [get_league_context(league_id, username, fetch=False) for league_id in league_ids]
+    stale = [league for league in leagues if league.is_stale()]
+
+    # --- everything goes out at once: the shared requests and every league's own ---
+    user = _pool.submit(timed, resolve_user_id, username)
+    scoreboard = _pool.submit(timed, pull_games, week)
+    metadata = _pool.submit(timed, get_player_metadata)
+    matchups = [_pool.submit(timed, pull_matchups, league.league_id, week) for league in leagues]
+    users = [_pool.submit(timed, http_client.get_json, f'https://api.sleeper.app/v1/league/{league.league_id}/users')
+             for league in stale]
+    rosters = [_pool.submit(timed, http_client.get_json,
+                            f'https://api.sleeper.app/v1/league/{league.league_id}/rosters')
+               for league in stale]
+
+    timings = {}
+    (_, timings["user"]), (games, timings["scoreboard"]) = user.result(), scoreboard.result()
+    players_data, timings["metadata"] = metadata.result()
+    matchup_data = _gather(matchups, timings, "matchups")
+    for league, data in zip(leagues, matchup_data):
+        settle_matchups(league.league_id, week, data, games)
+    # the user_id is already resolved above, so load() doesn't look it up again per league
+    for league, users_data, rosters_data in zip(stale, _gather(users, timings, "users"),
+                                                _gather(rosters, timings, "rosters")):
+        league.load(users_data, rosters_data)
+
+    # --- one metadata lookup for every league's starters ---
+    if hasattr(players_data, "get_many"):
+        players_data = players_data.get_many([pid for data in matchup_data for m in data
+                                              for pid in (m.get('starters') or [])])
+
+    by_league = {}
+    for league, data in zip(leagues, matchup_data):
+        by_league[league.league_id] = build_lineups(league, data, players_data)
+    return Portfolio(username, week, by_league, games, timings, time.perf_counter() - start)
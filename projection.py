@@ -0,0 +1,177 @@
+"""
+This houses the live projections and the win probability. Each starter's remaining points are estimated from
+how much of their NFL game is left (quarter and clock off the scoreboard, joined on Player.team), a per-position
+full-game baseline, and how they've been scoring so far. Then a Monte Carlo simulation draws every starter's
+remaining points thousands of times at once (one NumPy array of draws x players per lineup) and counts how often
+each side comes out ahead.
+Results are cached on the game state they were computed from (clocks, statuses and everyone's points), so
+rerenders, and polls where nothing moved, don't rerun the simulation.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from scoreboard import TEAM_ALIASES
+from tracing import traced
+
+# rough full-game fantasy points (half PPR) and their spread, by position, for a typical starter
+POSITION_BASELINES = {
+    "QB": (17.0, 7.0), "RB": (11.0, 6.5), "WR": (11.0, 6.5), "TE": (8.0, 5.0), "K": (8.0, 4.0), "DEF": (7.0, 5.5),
+    "DL": (5.0, 3.0), "LB": (6.0, 3.5), "DB": (5.0, 3.0),
+}
+DEFAULT_BASELINE = (8.0, 5.0)
+GAME_MINUTES = 60.0
+QUARTER_MINUTES = 15.0
+# players with one of these aren't expected to score any more
+OUT_STATUSES = ("Out", "IR", "PUP", "Sus", "NA")
+DRAWS = 10000
+CACHE_SIZE = 64
+
+
+class WinProbability:
+    """
+    Result of one simulation.
+    - win_prob (float): Chance my lineup ends up ahead (ties count half).
+    - my_projection / opp_projection (float): Projected final totals (current points + mean remaining).
+    - my_range / opp_range (tuple): 10th and 90th percentile of the simulated final totals.
+    """
+    __slots__ = ("win_prob", "my_projection", "opp_projection", "my_range", "opp_range")
+
+    def __init__(self, win_prob, my_projection, opp_projection, my_range, opp_range):
+        self.win_prob = win_prob
+        self.my_projection = my_projection
+        self.opp_projection = opp_projection
+        self.my_range = my_range
+        self.opp_range = opp_range
+
+    def __repr__(self):
+        return f"WinProbability({self.win_prob:.1%}, {self.my_projection:.1f} vs {self.opp_projection:.1f})"
+
+
+def minutes_left(game):
+    """
+    Game minutes left for a game off the scoreboard: all 60 before kickoff, 0 once it's final. Overtime counts
+    as nothing left, it's short and rare enough not to matter here.
+    """
+    if game is None:
+        return 0.0
+    status = game["status"]
+    state = game.get("state")
+    if state == "pre" or status == "Scheduled":
+        return GAME_MINUTES
+    if state == "post" or status.startswith("Final"):
+        return 0.0
+    if status == "Halftime":
+        return GAME_MINUTES / 2
+    quarter = game.get("quarter") or 1
+    if quarter > 4:
+        return 0.0
+    minutes, _, seconds = (game.get("clock") or "0:00").partition(":")
+    try:
+        clock = int(minutes) + int(seconds or 0) / 60.0
+    except ValueError:
+        clock = 0.0
+    return (4 - quarter) * QUARTER_MINUTES + clock
+
+
+def games_by_team(games):
+    """
+    {team: game} for both teams in every game.
+    """
+    teams = {}
+    for game in games:
+        teams[game["home_team"]] = game
+        teams[game["away_team"]] = game
+    return teams
+
+
+def project_players(players, games_for_team):
+    """
+    Remaining-points estimate for each player, as (current, mean remaining, sd remaining) arrays.
+
+    Parameters:
+        - players (list): Player objects (a lineup's player_list).
+        - games_for_team (dict): From games_by_team().
+    """
+    n = len(players)
+    current = np.empty(n)
+    mean = np.empty(n)
+    sd = np.empty(n)
+    for i, p in enumerate(players):
+        current[i] = p.player_points
+        game = games_for_team.get(TEAM_ALIASES.get(p.team, p.team))
+        left = minutes_left(game) / GAME_MINUTES
+        base_mean, base_sd = POSITION_BASELINES.get(p.position, DEFAULT_BASELINE)
+        if left == 0.0 or (left == 1.0 and p.injury_status in OUT_STATUSES):
+            mean[i] = sd[i] = 0.0
+            continue
+        played = 1.0 - left
+        # lean on how they're actually doing the further into the game we are
+        pace = p.player_points / played if played > 0 else base_mean
+        rate = (1.0 - played / 2) * base_mean + (played / 2) * pace
+        mean[i] = max(rate, 0.0) * left
+        sd[i] = base_sd * np.sqrt(left)
+    return current, mean, sd
+
+
+def simulate(current, mean, sd, rng, draws=DRAWS):
+    """
+    Simulated final totals for one lineup: a (draws,) array. Remaining points can't go below 0.
+    """
+    if len(mean) == 0:
+        return np.zeros(draws)
+    remaining = rng.standard_normal((draws, len(mean)), dtype=np.float32)
+    remaining *= sd.astype(np.float32)
+    remaining += mean.astype(np.float32)
+    np.maximum(remaining, 0.0, out=remaining)
+    return current.sum() + remaining.sum(axis=1, dtype=np.float64)
+
+
+def state_key(my_lineup, opp_lineup, games):
+    """
+    Everything the simulation depends on, so identical states share a result.
+    """
+    return (tuple((p.player_id, p.team, p.position, p.injury_status, p.player_points) for p in my_lineup.player_list),
+            tuple((p.player_id, p.team, p.position, p.injury_status, p.player_points) for p in opp_lineup.player_list),
+            tuple((g["home_team"], g["status"], g.get("quarter"), g.get("clock")) for g in games))
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@traced()
+def win_probability(my_lineup, opp_lineup, games, draws=DRAWS, seed=0):
+    """
+    Simulates the rest of the matchup and returns a WinProbability. The seed is fixed so the same state
+    always gives the same number (no flicker between rerenders).
+
+    Parameters:
+        - my_lineup / opp_lineup (Lineup): The two sides.
+        - games (list): The week's games from pull_games().
+        - draws (int): How many simulated finishes.
+    """
+    key = (state_key(my_lineup, opp_lineup, games), draws, seed)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    teams = games_by_team(games)
+    rng = np.random.default_rng(seed)
+    my_current, my_mean, my_sd = project_players(my_lineup.player_list, teams)
+    opp_current, opp_mean, opp_sd = project_players(opp_lineup.player_list, teams)
+    my_totals = simulate(my_current, my_mean, my_sd, rng, draws)
+    opp_totals = simulate(opp_current, opp_mean, opp_sd, rng, draws)
+
+    win_prob = float(np.mean(my_totals > opp_totals) + 0.5 * np.mean(my_totals == opp_totals))
+    result = WinProbability(win_prob,
+                            float(my_current.sum() + my_mean.sum()), float(opp_current.sum() + opp_mean.sum()),
+                            tuple(float(x) for x in np.percentile(my_totals, [10, 90])),
+                            tuple(float(x) for x in np.percentile(opp_totals, [10, 90])))
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
@@ -0,0 +1,191 @@
+"""
+This houses the html for the rows on the dashboard (one per game in the slate, one per starter in a lineup)
+and the row caches that only rebuild the html for rows whose shown fields (snapshot_diff.GAME_FIELDS /
+PLAYER_FIELDS) changed between polls. render() returns the keys it rebuilt along with the html, so a caller
+that can keep rows around only has to redraw those. When most rows changed (every live game's clock moves
+each poll) checking row by row costs more than it saves, so past FULL_RENDER_SHARE everything gets rebuilt.
+It doesn't import streamlit, so the rows can be built and benchmarked headless.
+"""
+from operator import attrgetter, itemgetter
+
+from color_scale import diff_colors
+from snapshot_diff import GAME_FIELDS, PLAYER_FIELDS, game_key
+
+# rebuild every row once more than this share of them changed since the last render
+FULL_RENDER_SHARE = 0.5
+
+_game_values = itemgetter(*GAME_FIELDS)
+_player_values = attrgetter(*PLAYER_FIELDS)
+
+TEAM_COLORS = {
+    "NYG": "#003C7E", "WSH": "#773141", "DAL": "#041E42", "PHI": "#004C54",
+    "BUF": "#00338D", "MIA": "#008E97", "NYJ": "#125740", "NE": "#002244",
+    "GB": "#203731", "MIN": "#4F2683", "DET": "#0076B6", "CHI": "#0B162A",
+    "CIN": "#FB4F14", "CLE": "#311D00", "BAL": "#241773", "PIT": "#FFB612",
+    "SF": "#AA0000", "LAR": "#003594", "SEA": "#002244", "ARI": "#97233F",
+    "LV": "#000000", "DEN": "#FB4F14", "KC": "#E31837", "LAC": "#0080C6",
+    "CAR": "#0085CA", "ATL": "#A71930", "NO": "#D3BC8D", "TB": "#D50A0A",
+    "IND": "#002C5F", "TEN": "#4B92DB", "HOU": "#03202F", "JAX": "#006778",
+}
+
+
+def status_text(game):
+    """
+    What a game row shows for the game's status: "Q3 7:32" while it's on, "TBD" before kickoff, otherwise
+    ESPN's description ("Final", "Halftime"...).
+    """
+    return f"Q{game['quarter']} {game['clock']}" if game["status"] == "In Progress" else "TBD" if game["status"] == "Scheduled" else game["status"]
+
+
+def game_row_html(game, bet_string):
+    away_team = game["away_team"]; home_team = game["home_team"]
+    away_color = TEAM_COLORS.get(away_team, "#888"); home_color = TEAM_COLORS.get(home_team, "#888")
+    status = status_text(game)
+    away_score = f"{int(game['away_score']):>2}"; home_score = f"{int(game['home_score']):>2}"
+
+    return f"""
+        <div style="
+            background-color: #f8f8f8;
+            border: 1px solid #ddd;
+            border-radius: 2px;
+            padding: 4px 4px;
+            margin: 0px;            /* eliminates spacing */
+        ">
+        <div style="display:flex; align-items:center;">
+            <div style="flex:0.4;">
+                <form action="" method="get" style="margin:0;">
+                <input type="hidden" name="select_team" value="{away_team}">
+                    <button type="submit" style="
+                        background-color:{away_color};
+                        color:white;
+                        border:2px solid black;
+                        border-radius:6px;
+                        font-weight:700;
+                        width:3.8em;
+                        height:2em;
+                        cursor:pointer;
+                    ">
+                        {away_team}
+                    </button>
+                </form>
+            </div>
+            <div style="flex:0.8; text-align:center; font-family:monospace; font-weight:bold;">
+            {away_score} - {home_score}
+            </div>
+            <div style="flex:0.4;">
+                <form action="" method="get" style="margin:0;">
+                <input type="hidden" name="select_team" value="{home_team}">
+                    <button type="submit" style="
+                        background-color:{home_color};
+                        color:white;
+                        border:2px solid black;
+                        border-radius:6px;
+                        font-weight:700;
+                        width:3.8em;
+                        height:2em;
+                        cursor:pointer;
+                    ">
+                        {home_team}
+                    </button>
+                </form>
+            </div>
+            <div style="flex:2.0; font-family:monospace; margin-left:10px;">
+            | {status} | {bet_string}
+            </div>
+        </div>
+        </div>
+        """
+
+
+def player_row_html(p, color):
+    return f"""
+            <div style="
+                background-color:{color};
+                color:black;
+                padding:10px 14px;
+                margin-bottom:6px;
+                border-radius:10px;
+                font-weight:500;
+            ">
+                <b>{p.first_name} {p.last_name}</b> ({p.team} {p.position}) - {p.player_points:.1f} pts
+            </div>
+            """
+
+
+class SlateRows:
+    """
+    Keeps the html for every game row from the last render and only rebuilds the ones whose score, clock or
+    status changed since then (or whose bet string changed). Keep one per session.
+    """
+    def __init__(self):
+        self.rows = {}   # game key -> (game, bet_string, html)
+
+    def render(self, games, bet_strings):
+        """
+        Builds the rows for games. bet_strings maps game key -> the bet text for that row.
+
+        Returns:
+            - list: The html for each game, in order.
+            - set: The keys of the games whose html was rebuilt.
+        """
+        old = self.rows
+        limit = FULL_RENDER_SHARE * len(games)
+        rows = {}
+        html = []
+        changed = set()
+        for game in games:
+            key = game_key(game)
+            bet_string = bet_strings.get(key, '---')
+            # once most of the slate has moved, the rest just gets rebuilt without comparing
+            row = old.get(key) if len(changed) <= limit else None
+            if (row is None or row[1] != bet_string
+                    or (row[0] is not game and _game_values(row[0]) != _game_values(game))):
+                row = (game, bet_string, game_row_html(game, bet_string))
+                changed.add(key)
+            rows[key] = row
+            html.append(row[2])
+        self.rows = rows
+        return html, changed
+
+
+class LineupRows:
+    """
+    Same idea as SlateRows for a lineup shown against its opponent. Each row's color depends on both the player
+    and the opponent player across from them, so a row is rebuilt if either side changed.
+    """
+    def __init__(self):
+        self.rows = {}   # (player_id, other player_id) -> (shown fields, other's shown fields, html)
+
+    def render(self, lineup, other_lineup):
+        """
+        Builds the rows, colored by how each player is doing against the one across from them.
+
+        Returns:
+            - list: The html for each row, in order.
+            - set: The (player_id, other player_id) keys of the rows that were rebuilt.
+        """
+        pairs = list(zip(lineup.player_list, other_lineup.player_list))
+        old = self.rows
+        limit = FULL_RENDER_SHARE * len(pairs)
+        keys = []
+        shown = []
+        html = []
+        stale = []
+        for i, (p, op) in enumerate(pairs):
+            key = (p.player_id, op.player_id)
+            values = (_player_values(p), _player_values(op))
+            # once most of the lineup has moved, the rest just gets rebuilt without comparing
+            row = old.get(key) if len(stale) <= limit else None
+            if row is None or row[:2] != values:
+                stale.append(i)
+                row = (None, None, None)
+            keys.append(key)
+            shown.append(values)
+            html.append(row[2])
+        if stale:
+            # one vectorized lookup for the rows being rebuilt
+            colors = diff_colors([pairs[i][0].player_points for i in stale], [pairs[i][1].player_points for i in stale])
+            for i, color in zip(stale, colors):
+                html[i] = player_row_html(pairs[i][0], color)
+        self.rows = {key: values + (row,) for key, values, row in zip(keys, shown, html)}
+        return html, {keys[i] for i in stale}
@@ -0,0 +1,214 @@
+"""
+This houses the record/replay transport for the HTTP client, so the pull and render pipeline can be run (and
+benchmarked) offline. RecordingAdapter does the real request and saves every response it gets to a fixture
+file; ReplayAdapter serves those fixtures back without touching the network, with a configurable latency and
+jitter per request so timings still look like the real thing. Both plug into http_client (see record() and
+replay()), so nothing above the client knows the difference, ETag revalidation and 304s included.
+
+Fixtures are gzipped JSON, one per url, laid out by host and path:
+    <fixture_dir>/api.sleeper.app/v1__league__1180303931006689280__matchups__3.json.gz
+
+    python replay.py record <league_id> <username> <week> [--out fixtures]
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+import http_client
+from scheduler import RateBudget
+
+FIXTURE_DIR = 'fixtures'
+# response headers worth keeping, the rest are noise
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class FixtureNotFound(requests.RequestException):
+    """
+    Replay was asked for a url nobody recorded.
+    """
+
+
+def fixture_path(fixture_dir, url):
+    """
+    Where the fixture for url lives. Query strings get hashed onto the name, so ?week=3 and ?week=4 differ.
+    """
+    parts = urlsplit(url)
+    name = parts.path.strip("/").replace("/", "__") or "root"
+    if parts.query:
+        name += "__" + hashlib.sha256(parts.query.encode()).hexdigest()[:12]
+    return os.path.join(fixture_dir, parts.netloc, f"{name}.json.gz")
+
+
+def write_fixture(fixture_dir, url, status, headers, body):
+    """
+    Saves one response. body is the raw bytes (utf-8 JSON for everything these APIs send).
+    """
+    path = fixture_path(fixture_dir, url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    entry = {"url": url, "status": status, "headers": {k: headers[k] for k in KEPT_HEADERS if k in headers},
+             "body": body.decode("utf-8")}
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp_path, 'wt', compresslevel=6) as f:
+        json.dump(entry, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_fixture(fixture_dir, url):
+    try:
+        with gzip.open(fixture_path(fixture_dir, url), 'rt') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    A normal HTTPAdapter that also writes every successful response to fixture_dir.
+    """
+    def __init__(self, fixture_dir=FIXTURE_DIR, **kwargs):
+        super().__init__(**kwargs)
+        self.fixture_dir = fixture_dir
+        self.recorded = []
+
+    def send(self, request, **kwargs):
+        resp = super().send(request, **kwargs)
+        if resp.status_code == 200:
+            # reading .content here is fine for streamed responses too, iter_content serves it from memory
+            self.recorded.append(write_fixture(self.fixture_dir, request.url, resp.status_code, resp.headers,
+                                               resp.content))
+        return resp
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Serves recorded fixtures instead of the network.
+
+    Parameters:
+        - fixture_dir (str): Where the fixtures were recorded to.
+        - latency (float): Seconds every request takes.
+        - jitter (float): Up to this many extra seconds, uniformly random per request.
+        - seed (int): Seed for the jitter, so runs are repeatable.
+    """
+    def __init__(self, fixture_dir=FIXTURE_DIR, latency=0.0, jitter=0.0, seed=None):
+        super().__init__()
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._fixtures = {}   # url -> (status, headers, body bytes), so repeats don't re-read the file
+        self._lock = threading.Lock()
+        self.requests = Counter()      # endpoint -> requests served
+        self.not_modified = Counter()  # endpoint -> 304s served
+
+    def _load(self, url):
+        with self._lock:
+            cached = self._fixtures.get(url)
+        if cached is None:
+            entry = read_fixture(self.fixture_dir, url)
+            if entry is None:
+                raise FixtureNotFound(f"No fixture recorded for {url} in {self.fixture_dir}")
+            cached = (entry["status"], entry["headers"], entry["body"].encode("utf-8"))
+            with self._lock:
+                self._fixtures[url] = cached
+        return cached
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        status, headers, body = self._load(request.url)
+        endpoint = http_client.endpoint_name(request.url)
+
+        resp = requests.Response()
+        resp.request = request
+        resp.url = request.url
+        resp.encoding = "utf-8"
+        resp.headers = CaseInsensitiveDict(headers)
+        etag = headers.get("ETag")
+        with self._lock:
+            self.requests[endpoint] += 1
+            if etag and request.headers.get("If-None-Match") == etag:
+                self.not_modified[endpoint] += 1
+                status, body = 304, b""
+        resp.status_code = status
+        resp.reason = "Not Modified" if status == 304 else "OK"
+        resp.raw = io.BytesIO(body)
+        if not stream:
+            resp._content = body
+        return resp
+
+    def close(self):
+        pass
+
+
+@contextmanager
+def _client_with(adapter, **kwargs):
+    http_client.configure(adapter=adapter, **kwargs)
+    try:
+        yield adapter
+    finally:
+        http_client.configure()
+
+
+def record(fixture_dir=FIXTURE_DIR):
+    """
+    Context manager: everything in the block goes to the real APIs and gets recorded to fixture_dir.
+    Yields the RecordingAdapter. The shared client goes back to normal afterwards.
+    """
+    return _client_with(RecordingAdapter(fixture_dir))
+
+
+def replay(fixture_dir=FIXTURE_DIR, latency=0.0, jitter=0.0, seed=None):
+    """
+    Context manager: everything in the block is served from fixture_dir. Yields the ReplayAdapter, for its
+    request counts. There's no rate budget (nothing goes upstream). The shared client goes back to normal
+    afterwards.
+    """
+    return _client_with(ReplayAdapter(fixture_dir, latency, jitter, seed), retries=0, budget=RateBudget({}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record the Sleeper/ESPN responses a dashboard load makes.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record")
+    rec.add_argument("league_id")
+    rec.add_argument("username")
+    rec.add_argument("week", type=int)
+    rec.add_argument("--out", default=FIXTURE_DIR)
+    args = parser.parse_args()
+
+    # imported here so recording doesn't depend on anything but the client at import time
+    from espn_pull import pull_games
+    from sleeper_pull import pull_lineup
+
+    out = os.path.abspath(args.out)
+    # run from an empty folder, so the on-disk response cache and player store can't answer instead of the APIs
+    with tempfile.TemporaryDirectory() as scratch, record(out) as adapter:
+        cwd = os.getcwd()
+        os.chdir(scratch)
+        try:
+            pull_lineup(args.league_id, args.username, args.week)
+            pull_games(args.week)
+        finally:
+            os.chdir(cwd)
+    print(f"Recorded {len(adapter.recorded)} responses to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+This houses the on-disk cache for week-by-week upstream responses (ESPN scoreboards, Sleeper matchups).
+Entries are keyed by (endpoint, league, season, week) and stored as gzipped compact JSON, named by the hash of
+their key. Once every game in a week is final its entries are immutable and get served forever, so flipping
+back through old weeks costs nothing after the first visit. The live week's entries only last LIVE_TTL seconds,
+so they're kept in memory instead of being gzipped to disk on every poll.
+The whole cache is capped at MAX_CACHE_BYTES, dropping the least recently used entries first.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+CACHE_DIR = 'cache'
+MAX_CACHE_BYTES = 50 * 1024 * 1024
+# shorter than the live poll interval (see live_cache.py) so polling a live week still goes upstream every time
+LIVE_TTL = 10
+
+
+def current_season(now=None):
+    """
+    The NFL season year a date falls in. The season runs September to early February, so January/February
+    still belong to last year's season.
+    """
+    now = now or datetime.now()
+    return now.year if now.month >= 3 else now.year - 1
+
+
+class ResponseCache:
+    """
+    Parameters:
+        - cache_dir (str): Folder the entries are written to (made if needed).
+        - max_bytes (int): Size cap for the whole folder, least recently used entries are evicted past it.
+        - live_ttl (float): Seconds a not-yet-final entry is trusted for.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, live_ttl=LIVE_TTL):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.live_ttl = live_ttl
+        self._lock = threading.Lock()
+        self._live = {}   # key -> (stored_at, data) for entries that aren't final yet
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json.gz")
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt') as f:
+                entry = json.load(f)
+            # bump the mtime so eviction sees it as recently used
+            os.utime(path)
+        except (FileNotFoundError, OSError, ValueError):
+            # includes the file being evicted between the read and the touch
+            return None
+        return entry
+
+    def get(self, endpoint, league, week, season=None):
+        """
+        Returns the cached response, or None if there isn't one or it's a live entry older than live_ttl.
+        """
+        key = (endpoint, league, season or current_season(), week)
+        with self._lock:
+            live = self._live.get(key)
+        if live is not None and time.time() - live[0] <= self.live_ttl:
+            return live[1]
+        entry = self._read(key)
+        if entry is None or not entry["final"]:
+            return None
+        return entry["data"]
+
+    def is_final(self, endpoint, league, week, season=None):
+        entry = self._read((endpoint, league, season or current_season(), week))
+        return entry is not None and entry["final"]
+
+    def put(self, endpoint, league, week, data, final, season=None):
+        """
+        Stores a response. final=True means it can never change again and never expires, and it goes to disk.
+        Anything else only lives in memory for live_ttl seconds.
+        """
+        key = (endpoint, league, season or current_season(), week)
+        now = time.time()
+        with self._lock:
+            if not final:
+                self._live[key] = (now, data)
+                for stale in [k for k, (stored_at, _) in self._live.items() if now - stored_at > self.live_ttl]:
+                    del self._live[stale]
+                return
+            self._live.pop(key, None)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wt', compresslevel=6) as f:
+            json.dump({"final": final, "stored_at": now, "data": data}, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.cache_dir) as it:
+                for e in it:
+                    if e.name.endswith(".json.gz"):
+                        st = e.stat()
+                        entries.append((st.st_mtime, st.st_size, e.path))
+                        total += st.st_size
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def fetch(self, endpoint, league, week, fetch_fn, is_final_fn, season=None):
+        """
+        Returns the cached response if there's a usable one, otherwise calls fetch_fn(), stores what it returns
+        (final if is_final_fn(data) says so) and returns that.
+        """
+        data = self.get(endpoint, league, week, season)
+        if data is None:
+            data = fetch_fn()
+            self.put(endpoint, league, week, data, bool(is_final_fn(data)), season)
+        return data
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Returns the process-wide cache, making it on first use.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
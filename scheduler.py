@@ -0,0 +1,227 @@
+"""
+This houses the request scheduling every upstream call goes through (see http_client.py):
+- A token bucket per host, so however many tabs, reruns and week changes there are, we stay under Sleeper's
+documented ~1000 calls a minute (and a more careful budget for ESPN's unofficial API). The backfill
+(backfill.py) spends from the same budget, it just waits longer for tokens (see http_client.waiting()). When a host's bucket
+is empty the client hands back the last response it has for that url instead of going upstream, and only
+fails if it has nothing at all.
+- Single-flight: identical requests that are in flight at the same time share one upstream fetch.
+- poll_interval(), which decides how long the background pollers (live_cache.py) wait between polls: often
+while games are on, rarely when they're all final or not started, and longer when the budget runs low or
+polls keep failing.
+Everything takes a clock, so the behavior can be checked with FakeClock without actually waiting.
+"""
+import threading
+import time
+
+# (calls per minute, burst) per host. Sleeper documents ~1000/min, we keep some headroom under it.
+HOST_LIMITS = {
+    "api.sleeper.app": (800, 100),
+    "site.api.espn.com": (300, 30),
+}
+# how long a request will wait for its host's next token before giving up on going upstream (seconds)
+MAX_WAIT = 1.0
+
+# poll intervals (seconds)
+LIVE_INTERVAL = 15
+IDLE_INTERVAL = 300
+FINAL_INTERVAL = 1800
+# a host's bucket below this fraction of its burst counts as running low
+LOW_BUDGET = 0.25
+
+
+class Clock:
+    """
+    Real time: monotonic seconds and sleeping.
+    """
+    def time(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class FakeClock(Clock):
+    """
+    A clock that only moves when it's told to (or something sleeps on it), for checking the scheduling.
+    """
+    def __init__(self, start=0.0):
+        self.now = start
+        self._lock = threading.Lock()
+
+    def time(self):
+        with self._lock:
+            return self.now
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        with self._lock:
+            self.now += max(seconds, 0.0)
+
+
+SYSTEM_CLOCK = Clock()
+
+
+class RateBudgetExhausted(Exception):
+    """
+    A host's bucket was empty and there was no earlier response to fall back on.
+    """
+
+
+class TokenBucket:
+    """
+    Holds up to capacity tokens and refills at rate tokens per second. Each upstream call takes one.
+
+    Parameters:
+        - rate (float): Tokens added per second.
+        - capacity (float): Most tokens it holds, i.e. the biggest burst allowed.
+        - clock (Clock): Where the time comes from.
+    """
+    def __init__(self, rate, capacity, clock=SYSTEM_CLOCK):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock.time()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock.time()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=0.0):
+        """
+        Takes a token, waiting up to timeout seconds for one if the bucket is empty. Returns whether it got one.
+        A waiting caller reserves its token up front, so callers behind it wait their turn instead of racing.
+        """
+        with self._lock:
+            self._refill()
+            wait = (1.0 - self._tokens) / self.rate if self._tokens < 1.0 else 0.0
+            if wait > timeout:
+                return False
+            self._tokens -= 1.0
+        if wait > 0:
+            self.clock.sleep(wait)
+        return True
+
+    def drain(self):
+        """
+        Empties the bucket, e.g. after the host answers 429, so we back off instead of finding out again.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+    def level(self):
+        """
+        How full the bucket is, 0 to 1.
+        """
+        with self._lock:
+            self._refill()
+            return max(self._tokens, 0.0) / self.capacity
+
+
+class RateBudget:
+    """
+    One TokenBucket per host that has a limit (hosts not in limits aren't limited).
+
+    Parameters:
+        - limits (dict): host -> (calls per minute, burst). HOST_LIMITS by default, {} for no limits at all.
+        - clock (Clock): Shared by every bucket.
+    """
+    def __init__(self, limits=None, clock=SYSTEM_CLOCK):
+        limits = HOST_LIMITS if limits is None else limits
+        self.clock = clock
+        self.buckets = {host: TokenBucket(per_minute / 60.0, burst, clock) for host, (per_minute, burst) in limits.items()}
+
+    def acquire(self, host, timeout=MAX_WAIT):
+        bucket = self.buckets.get(host)
+        return bucket is None or bucket.acquire(timeout)
+
+    def drain(self, host):
+        bucket = self.buckets.get(host)
+        if bucket is not None:
+            bucket.drain()
+
+    def level(self, host=None):
+        """
+        How full host's bucket is (0 to 1, 1 for hosts without a limit). Without a host, the emptiest bucket.
+        """
+        if host is None:
+            return min((bucket.level() for bucket in self.buckets.values()), default=1.0)
+        bucket = self.buckets.get(host)
+        return 1.0 if bucket is None else bucket.level()
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    do(key, fn) runs fn, unless a call with the same key is already running, in which case it waits for that
+    one and shares its result (or its error). Returns (result, shared). merged counts the shared calls.
+    """
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.merged = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.merged += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+        try:
+            flight.result = fn()
+            return flight.result, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+def poll_interval(games, failures=0, budget_level=1.0):
+    """
+    Seconds until the next poll.
+
+    Parameters:
+        - games (list): The last poll's games (pull_games() output), None if there hasn't been a good poll yet.
+        - failures (int): Polls in a row that failed (or were throttled without anything to fall back on).
+        - budget_level (float): How full the emptiest host bucket is (RateBudget.level()).
+    """
+    if games is None:
+        # nothing to show yet: retry soon, backing off if it keeps failing
+        return min(LIVE_INTERVAL * 2 ** failures, IDLE_INTERVAL)
+    # ESPN's state, not the status text: halftime, "End of Period", "Delayed"... are all "in"
+    if any(game["state"] == "in" for game in games):
+        interval = LIVE_INTERVAL
+    elif games and all(game["status"].startswith("Final") for game in games):
+        interval = FINAL_INTERVAL
+    else:
+        interval = IDLE_INTERVAL
+    if failures:
+        interval = min(interval * 2 ** failures, max(interval, IDLE_INTERVAL))
+    if budget_level < LOW_BUDGET:
+        # running low: slow down (up to 4x) until the bucket refills
+        interval *= 1 + 3 * (LOW_BUDGET - budget_level) / LOW_BUDGET
+    return interval
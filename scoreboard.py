@@ -0,0 +1,143 @@
+"""
+This houses the scoreboard decoder. An ESPN scoreboard response is walked once into a tuple of GameRecords
+(scores, status, clock, odds and ids for each game), and everything downstream (pull_games, pull_lines, the
+line history, bet grading, the slate rows) reads from those records instead of walking the raw JSON again.
+GameRecords use __slots__, so a week of them is a handful of small objects instead of a dict per game, and they
+are Mappings, so game["home_score"] and dict(game) keep working wherever a game dict used to go.
+"""
+from collections.abc import Mapping
+
+GAME_RECORD_FIELDS = ("event_id", "home_team", "away_team", "home_id", "away_id", "home_score", "away_score",
+                      "status", "state", "completed", "quarter", "clock",
+                      "home_spread", "total", "home_ml", "away_ml")
+_NO_ODDS = (None, None, None, None)
+# Sleeper spells a few teams differently from ESPN: Sleeper abbreviation -> the one GameRecords use
+TEAM_ALIASES = {"WAS": "WSH", "JAC": "JAX", "LA": "LAR"}
+
+
+class GameRecord(Mapping):
+    """
+    One game off the scoreboard. Fields (see GAME_RECORD_FIELDS) are attributes and keys. Records get shared
+    between snapshots and sessions, so treat them as read-only (there's no item assignment).
+    home_spread is negative when the home team is favored, moneylines are American odds, odds are None if
+    ESPN hasn't posted a line.
+    """
+    __slots__ = GAME_RECORD_FIELDS
+
+    # plain assignments on purpose: a setattr loop (or blocking __setattr__) makes building these slower than dicts
+    def __init__(self, event_id, home_team, away_team, home_id, away_id, home_score, away_score,
+                 status, state, completed, quarter, clock, home_spread, total, home_ml, away_ml):
+        self.event_id = event_id
+        self.home_team = home_team
+        self.away_team = away_team
+        self.home_id = home_id
+        self.away_id = away_id
+        self.home_score = home_score
+        self.away_score = away_score
+        self.status = status
+        self.state = state
+        self.completed = completed
+        self.quarter = quarter
+        self.clock = clock
+        self.home_spread = home_spread
+        self.total = total
+        self.home_ml = home_ml
+        self.away_ml = away_ml
+
+    def __getitem__(self, key):
+        if key not in GAME_RECORD_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(GAME_RECORD_FIELDS)
+
+    def __len__(self):
+        return len(GAME_RECORD_FIELDS)
+
+    def __eq__(self, other):
+        if isinstance(other, GameRecord):
+            return all(getattr(self, f) == getattr(other, f) for f in GAME_RECORD_FIELDS)
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"GameRecord({self.away_team} {self.away_score} @ {self.home_team} {self.home_score}, {self.status})"
+
+    def line(self):
+        return {"home_team": self.home_team, "away_team": self.away_team, "home_spread": self.home_spread,
+                "total": self.total, "home_ml": self.home_ml, "away_ml": self.away_ml}
+
+
+def decode_scoreboard(data):
+    """
+    Turns a raw scoreboard response into a tuple of GameRecords, one per event, in the response's order.
+    Home/away comes from the competitors' homeAway field, falling back to ESPN's usual home-first order
+    only if it's missing.
+    """
+    records = []
+    for event in data.get("events", ()):
+        comp = event["competitions"][0]
+        first, second = comp["competitors"][:2]
+        if first.get("homeAway") == "away" or second.get("homeAway") == "home":
+            home, away = second, first
+        else:
+            home, away = first, second
+        home_team = home["team"]
+        away_team = away["team"]
+        status = comp["status"]
+        status_type = status["type"]
+        odds = comp.get("odds")
+        records.append(GameRecord(
+            event.get("id"),
+            home_team["abbreviation"],
+            away_team["abbreviation"],
+            home_team.get("id"),
+            away_team.get("id"),
+            int(home.get("score") or 0),
+            int(away.get("score") or 0),
+            status_type["description"],
+            status_type.get("state"),
+            status_type.get("completed", False),
+            status.get("period"),
+            status.get("displayClock", ""),
+            *(_decode_odds(odds[0], home_team["abbreviation"]) if odds else _NO_ODDS),
+        ))
+    return tuple(records)
+
+
+def _decode_odds(odds, home_team):
+    away_odds = odds.get("awayTeamOdds") or {}
+    home_odds = odds.get("homeTeamOdds") or {}
+    return (parse_spread(odds.get("details"), home_team, odds.get("spread")), _number(odds.get("overUnder")),
+            _number(home_odds.get("moneyLine")), _number(away_odds.get("moneyLine")))
+
+
+def parse_spread(details, home_team, fallback=None):
+    """
+    Turns ESPN's details string ("KC -3.5", "EVEN") into the home team's spread. The favorite is the team
+    named, so if that's the away team the home spread is the same number flipped.
+    """
+    if details:
+        if details.strip().upper() in ("EVEN", "PK", "PICK"):
+            return 0.0
+        team, _, number = details.strip().rpartition(" ")
+        spread = _number(number)
+        if team and spread is not None:
+            return spread if team == home_team else -spread
+    return _number(fallback)
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def all_final(records):
+    """
+    True once every game is over (and there's at least one), at which point the week can't change anymore.
+    """
+    return len(records) > 0 and all(r.completed for r in records)
@@ -1,8 +1,12 @@
-import pandas as pd
-import requests
-import json
+import http_client
 from datetime import datetime
 import os
+import threading
+from lineup_order import order_players
+from player_store import open_player_store, stream_player_store
+from response_cache import get_cache
+from scoreboard import all_final
+from tracing import traced
 
 def main():
     # league_id = '1180303931006689280'  # FFF league
@@ -17,6 +21,7 @@ def main():
     pull_picks(pickem_league_id, 'abonacci')
 
 
+@traced()
 def pull_lineup(league_id, username, week, roster='both'):
     """
     This function calls the sleeper api and obtains the roster data. It has the functionality
@@ -40,31 +45,54 @@ def pull_lineup(league_id, username, week, roster='both'):
     if not (roster == "both" or roster == "user" or roster == "opponent"):
         raise ValueError("Error: Roster must be either 'both', 'user', or 'opponent'.")
 
-    # --- Get all rosters in league ---
-    url_rosters = f'https://api.sleeper.app/v1/league/{league_id}/rosters'
-    data = requests.get(url_rosters).json()
-
-    # --- Get your user_id ---
-    url_user = f'https://api.sleeper.app/v1/user/{username}'
-    user_data = requests.get(url_user).json()
-    user_id = user_data['user_id']
-    user_teamname = next(u["metadata"].get("team_name", u["display_name"]) for u in requests.get(f"https://api.sleeper.app/v1/league/{league_id}/users").json() if u["user_id"] == user_id)
-
-
-    # --- Find your roster_id (different from owner_id!) ---
-    my_roster = next(roster for roster in data if roster['owner_id'] == user_id)
-    my_roster_id = my_roster['roster_id']
-    my_player_ids = my_roster['players']
+    # --- League users/rosters and your user_id (cached, see LeagueContext) ---
+    league = get_league_context(league_id, username)
 
     # --- Player metadata ---
     players_data = get_player_metadata()
 
-    # --- Matchup info for given week ---
+    # --- Matchup info for given week (the only request that actually changes during games) ---
+    matchup_data = pull_matchups(league_id, week)
+
+    return build_lineups(league, matchup_data, players_data, roster)
+
+@traced()
+def pull_matchups(league_id, week, games=None):
+    """
+    Returns the raw /matchups/{week} response: one entry per roster with its matchup_id, starters and players_points.
+    The matchups are cached for good once the week is over: if games (the week's pull_games()) are given that's
+    decided from them, otherwise from whether the scoreboard is already cached as final. Callers that fetch
+    the scoreboard at the same time should call settle_matchups() once both are in.
+    """
     url_matchups = f'https://api.sleeper.app/v1/league/{league_id}/matchups/{week}'
-    matchup_data = requests.get(url_matchups).json()
+    cache = get_cache()
+    return cache.fetch("matchups", league_id, week, lambda: http_client.get_json(url_matchups),
+                       lambda data: all_final(games) if games is not None else cache.is_final("scoreboard", None, week))
+
+def settle_matchups(league_id, week, matchup_data, games):
+    """
+    Stores matchups that were fetched alongside the scoreboard (so pull_matchups() couldn't know yet) as final
+    if every one of the week's games is, so the next visit to a finished week doesn't go upstream again.
+    """
+    cache = get_cache()
+    if all_final(games) and not cache.is_final("matchups", league_id, week):
+        cache.put("matchups", league_id, week, matchup_data, True)
+
+@traced()
+def build_lineups(league, matchup_data, players_data, roster='both'):
+    """
+    The no-network half of pull_lineup(): given an already loaded LeagueContext, the week's matchups response
+    and the player metadata, builds the user's and/or opponent's Lineup. Same roster/return rules as pull_lineup().
+    """
+    username = league.username
+    user_teamname = league.team_name(league.user_id)
+
+    # --- Find your roster_id (different from owner_id!) ---
+    my_roster_id = league.user_roster()['roster_id']
+    matchups_by_roster = {m['roster_id']: m for m in matchup_data}
 
     # Find your matchup entry
-    user_roster = next(matchup for matchup in matchup_data if matchup['roster_id'] == my_roster_id)
+    user_roster = matchups_by_roster[my_roster_id]
     # get the starters on the user team
 
     if roster == "user":
@@ -74,20 +102,15 @@ def pull_lineup(league_id, username, week, roster='both'):
         # if it isn't just the user, we must get the other starters as well
         # --- Now get the opposing team's roster ---
         my_mid = user_roster.get("matchup_id")
-        # find all rosters sharing the same matchup_id (handles doubleheaders / 3+ team formats too)
-        same_mid = [m for m in matchup_data if m.get("matchup_id") == my_mid]
-        # opponent entries are everyone in same_mid except me
-        opponents = [m for m in same_mid if m["roster_id"] != my_roster_id]
+        # opponent entries are everyone sharing my matchup_id except me (handles doubleheaders / 3+ team formats too)
+        opponents = [m for m in matchup_data if m.get("matchup_id") == my_mid and m["roster_id"] != my_roster_id]
         # usually head-to-head => one opponent; use the first if so
         opponent_roster = opponents[0] if opponents else None
 
         # Get opponent teamname
-        opp_owner_id = next(r['owner_id'] for r in data if r['roster_id'] == opponent_roster['roster_id'])
-        # get all league users (you can move this above and reuse)
-        users = requests.get(f'https://api.sleeper.app/v1/league/{league_id}/users').json()
-        opponent_info = next(u for u in users if u['user_id'] == opp_owner_id)
-        opponent_teamname = opponent_info['metadata'].get('team_name', opponent_info.get('display_name'))
-        opponent_username = opponent_info.get('display_name', opponent_info.get('username'))
+        opp_owner_id = league.owner_of(opponent_roster['roster_id'])
+        opponent_teamname = league.team_name(opp_owner_id)
+        opponent_username = league.display_name(opp_owner_id)
 
         if roster == "opponent":
             player_list =  build_players(opponent_roster, players_data)
@@ -97,50 +120,78 @@ def pull_lineup(league_id, username, week, roster='both'):
 
 def build_players(roster, players_data):
     """
-    Given a list of player ids, it creates a list of Player objects initiated with no points
+    Given a list of player ids, it creates a list of Player objects initiated with no points.
+    players_data can be the player store from get_player_metadata() or a plain dict of player_id -> metadata.
     """
     starter_ids = roster['starters']    # list of player IDs
+    if hasattr(players_data, "get_many"):
+        # one indexed query for the whole lineup instead of one per starter
+        players_data = players_data.get_many(starter_ids)
     players = []
     for player in starter_ids:
         try:
-            players.append(Player(players_data[player]["first_name"], 
-                                players_data[player]["last_name"], 
-                                players_data[player]["position"],
-                                players_data[player]["injury_status"],
+            meta = players_data[player]
+            players.append(Player(meta["first_name"], 
+                                meta["last_name"], 
+                                meta["position"],
+                                meta["injury_status"],
                                 roster.get('players_points', {})[player],
-                                players_data[player]["team"],
-                                players_data[player]["number"]))
+                                meta["team"],
+                                meta["number"],
+                                player))
         except KeyError:
-            players.append(Player("---", "---", "None", "None", 0, "--", 0))
+            players.append(Player("---", "---", "None", "None", 0, "--", 0, player))
     return players
 
-def pull_player_metadata(json_file, datefile):
+@traced()
+def pull_player_metadata(datefile, db_file='players_data.db'):
     """
     - This pulls all of the player metadata for each player when needed. Sleeper says 
     "it is intended only to be used once per day at most to keep your player IDs updated. 
     The average size of this query is 5MB." 
-    - When calling this function, it will pull everything then save it to the JSON.
-    - It will also log the date in which it was pulled in datefile.
+    - The response is streamed in chunks and parsed player by player straight into the compact player
+    store (see player_store.py), so we never hold the whole thing in memory or write it back out as JSON.
+    - It will also log the date in which it was pulled in datefile. Both files are written to a temp file
+    and renamed into place, and the date only gets written once the store is complete, so a crash
+    mid-pull can't leave a half-written store that looks fresh.
     """
     print("PULLING FROM SLEEPER")
     # --- Player metadata ---
     url_players = 'https://api.sleeper.app/v1/players/nfl'
-    players_data = requests.get(url_players).json()
-
-    with open(json_file, 'w') as f:
-        json.dump(players_data, f, indent=4)
+    with http_client.stream(url_players) as resp:
+        stream_player_store(resp.iter_content(chunk_size=64 * 1024), db_file)
 
     # Get the current date and time to log it
     current_datetime = datetime.now()
     formatted_datetime = current_datetime.strftime("%Y-%m-%d")  # YYYY-MM-DD
 
-    with open(datefile, 'w') as file:
+    with open(f"{datefile}.tmp", 'w') as file:
         file.write(f"{formatted_datetime}")
+    os.replace(f"{datefile}.tmp", datefile)
 
-def get_player_metadata(json_file='players_data.json', datefile='last_pull.txt'):
+@traced()
+def get_player_metadata(datefile='last_pull.txt', db_file='players_data.db', background=True):
     """
-    This returns all of the player metadata. If the datefile shows that the last date pulled was not
+    This returns the player metadata store. If the datefile shows that the last date pulled was not
     today, we will pull the updated player metadata. If we are already updated, it will just return.
+    The store is indexed by player_id and only holds the fields Player uses, so looking up a lineup's
+    starters doesn't have to parse the whole 5MB file. store[player_id] works just like the old dict.
+    If there's already a store from a previous day, it's returned right away and the new pull happens in
+    the background (see prefetch_player_metadata), the next call after it finishes gets the fresh store.
+    Only a missing store (or background=False) makes the caller wait on the pull.
+    """
+    if metadata_is_stale(datefile, db_file):
+        if background and os.path.exists(db_file):
+            prefetch_player_metadata(datefile, db_file)
+        else:
+            _pull_player_metadata_once(datefile, db_file)
+
+    # then open (this is cached across reruns, and keyed on the file's mtime) and return
+    return open_player_store(db_file)
+
+def metadata_is_stale(datefile='last_pull.txt', db_file='players_data.db'):
+    """
+    True if the store is missing or wasn't pulled today.
     """
     try:
         with open(datefile, "r") as file:
@@ -148,18 +199,40 @@ def get_player_metadata(json_file='players_data.json', datefile='last_pull.txt')
     except FileNotFoundError:
         print(f"Warning: The file '{datefile}' was not found. Defaulting to None.")
         date_last_pulled = "none"
-    
+
     # check the current date against when we last pulled
-    current_datetime = datetime.now()
-    if current_datetime.strftime("%Y-%m-%d") != date_last_pulled or not os.path.exists(json_file):
-        # if we pulled more than a day ago, pull it to update (or if the json just doesn't exist)
-        pull_player_metadata(json_file, datefile)
+    return datetime.now().strftime("%Y-%m-%d") != date_last_pulled or not os.path.exists(db_file)
 
-    # then update and return
-    with open(json_file, 'r') as f:
-        data = json.load(f)
-    
-    return data
+_metadata_pull_lock = threading.Lock()
+_metadata_prefetch = None
+
+def _pull_player_metadata_once(datefile, db_file):
+    # one pull at a time, and whoever was waiting on the lock doesn't pull again
+    with _metadata_pull_lock:
+        if metadata_is_stale(datefile, db_file):
+            pull_player_metadata(datefile, db_file)
+
+def prefetch_player_metadata(datefile='last_pull.txt', db_file='players_data.db'):
+    """
+    Starts the daily metadata pull on a background thread if it's due and one isn't already running.
+    Returns the thread (or None if there was nothing to do). Call it at startup so the pull overlaps with
+    everything else instead of blocking the first render.
+    """
+    global _metadata_prefetch
+    with _metadata_pull_lock:
+        if _metadata_prefetch is not None and _metadata_prefetch.is_alive():
+            return _metadata_prefetch
+        if not metadata_is_stale(datefile, db_file):
+            return None
+        def run():
+            try:
+                _pull_player_metadata_once(datefile, db_file)
+            except Exception as e:
+                # yesterday's store keeps getting used, the next call tries again
+                print(f"Background player metadata pull failed: {e}")
+        _metadata_prefetch = threading.Thread(target=run, name="player-metadata-prefetch", daemon=True)
+        _metadata_prefetch.start()
+        return _metadata_prefetch
 
 
 class Player:
@@ -167,8 +240,13 @@ class Player:
     This class houses all of the information that we actually care about for a player. This object is returned
     for each player in vector format in pull_lineup(). Note that the variable names are exactly the same as the 
     unique keys in the dictionary for a player from the Sleeper API. They should be pretty self explainatory.
+    Slotted (no per-player __dict__), since league and season views hold a lot of these; for big batches
+    see LineupBatch in lineup_batch.py.
     """
-    def __init__(self, first_name, last_name, position, injury_status, player_points, team, number):
+    __slots__ = ("player_id", "first_name", "last_name", "position", "injury_status", "player_points", "team", "number")
+
+    def __init__(self, first_name, last_name, position, injury_status, player_points, team, number, player_id=None):
+        self.player_id = player_id
         self.first_name = first_name
         self.last_name = last_name
         self.position = position
@@ -188,67 +266,239 @@ class Lineup:
     This is a full lineup, which consists of a list of players, the team name, the user associated with that
     team, the amount of total points the team has accrued, etc.
     """
+    __slots__ = ("player_list", "username", "team_name", "total_points", "_ordered_key")
+
     def __init__(self, player_list, username, team_name):
         self.player_list = player_list
         self.username = username
         self.team_name = team_name
         self.total_points = self.calc_total_points()
+        self._ordered_key = None
 
     def calc_total_points(self):
-        pts = 0.0
-        for player in self.player_list:
-            pts += player.player_points
-        return pts
+        return float(sum(player.player_points for player in self.player_list))
     
-    def order_list(self, pos_ordering=["QB", "RB", "WR", "TE", "FLX"]):
+    @traced()
+    def order_list(self, template="standard"):
         """
-        This orders the player list by position and then by points
+        This orders the player list by position and then by points (see lineup_order.py for the templates).
+        The result is remembered, so calling it again does nothing until the points (or the template) change.
         """
-        def bubble_sort_players(arr):
-            n = len(arr)
-            for i in range(n - 1):
-                for j in range(0, n - i - 1):
-                    if arr[j].player_points < arr[j + 1].player_points:  # Compare and swap for descending order
-                        arr[j], arr[j + 1] = arr[j + 1], arr[j]
-            return arr
-        
-        newlist = []
-        flexlist = []
-
-        for pos in pos_ordering:
-            if pos != "FLX":
-                players = self.get_players_by_pos(pos)
-                sorted = bubble_sort_players(players)
-                newlist.append(sorted.pop(0))
-                if (pos == "RB" or pos == "WR"):
-                    newlist.append(sorted.pop(0))
-                if len(sorted) > 0:
-                    flexlist.extend(sorted)
-            else:
-                sorted_flex = bubble_sort_players(flexlist)
-                newlist.extend(sorted_flex)
-                newlist.extend(self.get_players_by_pos("None"))  # add potential None players to the end
-        self.player_list = newlist
-
+        if self._ordered_key == self._order_key(template):
+            return
+        self.player_list = order_players(self.player_list, template)
+        self._ordered_key = self._order_key(template)
 
+    def _order_key(self, template):
+        return (template, tuple((p.player_id, p.player_points) for p in self.player_list))
 
     def get_players_by_pos(self, pos):
-        players = []
-        for player in self.player_list:
-            if player.position == pos:
-                players.append(player)
-        return players
+        return [player for player in self.player_list if player.position == pos]
 
     def __str__(self):
-        string = f"{self.team_name} ({self.username}) - {self.total_points:.2f} Total Points:\n"
-        for player in self.player_list:
-            string += f'{str(player)}\n'
-        return string
+        header = f"{self.team_name} ({self.username}) - {self.total_points:.2f} Total Points:\n"
+        return header + "".join(f"{player}\n" for player in self.player_list)
     
     def __repr__(self):
         return str(self)
 
 
+#################################
+# League context (users/rosters that don't change during a Sunday)
+#################################
+
+# how long league users/rosters are trusted before we re-fetch them (seconds)
+LEAGUE_CONTEXT_TTL = 6 * 60 * 60
+
+_user_ids = {}
+_league_contexts = {}
+_league_contexts_lock = threading.Lock()
+
+
+def resolve_user_id(username):
+    """
+    Looks up a sleeper username's user_id. Usernames never change ids, so this is cached for the life of the process.
+    """
+    if username not in _user_ids:
+        _user_ids[username] = http_client.get_json(f'https://api.sleeper.app/v1/user/{username}')['user_id']
+    return _user_ids[username]
+
+
+class LeagueContext:
+    """
+    This holds the parts of a league that basically never change during a Sunday: the league's users, its
+    rosters, and the user_id of whoever is looking at it. Everything is indexed by id on load so lookups are
+    just dict hits instead of re-fetching and scanning the lists.
+    It starts out empty and loads on the first ensure_fresh(), then reloads itself once it's older than ttl
+    seconds, or whenever refresh() is called. load() takes responses that were fetched elsewhere (e.g. in parallel).
+    """
+    def __init__(self, league_id, username=None, ttl=LEAGUE_CONTEXT_TTL):
+        self.league_id = league_id
+        self.username = username
+        self.ttl = ttl
+        self.loaded_at = None
+
+    def refresh(self):
+        users = http_client.get_json(f'https://api.sleeper.app/v1/league/{self.league_id}/users')
+        rosters = http_client.get_json(f'https://api.sleeper.app/v1/league/{self.league_id}/rosters')
+        self.load(users, rosters)
+
+    def load(self, users, rosters):
+        """
+        Indexes already-fetched users and rosters responses.
+        """
+        self.user_id = resolve_user_id(self.username) if self.username else None
+        self.users_by_id = {u['user_id']: u for u in users}
+        self.rosters_by_id = {r['roster_id']: r for r in rosters}
+        self.roster_by_owner = {r['owner_id']: r for r in rosters if r.get('owner_id')}
+        self.loaded_at = datetime.now()
+
+    def is_stale(self):
+        return self.loaded_at is None or (datetime.now() - self.loaded_at).total_seconds() > self.ttl
+
+    def ensure_fresh(self):
+        if self.is_stale():
+            self.refresh()
+        return self
+
+    def user_roster(self, user_id=None):
+        """
+        Returns the roster owned by user_id (the context's own user by default).
+        """
+        return self.roster_by_owner[user_id or self.user_id]
+
+    def owner_of(self, roster_id):
+        return self.rosters_by_id[roster_id]['owner_id']
+
+    def team_name(self, user_id):
+        user = self.users_by_id[user_id]
+        return user['metadata'].get('team_name', user['display_name'])
+
+    def display_name(self, user_id):
+        user = self.users_by_id[user_id]
+        return user.get('display_name', user.get('username'))
+
+
+def get_league_context(league_id, username=None, fetch=True):
+    """
+    Returns the (cached) LeagueContext for a league, refreshing it first if it's past its ttl.
+    With fetch=False it's returned as is, even if it's stale or was never loaded (check is_stale()).
+    """
+    key = (league_id, username)
+    with _league_contexts_lock:
+        if key not in _league_contexts:
+            _league_contexts[key] = LeagueContext(league_id, username)
+        league = _league_contexts[key]
+    return league.ensure_fresh() if fetch else league
+
+
+#################################
+# League-wide scoreboard (every matchup in the league for a week)
+#################################
+
+class LeagueWeek:
+    """
+    Every lineup in a league for one week, built from a single matchups response and a single metadata lookup.
+    - teams (pd.DataFrame): One row per roster with roster_id, matchup_id, team_name, username, points,
+    opp_points (the average of everyone else in the matchup, so just the opponent for head-to-head), margin
+    and rank (1 = most points in the league). Rosters without a matchup (byes) get NaN opp_points/margin.
+    - players (pd.DataFrame): One row per starter with roster_id, slot (index in the starters list), player_id,
+    position, team (the player's NFL team) and points.
+    - batch (LineupBatch): The starters as one array-backed batch, one lineup per roster (see lineup_batch.py).
+    - lineups (Mapping): roster_id -> Lineup, each one only built the first time it's looked up.
+    """
+    def __init__(self, teams, players, batch):
+        # lineup_batch imports this module for Player/Lineup
+        from lineup_batch import LineupViews
+
+        self.teams = teams
+        self.players = players
+        self.batch = batch
+        self.lineups = LineupViews(batch)
+
+    def matchup(self, matchup_id):
+        """
+        Returns the teams rows for one matchup, best score first.
+        """
+        return self.teams[self.teams["matchup_id"] == matchup_id].sort_values("points", ascending=False)
+
+    def __str__(self):
+        return self.teams.sort_values(["matchup_id", "points"], ascending=[True, False]).to_string(index=False)
+
+    def __repr__(self):
+        return str(self)
+
+
+def pull_league_scoreboard(league_id, week):
+    """
+    Pulls and ranks every matchup in the league for a week: one matchups request (plus the cached league
+    context) and one metadata lookup, no matter how many teams are in the league. See LeagueWeek.
+    """
+    league = get_league_context(league_id)
+    return build_league_week(league, pull_matchups(league_id, week), get_player_metadata())
+
+
+def build_league_week(league, matchup_data, players_data):
+    """
+    The no-network half of pull_league_scoreboard(), the league-wide version of build_lineups().
+    One pass over the matchups builds both tables, no Player or Lineup objects are made until a lineup is
+    looked up in LeagueWeek.lineups.
+    """
+    # only the league-wide views need pandas, so it isn't loaded just to show one matchup
+    import pandas as pd
+    from lineup_batch import LineupBatch
+
+    all_starters = [pid for m in matchup_data for pid in (m.get('starters') or [])]
+    if hasattr(players_data, "get_many"):
+        # one lookup for every starter in the league instead of one per lineup
+        players_data = players_data.get_many(all_starters)
+
+    names = {}
+    roster_ids, matchup_ids, team_names, usernames = [], [], [], []
+    player_rosters, player_slots, player_ids, player_points = [], [], [], []
+    player_positions, player_teams = [], []
+    for m in matchup_data:
+        roster_id = m['roster_id']
+        owner_id = league.rosters_by_id.get(roster_id, {}).get('owner_id')
+        if owner_id in league.users_by_id:
+            team_name, username = league.team_name(owner_id), league.display_name(owner_id)
+        else:
+            # orphaned roster
+            team_name, username = f"Team {roster_id}", None
+        names[roster_id] = (username, team_name)
+
+        roster_ids.append(roster_id)
+        matchup_ids.append(m.get('matchup_id'))
+        team_names.append(team_name)
+        usernames.append(username)
+        points = m.get('players_points') or {}
+        for slot, pid in enumerate(m.get('starters') or []):
+            player_rosters.append(roster_id)
+            player_slots.append(slot)
+            player_ids.append(pid)
+            player_points.append(points.get(pid, 0.0))
+            meta = players_data.get(pid) or {}
+            player_positions.append(meta.get("position"))
+            player_teams.append(meta.get("team"))
+
+    players = pd.DataFrame({"roster_id": player_rosters, "slot": player_slots,
+                            "player_id": player_ids, "position": player_positions, "team": player_teams,
+                            "points": pd.Series(player_points, dtype="float64")})
+    teams = pd.DataFrame({"roster_id": roster_ids, "matchup_id": pd.array(matchup_ids, dtype="Int64"),
+                          "team_name": team_names, "username": usernames})
+
+    # --- vectorized totals, opponent points, margins and ranks ---
+    totals = players.groupby("roster_id")["points"].sum()
+    teams["points"] = teams["roster_id"].map(totals).fillna(0.0)
+    by_matchup = teams.groupby("matchup_id")["points"]
+    matchup_sum = by_matchup.transform("sum")
+    matchup_size = by_matchup.transform("count")
+    teams["opp_points"] = ((matchup_sum - teams["points"]) / (matchup_size - 1)).astype("float64")
+    teams["margin"] = teams["points"] - teams["opp_points"]
+    teams["rank"] = teams["points"].rank(ascending=False, method="min").astype(int)
+    return LeagueWeek(teams, players, LineupBatch.from_frame(players, players_data, names=names))
+
+
 #################################
 # This is now for the pickem pool
 #################################
@@ -258,12 +508,8 @@ def pull_picks(league_id, username):
     This should pull a list of all of your picks and what you need from the pickem pool
     """
 
-    url_user = f'https://api.sleeper.app/v1/user/{username}'
-    user_data = requests.get(url_user).json()
-    user_id = user_data['user_id']
-    users = requests.get(f"https://api.sleeper.app/v1/league/{league_id}/users").json()
-
-    user = next(u for u in users if u["user_id"] == user_id)
+    league = get_league_context(league_id, username)
+    user = league.users_by_id[league.user_id]
     print(user)
     # Sleeper's API doesn't include pickem pools yet, but hidden endpoints may exist... must check
 
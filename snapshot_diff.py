@@ -0,0 +1,74 @@
+"""
+This houses the diffing between two polls of the scoreboard (pull_games output) and the lineups (build_players
+output). Games are keyed on (home_team, away_team) and players on player_id, and a ChangeSet says which of them
+were added, removed, or had a score/clock/status/points change, so bet grading only has to redo those rows.
+GAME_FIELDS and PLAYER_FIELDS are also what the row caches (render_rows.py) compare.
+"""
+from operator import attrgetter, itemgetter
+
+# what we compare for each game and each player, anything else about them doesn't show up on screen
+GAME_FIELDS = ("home_score", "away_score", "status", "quarter", "clock")
+PLAYER_FIELDS = ("player_points", "injury_status")
+
+
+class ChangeSet:
+    """
+    The difference between two polls.
+    - added (set): keys only in the new poll.
+    - removed (set): keys only in the old poll.
+    - changed (dict): key -> {field: (old value, new value)} for keys in both polls whose fields differ.
+    """
+    def __init__(self, added, removed, changed):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def dirty(self):
+        """
+        Keys that need to be (re)drawn: everything added or changed.
+        """
+        return self.added | self.changed.keys()
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __str__(self):
+        return f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed"
+
+    def __repr__(self):
+        return str(self)
+
+
+def game_key(game):
+    return (game["home_team"], game["away_team"])
+
+
+def diff_games(prev_games, games):
+    """
+    Diffs two pull_games() results (lists of game dicts).
+    """
+    prev = {game_key(g): g for g in prev_games}
+    curr = {game_key(g): g for g in games}
+    return _diff(prev, curr, GAME_FIELDS, itemgetter(*GAME_FIELDS))
+
+
+def diff_players(prev_players, players):
+    """
+    Diffs two lists of Player objects (e.g. two polls of a lineup's player_list).
+    """
+    prev = {p.player_id: p for p in prev_players}
+    curr = {p.player_id: p for p in players}
+    return _diff(prev, curr, PLAYER_FIELDS, attrgetter(*PLAYER_FIELDS))
+
+
+def _diff(prev, curr, fields, get_values):
+    # get_values pulls all the compared fields out as one tuple, so an unchanged row is a single comparison
+    changed = {}
+    for key in prev.keys() & curr.keys():
+        old, new = prev[key], curr[key]
+        if old is new:
+            continue
+        old_values, new_values = get_values(old), get_values(new)
+        if old_values != new_values:
+            changed[key] = {field: (o, n) for field, o, n in zip(fields, old_values, new_values) if o != n}
+    return ChangeSet(curr.keys() - prev.keys(), prev.keys() - curr.keys(), changed)
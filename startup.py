@@ -0,0 +1,71 @@
+"""
+This houses the startup timing for the dashboard. dashboard.py imports this first, so everything is measured
+from the moment the process started loading the dashboard: how long its imports took and how long until the
+first full render finished. Each is only recorded the first time (Streamlit reruns the script, but a process
+only starts once) and checked against a fixed budget, so a slow new import shows up right away.
+It also has warm_imports(), which loads heavy modules on a background thread while the first render is busy
+with the network, so the parts of the page that need them don't pay for the import later.
+"""
+import importlib
+import threading
+import time
+
+PROCESS_START = time.perf_counter()
+
+# milliseconds, measured from PROCESS_START
+BUDGETS = {"imports": 500, "first render": 2500}
+
+_marks = {}
+_marks_lock = threading.Lock()
+
+
+def mark(label):
+    """
+    Records how long it's been since startup under label, only the first time it's called for that label
+    (printing a warning if that's over its budget). Returns the recorded milliseconds.
+    """
+    with _marks_lock:
+        if label in _marks:
+            return _marks[label]
+        ms = _marks[label] = (time.perf_counter() - PROCESS_START) * 1000
+    if label in BUDGETS and ms > BUDGETS[label]:
+        print(f"Startup: {label} took {ms:.0f} ms, over its {BUDGETS[label]} ms budget")
+    return ms
+
+
+def over_budget():
+    """
+    {label: (ms, budget)} for every recorded mark that went over its budget.
+    """
+    with _marks_lock:
+        return {label: (ms, BUDGETS[label]) for label, ms in _marks.items() if label in BUDGETS and ms > BUDGETS[label]}
+
+
+def report():
+    """
+    One line like "imports 180 ms · first render 950 ms", with anything over budget flagged.
+    """
+    with _marks_lock:
+        marks = list(_marks.items())
+    parts = []
+    for label, ms in marks:
+        budget = BUDGETS.get(label)
+        flag = f" (over {budget} ms budget)" if budget is not None and ms > budget else ""
+        parts.append(f"{label} {ms:.0f} ms{flag}")
+    return " · ".join(parts)
+
+
+def warm_imports(modules):
+    """
+    Imports modules (names) on a daemon thread and returns it. Anything that fails to import is left for the
+    real import to raise.
+    """
+    def run():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+    thread = threading.Thread(target=run, name="warm-imports", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,263 @@
+"""
+This houses the tracing: named timing spans around the parts of a refresh worth watching (the pulls, the
+player metadata load, lineup ordering, the poll, the row rendering). They're aggregated per span into
+p50/p95/max, and there's a Prometheus text dump of those plus the HTTP client's per-endpoint numbers, and a
+small sampling profiler for looking at a single rerun.
+
+Tracing is off unless SUNDAY_TRACE is set (to anything but "" or "0") when the process starts. While it's off,
+@traced hands back the function itself untouched and span() hands back one shared do-nothing context
+manager, so leaving the instrumentation in costs next to nothing.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+ENABLED = os.environ.get("SUNDAY_TRACE", "") not in ("", "0")
+# durations kept per span for the percentiles (the most recent ones), count/sum/max cover everything
+SAMPLE_SIZE = 1024
+PROFILE_INTERVAL = 0.005
+
+
+def percentile(sorted_values, q):
+    """
+    The q-th percentile (0-100) of an already sorted list, nearest rank. 0.0 for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+
+class SpanStats:
+    """
+    Running numbers for one span name. Times are in seconds.
+    """
+    __slots__ = ("count", "total", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        self.samples.append(elapsed)
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def as_dict(self):
+        samples = sorted(self.samples)
+        return {
+            "count": self.count,
+            "p50_ms": 1000 * percentile(samples, 50),
+            "p95_ms": 1000 * percentile(samples, 95),
+            "max_ms": 1000 * self.max,
+            "total_ms": 1000 * self.total,
+        }
+
+
+_spans = {}
+_spans_lock = threading.Lock()
+
+
+def record(name, elapsed):
+    """
+    Adds one timing (seconds) to name's stats.
+    """
+    with _spans_lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = SpanStats()
+        stats.add(elapsed)
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name):
+    """
+    Context manager that times its block under name (a no-op while tracing is off).
+    """
+    return _Span(name) if ENABLED else _NO_SPAN
+
+
+def traced(name=None):
+    """
+    Decorator that times every call of a function under name (its qualified name by default). While tracing
+    is off it returns the function unchanged.
+    """
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        label = name or fn.__qualname__
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - start)
+        wrapper.__name__ = fn.__name__
+        wrapper.__qualname__ = fn.__qualname__
+        wrapper.__doc__ = fn.__doc__
+        wrapper.__wrapped__ = fn
+        return wrapper
+    return decorate
+
+
+def report():
+    """
+    {span: {"count", "p50_ms", "p95_ms", "max_ms", "total_ms"}}, slowest total first.
+    """
+    with _spans_lock:
+        stats = {name: s.as_dict() for name, s in _spans.items()}
+    return dict(sorted(stats.items(), key=lambda item: -item[1]["total_ms"]))
+
+
+def reset():
+    with _spans_lock:
+        _spans.clear()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus():
+    """
+    The span stats and the HTTP client's endpoint stats in the Prometheus text exposition format.
+    The percentiles are over each span's last SAMPLE_SIZE timings.
+    """
+    # imported here so tracing itself has no imports worth measuring
+    import http_client
+
+    lines = ["# HELP sunday_span_seconds Time spent in traced spans.", "# TYPE sunday_span_seconds summary"]
+    for name, s in report().items():
+        label = f'span="{_label(name)}"'
+        lines.append(f'sunday_span_seconds{{{label},quantile="0.5"}} {s["p50_ms"] / 1000:.6f}')
+        lines.append(f'sunday_span_seconds{{{label},quantile="0.95"}} {s["p95_ms"] / 1000:.6f}')
+        lines.append(f'sunday_span_seconds_sum{{{label}}} {s["total_ms"] / 1000:.6f}')
+        lines.append(f'sunday_span_seconds_count{{{label}}} {s["count"]}')
+    lines += ["# HELP sunday_span_max_seconds Slowest single run of each traced span.",
+              "# TYPE sunday_span_max_seconds gauge"]
+    lines += [f'sunday_span_max_seconds{{span="{_label(name)}"}} {s["max_ms"] / 1000:.6f}' for name, s in report().items()]
+
+    endpoints = http_client.stats()
+    lines += ["# HELP sunday_http_request_seconds Upstream request latency per endpoint.",
+              "# TYPE sunday_http_request_seconds summary"]
+    for endpoint, s in endpoints.items():
+        label = f'endpoint="{_label(endpoint)}"'
+        lines.append(f'sunday_http_request_seconds{{{label},quantile="0.5"}} {s["p50_ms"] / 1000:.6f}')
+        lines.append(f'sunday_http_request_seconds{{{label},quantile="0.95"}} {s["p95_ms"] / 1000:.6f}')
+        lines.append(f'sunday_http_request_seconds_sum{{{label}}} {s["avg_ms"] * s["requests"] / 1000:.6f}')
+        lines.append(f'sunday_http_request_seconds_count{{{label}}} {s["requests"]}')
+    for metric, key, help_text in (("sunday_http_not_modified_total", "not_modified", "Upstream 304 responses."),
+                                   ("sunday_http_errors_total", "errors", "Failed upstream requests."),
+                                   ("sunday_http_throttled_total", "throttled",
+                                    "Requests answered from the last response because the host was out of budget."),
+                                   ("sunday_http_merged_total", "merged",
+                                    "Requests that shared another caller's in-flight fetch.")):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        lines += [f'{metric}{{endpoint="{_label(endpoint)}"}} {s[key]}' for endpoint, s in endpoints.items()]
+    return "\n".join(lines) + "\n"
+
+
+# --- sampling profiler ---
+
+class Profile:
+    """
+    Stack samples from one sample_profile() block.
+    - samples (int): How many times the thread's stack was looked at.
+    - own (Counter): "function (file:line)" -> samples where it was the one running.
+    - inclusive (Counter): Same, but counting every function anywhere on the stack.
+    """
+    def __init__(self):
+        self.samples = 0
+        self.own = Counter()
+        self.inclusive = Counter()
+        self.elapsed = 0.0
+
+    def top(self, n=15):
+        """
+        The n functions with the most time on the stack, as (function, inclusive %, own %).
+        """
+        if not self.samples:
+            return []
+        return [(fn, 100 * count / self.samples, 100 * self.own[fn] / self.samples)
+                for fn, count in self.inclusive.most_common(n)]
+
+    def report(self, n=15):
+        lines = [f"{self.samples} samples over {1000 * self.elapsed:.0f} ms", f"{'incl %':>7}{'own %':>7}  function"]
+        lines += [f"{incl:>7.1f}{own:>7.1f}  {fn}" for fn, incl, own in self.top(n)]
+        return "\n".join(lines)
+
+
+def _where(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+@contextmanager
+def sample_profile(interval=PROFILE_INTERVAL):
+    """
+    Samples the calling thread's stack every interval seconds from a background thread until the block
+    ends, and yields the Profile it fills in. Works whether tracing is on or not, it's only running while
+    the block is.
+    """
+    profile = Profile()
+    target = threading.get_ident()
+    done = threading.Event()
+
+    def run():
+        while not done.wait(interval):
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                continue
+            profile.samples += 1
+            profile.own[_where(frame)] += 1
+            seen = set()
+            while frame is not None:
+                where = _where(frame)
+                if where not in seen:
+                    seen.add(where)
+                    profile.inclusive[where] += 1
+                frame = frame.f_back
+
+    sampler = threading.Thread(target=run, name="sampling-profiler", daemon=True)
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        yield profile
+    finally:
+        done.set()
+        sampler.join()
+        profile.elapsed = time.perf_counter() - start